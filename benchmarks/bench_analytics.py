@@ -0,0 +1,40 @@
+"""Benchmarks for risk, market data processing and strategy updates."""
+import pandas as pd
+import pytest
+from conftest import SIZES, closes, ohlcv
+from src.data.market_data import MarketDataService
+from src.data.replay import ReplayExchange
+from src.risk.risk_manager import RiskManager
+from src.strategy.base_strategy import BaseStrategy
+
+
+class MovingAverageCross(BaseStrategy):
+    """Minimal concrete strategy so ``BaseStrategy.update`` can be measured."""
+
+    def generate_signals(self, data: pd.DataFrame) -> pd.Series:
+        fast = data['close'].rolling(10).mean()
+        slow = data['close'].rolling(50).mean()
+        return (fast > slow).astype(float) - (fast < slow).astype(float)
+
+
+@pytest.mark.benchmark(group='RiskManager.calculate_var')
+@pytest.mark.parametrize('size', SIZES)
+def bench_calculate_var(benchmark, size):
+    history = closes(size)
+    positions = {symbol: 10.0 for symbol in history.columns}
+    risk_manager = RiskManager({})
+    benchmark(risk_manager.calculate_var, positions, history)
+
+
+@pytest.mark.benchmark(group='MarketDataService.process_raw_data')
+@pytest.mark.parametrize('size', [100, 1000, 10000])
+def bench_process_raw_data(benchmark, size):
+    service = MarketDataService(exchange=ReplayExchange({}))
+    benchmark(service.process_raw_data, ohlcv(size))
+
+
+@pytest.mark.benchmark(group='BaseStrategy.update')
+@pytest.mark.parametrize('size', [100, 1000, 10000])
+def bench_strategy_update(benchmark, size):
+    strategy = MovingAverageCross({'max_position_size': 0.1})
+    benchmark(strategy.update, ohlcv(size))
@@ -0,0 +1,65 @@
+"""Benchmarks for the fill path: position keeping and trade journaling."""
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models.account import Account
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide, OrderStatus, OrderType
+from src.database.models.order import Order
+from src.execution.position_keeper import PositionKeeper
+from src.execution.trade_journal import TradeJournal
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fills.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert(), [
+        {'id': n, 'symbol': f"SYM{n}", 'name': f"Instrument {n}", 'type': InstrumentType.EQUITY} for n in range(1, 11)
+    ])
+    db.add(Order(id=1, account_id=1, instrument_id=1, type=OrderType.MARKET, side=OrderSide.BUY,
+                 status=OrderStatus.FILLED, quantity=1))
+    db.commit()
+    db.close()
+    return factory
+
+
+@pytest.mark.benchmark(group='PositionKeeper.apply_fills')
+@pytest.mark.parametrize('fills', [1, 1000])
+def bench_apply_fills(benchmark, session_factory, fills):
+    """Write a batch of ``fills`` fills over 10 positions, as the trade journal does per insert."""
+    keeper = PositionKeeper(session_factory)
+    batch = [{'account_id': 1, 'instrument_id': 1 + n % 10, 'side': OrderSide.BUY, 'quantity': Decimal(1),
+              'price': Decimal('100.25')} for n in range(fills)]
+    benchmark(keeper.apply_fills, batch)
+
+
+@pytest.mark.benchmark(group='TradeJournal.record+flush')
+@pytest.mark.parametrize('fills', [1000, 10000])
+def bench_journal_fills(benchmark, tmp_path, session_factory, fills):
+    """Journal ``fills`` fills (one fsync per 100) and insert them, as the writer thread would."""
+    journal = TradeJournal(str(tmp_path / 'wal'), session_factory, flush_interval=3600, batch_size=1000,
+                           capacity=fills + 1)
+    journal.start()
+    executed_at = datetime(2026, 1, 2)
+    runs = iter(range(10 ** 9))
+
+    def journal_fills():
+        run = next(runs)
+        for n in range(fills):
+            journal.record({
+                'fill_id': f"{run}-{n}", 'order_id': 1, 'account_id': 1, 'instrument_id': 1,
+                'quantity': Decimal(1), 'price': Decimal('100.25'), 'side': OrderSide.BUY,
+                'executed_at': executed_at,
+            }, durable=n % 100 == 99)
+        while journal.flush():
+            pass
+
+    try:
+        benchmark.pedantic(journal_fills, rounds=3)
+    finally:
+        journal.stop()
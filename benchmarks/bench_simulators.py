@@ -0,0 +1,73 @@
+"""Benchmarks for the market, bond and futures simulators."""
+from datetime import timedelta
+import pytest
+from conftest import SIZES
+from services.market_simulator.factor_model import synthetic_equities
+from services.market_simulator.fixed_income import BondUniverse, YieldCurve
+from services.market_simulator.futures_simulator import FuturesSimulator
+from services.market_simulator.instruments import Bond
+from services.market_simulator.market_simulator import MarketSimulator
+from src.utils.clock import SimulatedClock
+
+REDIS_URL = 'redis://localhost:6379'  # never connected to: nothing is published
+
+
+@pytest.mark.benchmark(group='MarketSimulator.generate_price_update')
+@pytest.mark.parametrize('size', SIZES)
+def bench_market_generate_price_update(benchmark, size):
+    simulator = MarketSimulator(REDIS_URL, extra_equities=synthetic_equities(size), clock=SimulatedClock(), seed=1)
+    symbols = simulator.symbols
+
+    def tick():
+        for symbol in symbols:
+            simulator.generate_price_update(symbol)
+
+    benchmark(tick)
+
+
+@pytest.mark.benchmark(group='MarketSimulator.generate_updates[factor]')
+@pytest.mark.parametrize('size', SIZES)
+def bench_market_factor_updates(benchmark, size):
+    simulator = MarketSimulator(REDIS_URL, mode='factor', extra_equities=synthetic_equities(size),
+                                clock=SimulatedClock(), seed=1)
+    benchmark(simulator.generate_updates)
+
+
+@pytest.mark.benchmark(group='FuturesSimulator.generate_price_updates')
+@pytest.mark.parametrize('size', SIZES)
+def bench_futures_generate_price_updates(benchmark, size):
+    assets = {f"A{i}": 100.0 for i in range(size)}
+    simulator = FuturesSimulator(REDIS_URL, clock=SimulatedClock(), seed=1, assets=assets)
+    benchmark(simulator.generate_price_updates)
+
+
+def bonds(size, clock, rng):
+    """``size`` bonds with maturities spread over 1 to 30 years."""
+    curve = {1: 0.04, 2: 0.042, 5: 0.045, 10: 0.048, 30: 0.05}
+    now = clock.now()
+    return [
+        Bond(f"B{i}", f"Bond {i}", 1000.0, 0.03 + 0.03 * i / size,
+             now + timedelta(days=365 + (i * 29 * 365) // size), 'AAA', curve, clock=clock, rng=rng)
+        for i in range(size)
+    ]
+
+
+@pytest.mark.benchmark(group='Bond.update_price')
+@pytest.mark.parametrize('size', SIZES)
+def bench_bond_update_price(benchmark, size, rng):
+    universe = bonds(size, SimulatedClock(), rng)
+
+    def tick():
+        for bond in universe:
+            bond.update_price(1.0)
+
+    benchmark(tick)
+
+
+@pytest.mark.benchmark(group='BondUniverse.reprice')
+@pytest.mark.parametrize('size', SIZES)
+def bench_bond_universe_reprice(benchmark, size, rng):
+    clock = SimulatedClock()
+    universe = BondUniverse.from_bonds(bonds(size, clock, rng))
+    curve = YieldCurve.from_dict({1: 0.04, 2: 0.042, 5: 0.045, 10: 0.048, 30: 0.05})
+    benchmark(universe.reprice, curve, clock.now())
@@ -0,0 +1,37 @@
+"""Shared fixtures for the microbenchmark suite."""
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Universe sizes every scaling benchmark is run at
+SIZES = [10, 100, 1000]
+
+
+def ohlcv(rows: int, seed: int = 42) -> pd.DataFrame:
+    """A random-walk OHLCV frame of ``rows`` bars."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-02', periods=rows, freq='min'),
+        'open': close + rng.normal(0, 0.1, rows),
+        'high': close + rng.random(rows),
+        'low': close - rng.random(rows),
+        'close': close,
+        'volume': rng.exponential(5.0, rows),
+    })
+
+
+def closes(symbols: int, rows: int = 1000, seed: int = 42) -> pd.DataFrame:
+    """Close prices for ``symbols`` random-walk instruments, one column each."""
+    rng = np.random.default_rng(seed)
+    paths = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (rows, symbols)), axis=0))
+    return pd.DataFrame(paths, columns=[f"SYM{i}" for i in range(symbols)])
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
@@ -0,0 +1,46 @@
+"""Unique position per account and instrument
+
+Revision ID: 44452ee3c0ae
+Revises: 34452ee3c0ae
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '44452ee3c0ae'
+down_revision: Union[str, None] = '34452ee3c0ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fold duplicate positions into the oldest row before enforcing uniqueness
+    op.execute("""
+        UPDATE positions p
+        SET quantity = d.quantity
+        FROM (
+            SELECT MIN(id) AS id, SUM(quantity) AS quantity
+            FROM positions
+            GROUP BY account_id, instrument_id
+            HAVING COUNT(*) > 1
+        ) d
+        WHERE p.id = d.id
+    """)
+    op.execute("""
+        DELETE FROM positions p
+        USING positions keep
+        WHERE p.account_id = keep.account_id
+        AND p.instrument_id = keep.instrument_id
+        AND p.id > keep.id
+    """)
+    # Position writes upsert on this key
+    op.create_unique_constraint('uq_positions_account_instrument', 'positions', ['account_id', 'instrument_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_positions_account_instrument', 'positions', type_='unique')
@@ -0,0 +1,30 @@
+"""Add fill_id to trades
+
+Revision ID: 54452ee3c0ae
+Revises: 44452ee3c0ae
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '54452ee3c0ae'
+down_revision: Union[str, None] = '44452ee3c0ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Journaled fills are inserted with ON CONFLICT (fill_id) DO NOTHING;
+    # rows written before the journal keep a NULL fill_id
+    op.add_column('trades', sa.Column('fill_id', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('uq_trades_fill_id', 'trades', ['fill_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_trades_fill_id', 'trades', type_='unique')
+    op.drop_column('trades', 'fill_id')
@@ -0,0 +1,108 @@
+"""Partition orders and trades by month
+
+Revision ID: 64452ee3c0ae
+Revises: 54452ee3c0ae
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.partitions import add_months, create_partition_sql, month_start, months_between
+
+
+# revision identifiers, used by Alembic.
+revision: str = '64452ee3c0ae'
+down_revision: Union[str, None] = '54452ee3c0ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _partition(table: str, column: str) -> None:
+    """Rebuild ``table`` as a table partitioned by month on ``column`` and move its rows over."""
+    conn = op.get_bind()
+    # Every row needs a partition key
+    op.execute(f"UPDATE {table} SET {column} = now() WHERE {column} IS NULL")
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+    oldest = conn.exec_driver_sql(f"SELECT min({column}) FROM {table}").scalar()
+    current = month_start(datetime.utcnow().date())
+
+    # LIKE copies columns, NOT NULLs and the id sequence default; keys and
+    # indexes are rebuilt below, since every unique key must include the
+    # partition column
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+    op.execute(f"ALTER TABLE {table}_unpartitioned RENAME CONSTRAINT {table}_pkey TO {table}_unpartitioned_pkey")
+    op.execute(f"CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE ({column})")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})")
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+    for month in months_between(oldest.date() if oldest else current, add_months(current, MONTHS_AHEAD)):
+        op.execute(create_partition_sql(table, month))
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def upgrade() -> None:
+    # Postgres cannot reference a partitioned table by a key that leaves out
+    # its partition column, so trades.order_id is no longer a foreign key
+    op.execute("ALTER TABLE trades DROP CONSTRAINT IF EXISTS trades_order_id_fkey")
+
+    _partition('orders', 'created_at')
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (account_id) REFERENCES accounts (id)")
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (instrument_id) REFERENCES instruments (id)")
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (contract_id) REFERENCES futures_contracts (id)")
+    op.execute("CREATE INDEX ix_orders_account_created ON orders (account_id, created_at)")
+    op.execute("CREATE INDEX ix_orders_status_created ON orders (status, created_at)")
+    # The order list's default sort, newest first
+    op.execute("CREATE INDEX ix_orders_created_id ON orders (created_at DESC, id DESC)")
+
+    op.drop_constraint('uq_trades_fill_id', 'trades', type_='unique')
+    _partition('trades', 'executed_at')
+    op.execute("ALTER TABLE trades ADD FOREIGN KEY (account_id) REFERENCES accounts (id)")
+    op.execute("ALTER TABLE trades ADD FOREIGN KEY (instrument_id) REFERENCES instruments (id)")
+    op.execute("ALTER TABLE trades ADD CONSTRAINT uq_trades_fill_id UNIQUE (fill_id, executed_at)")
+    op.execute("CREATE INDEX ix_trades_order_id ON trades (order_id)")
+    op.execute("CREATE INDEX ix_trades_account_executed ON trades (account_id, executed_at)")
+
+    # The unique key above only catches a fill stored twice at the same
+    # time; this unpartitioned table keeps each fill_id once
+    op.create_table('trade_fills',
+    sa.Column('fill_id', sa.String(length=64), nullable=False),
+    sa.Column('executed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('fill_id')
+    )
+    op.create_index('ix_trade_fills_executed_at', 'trade_fills', ['executed_at'])
+    op.execute(
+        "INSERT INTO trade_fills (fill_id, executed_at) "
+        "SELECT fill_id, min(executed_at) FROM trades WHERE fill_id IS NOT NULL GROUP BY fill_id"
+    )
+
+    op.execute("DROP TABLE trades_unpartitioned")
+    op.execute("DROP TABLE orders_unpartitioned")
+
+
+def _unpartition(table: str) -> None:
+    op.execute(f"CREATE TABLE {table}_unpartitioned (LIKE {table} INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table}_unpartitioned SELECT * FROM {table}")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}_unpartitioned.id")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {table}_unpartitioned RENAME TO {table}")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+
+
+def downgrade() -> None:
+    # Archived partitions are not restored
+    op.drop_table('trade_fills')
+    _unpartition('trades')
+    _unpartition('orders')
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (account_id) REFERENCES accounts (id)")
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (instrument_id) REFERENCES instruments (id)")
+    op.execute("ALTER TABLE orders ADD FOREIGN KEY (contract_id) REFERENCES futures_contracts (id)")
+    op.execute("ALTER TABLE trades ADD FOREIGN KEY (account_id) REFERENCES accounts (id)")
+    op.execute("ALTER TABLE trades ADD FOREIGN KEY (instrument_id) REFERENCES instruments (id)")
+    op.execute("ALTER TABLE trades ADD FOREIGN KEY (order_id) REFERENCES orders (id)")
+    op.execute("ALTER TABLE trades ADD CONSTRAINT uq_trades_fill_id UNIQUE (fill_id)")
@@ -0,0 +1,36 @@
+"""Add order_events outbox
+
+Revision ID: 74452ee3c0ae
+Revises: 64452ee3c0ae
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '74452ee3c0ae'
+down_revision: Union[str, None] = '64452ee3c0ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows live only until the relay publishes them, so the table stays
+    # small; order_id has no foreign key since orders is partitioned
+    op.create_table('order_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('type', sa.String(length=32), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_events')
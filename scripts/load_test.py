@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Drive the order pipeline at a fixed rate and report latency percentiles and throughput.
+
+Examples:
+    # Against docker-compose: API on localhost:8000, execution on the Celery workers
+    python scripts/load_test.py --api-url http://localhost:8000 --executor celery --rate 100 --duration 60
+
+    # Entirely in-process: API on a local SQLite database, fills on the simulated exchange
+    python scripts/load_test.py --in-process --executor simulated --rate 200 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.loadtest.order_load import (
+    ApiSubmitter, CeleryExecutor, OrderLoadTest, OrderMix, SimulatedExecutor,
+    format_report, in_process_app, write_report
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--api-url', default=os.getenv('API_URL', 'http://localhost:8000'))
+    parser.add_argument('--in-process', action='store_true', help='Serve the API in-process on SQLite')
+    parser.add_argument('--database-url', default='sqlite:///loadtest.db', help='Database for --in-process')
+    parser.add_argument('--executor', choices=['none', 'simulated', 'celery'], default='none')
+    parser.add_argument('--broker-url', default=os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    parser.add_argument('--task-name', default='worker.tasks.execute_order')
+    parser.add_argument('--rate', type=float, default=50.0, help='Orders per second')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load')
+    parser.add_argument('--max-outstanding', type=int, default=256)
+    parser.add_argument('--contracts', type=int, default=5, help='Contracts to create and trade')
+    parser.add_argument('--market-share', type=float, default=0.7, help='Fraction of market orders')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--report', default='load_test_report.json')
+    return parser.parse_args()
+
+
+async def main(args):
+    app = in_process_app(args.database_url) if args.in_process else None
+    submitter = ApiSubmitter(args.api_url, app=app)
+    engine = None
+    try:
+        contract_ids = await submitter.create_contracts(args.contracts)
+        mix = OrderMix(contract_ids, market_share=args.market_share, seed=args.seed)
+        executor = None
+        if args.executor == 'celery':
+            executor = CeleryExecutor(args.broker_url, args.task_name)
+        elif args.executor == 'simulated':
+            from src.execution.simulated_exchange import SimulatedExchange
+            from src.execution.trading_engine import TradingEngine
+            from src.utils.rate_limit import AsyncTokenBucket
+            symbols = {contract_id: f"C{contract_id}" for contract_id in contract_ids}
+            exchange = SimulatedExchange(prices={symbol: 100.0 for symbol in symbols.values()})
+            engine = TradingEngine(exchange=exchange, max_in_flight=args.max_outstanding,
+                                   rate_limiter=AsyncTokenBucket(rate=1e6, capacity=1e6))
+            executor = SimulatedExecutor(engine, symbols)
+        load_test = OrderLoadTest(submitter, mix, executor, rate=args.rate,
+                                  duration=args.duration, max_outstanding=args.max_outstanding)
+        summary = await load_test.run()
+    finally:
+        await submitter.close()
+        if engine is not None:
+            await engine.close()
+    summary.update({'executor': args.executor, 'target': 'in-process' if args.in_process else args.api_url})
+    write_report(summary, args.report)
+    print(format_report(summary))
+    print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
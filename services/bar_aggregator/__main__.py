@@ -0,0 +1,5 @@
+"""Main entry point for the bar aggregator."""
+from services.bar_aggregator.aggregator import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Bar aggregation service: turns simulator ticks into OHLCV bars."""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+from src.data.bar_store import BarStore
+from src.data.bars import BarAggregator, NS_PER_SECOND, parse_tick
+from src.utils.redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+TICK_CHANNELS = ('market_data', 'futures_market_data')
+
+
+def bar_channel(timeframe: str) -> str:
+    """Channel completed bars of a timeframe are published on."""
+    return f"bars:{timeframe}"
+
+
+class BarAggregatorService:
+    def __init__(self, redis_url: Optional[str] = None, timeframes: Iterable[str] = ('1s', '1m', '5m', '1h'),
+                 capacity: int = 1000, bar_store: Optional[BarStore] = None):
+        self.redis = get_redis(redis_url)
+        self.aggregator = BarAggregator(timeframes, capacity)
+        self.bar_store = bar_store
+        self._last_sweep = 0
+
+    def handle_message(self, channel: str, data: bytes) -> List[Dict[str, Any]]:
+        """Process one pub/sub message and emit the bars it completed."""
+        try:
+            symbol, timestamp, price, volume = parse_tick(channel, json.loads(data))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Dropping malformed tick on {channel}: {str(e)}")
+            return []
+        bars = self.aggregator.on_tick(symbol, timestamp, price, volume)
+        # Close out bars of symbols that stopped ticking, using stream time so
+        # replayed or accelerated feeds behave the same as live ones.
+        if timestamp - self._last_sweep >= NS_PER_SECOND:
+            self._last_sweep = timestamp
+            bars.extend(self.aggregator.close_stale(timestamp))
+        self.emit(bars)
+        return bars
+
+    def emit(self, bars: List[Dict[str, Any]]):
+        """Publish completed bars and append them to the bar store."""
+        for bar in bars:
+            self.redis.publish(bar_channel(bar['timeframe']), json.dumps(bar))
+            if self.bar_store is not None:
+                self.bar_store.append(bar['symbol'], {
+                    name: [bar[name]] for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+                }, timeframe=bar['timeframe'])
+
+    def run(self):
+        """Consume tick channels until interrupted."""
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*TICK_CHANNELS)
+        try:
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    self.handle_message(message['channel'].decode('utf-8'), message['data'])
+        finally:
+            pubsub.close()
+
+
+def main():
+    """Run the bar aggregator."""
+    timeframes = os.getenv('BAR_TIMEFRAMES', '1s,1m,5m,1h').split(',')
+    capacity = int(os.getenv('BAR_BUFFER_SIZE', '1000'))
+    bar_store_path = os.getenv('BAR_STORE_PATH')
+    bar_store = BarStore(bar_store_path) if bar_store_path else None
+    service = BarAggregatorService(None, timeframes, capacity, bar_store)
+    service.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Correlated factor model driving equities and rates in the market simulator."""
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+SECTORS = ['Technology', 'Finance', 'Energy', 'Healthcare', 'Consumer', 'Industrials', 'Utilities']
+
+
+def sector_correlation(sectors: Sequence[str], intra: float = 0.5, inter: float = 0.1) -> np.ndarray:
+    """Correlation of idiosyncratic shocks: ``intra`` within a sector, ``inter`` across sectors."""
+    sectors = np.asarray(sectors)
+    same = sectors[:, None] == sectors[None, :]
+    corr = np.where(same, intra, inter).astype(np.float64)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def synthetic_equities(count: int, seed: int = 0) -> List[Tuple[str, str, float, str, float, float]]:
+    """Generate ``(symbol, name, price, sector, market_cap, beta)`` rows for a large test universe."""
+    rng = np.random.default_rng(seed)
+    prices = np.round(rng.lognormal(np.log(80.0), 0.8, count), 2)
+    sectors = rng.choice(SECTORS, count)
+    market_caps = rng.lognormal(np.log(20e9), 1.2, count)
+    betas = np.round(np.clip(rng.normal(1.0, 0.3, count), 0.2, 2.5), 2)
+    return [
+        (f"SYN{i:05d}", f"Synthetic {i}", float(prices[i]), str(sectors[i]), float(market_caps[i]), float(betas[i]))
+        for i in range(count)
+    ]
+
+
+class FactorModel:
+    """One-factor equity model with sector-correlated residuals plus a mean-reverting rate factor.
+
+    Each step draws the market return, one batch of sector-correlated
+    residual shocks for all equities and a parallel shift of the yield curve.
+    An equity's return is ``beta * market + residual``.
+
+    The residuals follow ``sector_correlation`` without building it: each is
+    a shared global shock weighted ``sqrt(inter)``, its sector's shock
+    weighted ``sqrt(intra - inter)`` and its own shock for the rest, so a
+    step costs O(N). An explicit ``correlation`` matrix is used through its
+    Cholesky factor instead, at O(N^2) per step.
+    """
+
+    def __init__(self, betas: Sequence[float], sectors: Sequence[str],
+                 correlation: Optional[np.ndarray] = None, intra: float = 0.5, inter: float = 0.1,
+                 market_drift: float = 0.0001, market_vol: float = 0.001,
+                 residual_vol: float = 0.001, rate_vol: float = 0.00005,
+                 rate_reversion: float = 0.01, rng: Optional[np.random.Generator] = None):
+        self.rng = rng or np.random.default_rng()
+        self.betas = np.asarray(betas, dtype=np.float64)
+        self.sector_names, self.sector_index = np.unique(np.asarray(sectors, dtype=str), return_inverse=True)
+        self.sector_weights = np.sqrt([inter, intra - inter, 1.0 - intra])
+        self.cholesky = None
+        if correlation is not None:
+            self.cholesky = np.linalg.cholesky(np.asarray(correlation)) if len(self.betas) else np.zeros((0, 0))
+        self.market_drift = market_drift
+        self.market_vol = market_vol
+        self.residual_vol = residual_vol
+        self.rate_vol = rate_vol
+        self.rate_reversion = rate_reversion
+        self.rate_shift = 0.0
+
+    def step(self, dt: float = 1.0) -> Tuple[float, np.ndarray, float]:
+        """Advance one step; returns ``(market_return, equity_returns, rate_shift)``."""
+        shocks = self.rng.standard_normal(len(self.betas) + 2)
+        sqrt_dt = np.sqrt(dt)
+        market = self.market_drift * dt + self.market_vol * sqrt_dt * shocks[0]
+        residuals = self.residuals(shocks[2:])
+        returns = self.betas * market + self.residual_vol * sqrt_dt * residuals
+        # Ornstein-Uhlenbeck parallel shift of the yield curve around zero
+        self.rate_shift += -self.rate_reversion * self.rate_shift * dt + self.rate_vol * sqrt_dt * shocks[1]
+        return market, returns, self.rate_shift
+
+    def residuals(self, idiosyncratic: np.ndarray) -> np.ndarray:
+        """Unit-variance correlated residuals from independent per-equity shocks."""
+        if self.cholesky is not None:
+            return self.cholesky @ idiosyncratic
+        global_weight, sector_weight, own_weight = self.sector_weights
+        common = self.rng.standard_normal(len(self.sector_names) + 1)
+        return (global_weight * common[0] + sector_weight * common[1:][self.sector_index]
+                + own_weight * idiosyncratic)
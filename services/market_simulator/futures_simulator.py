@@ -1,26 +1,46 @@
 """Futures market simulator."""
 import asyncio
 import json
+import os
 from datetime import datetime, timedelta
-import redis
 import numpy as np
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Mapping, Optional, Sequence, Union
+from src.utils.clock import Clock, RealTimeClock, SimulatedClock, clock_from_env
+from src.utils.metrics import (
+    SIMULATOR_PUBLISH_LAG, SIMULATOR_TICK_DURATION, SIMULATOR_UPDATES, start_metrics_server, timed
+)
+from src.utils.redis_pool import get_redis
+from src.utils.tracing import configure_tracing, span
+
+if TYPE_CHECKING:
+    # pandas is only needed when a bar store is configured
+    from src.data.bar_store import BarStore, TickWriter
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+FUNDING_INTERVAL = 8 * 3600
 
 class FuturesContract:
-    def __init__(self, symbol: str, expiry: datetime, initial_price: float,
-                 tick_size: float, contract_size: float):
+    def __init__(self, symbol: str, expiry: Optional[datetime], initial_price: float,
+                 tick_size: float, contract_size: float, last_funding: Optional[datetime] = None,
+                 underlying: Optional[str] = None):
         self.symbol = symbol
-        self.expiry = expiry
+        self.expiry = expiry  # None for perpetuals
         self.price = initial_price
         self.tick_size = tick_size
         self.contract_size = contract_size
+        self.underlying = underlying or symbol.split('-')[0]
         self.funding_rate = 0.0001  # 0.01% funding rate
-        self.last_funding = datetime.now()
-        
+        self.last_funding = last_funding or datetime.now()
+
+    @property
+    def is_perpetual(self) -> bool:
+        return self.expiry is None
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             'symbol': self.symbol,
-            'expiry': self.expiry.isoformat(),
+            'underlying': self.underlying,
+            'expiry': self.expiry.isoformat() if self.expiry is not None else None,
             'price': self.price,
             'tick_size': self.tick_size,
             'contract_size': self.contract_size,
@@ -28,31 +48,91 @@ class FuturesContract:
         }
 
 class FuturesSimulator:
-    def __init__(self, redis_url: str):
-        self.redis = redis.from_url(redis_url)
+    """Simulates a term structure of perpetual and dated futures per underlying.
+
+    Every underlying has a spot price driven by one shock per tick, so all of
+    its contracts move together: dated contracts trade at spot times carry
+    (``exp(carry * time_to_expiry)``) and perpetuals at spot plus a
+    mean-reverting premium that also drives their funding rate. All contracts
+    are priced in one vectorised step. Dated contracts follow a listing cycle
+    of ``listed_expiries`` expiries every ``expiry_cycle_days`` days; when the
+    front one expires the next one on the cycle is listed.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, bar_store: Optional['BarStore'] = None,
+                 clock: Optional[Clock] = None, seed: Optional[int] = None, interval: float = 1.0,
+                 assets: Optional[Union[Sequence[str], Mapping[str, float]]] = None,
+                 listed_expiries: int = 3, expiry_cycle_days: int = 30):
+        self.redis = get_redis(redis_url)
+        self.bar_store = bar_store
+        # Ticks go to the store from a background thread, in batches
+        self.tick_writer: Optional['TickWriter'] = None
+        if bar_store is not None:
+            from src.data.bar_store import TickWriter
+            self.tick_writer = TickWriter(bar_store)
+        self.clock = clock or RealTimeClock()
+        self.rng = np.random.default_rng(seed)
+        self.interval = interval
+        self.listed_expiries = listed_expiries
+        self.expiry_cycle = timedelta(days=expiry_cycle_days)
+        if assets is None:
+            assets = ['BTC', 'ETH', 'SOL']
+        if not isinstance(assets, Mapping):
+            assets = {asset: self._get_initial_price(asset) for asset in assets}
+        self.assets = list(assets)
+        self._asset_pos = {asset: i for i, asset in enumerate(self.assets)}
+        self.spot = np.array([assets[a] for a in self.assets], dtype=np.float64)
+        # Annualised cost of carry and perpetual premium per underlying
+        self.carry = self.rng.uniform(0.02, 0.10, len(self.assets))
+        self.premium = np.zeros(len(self.assets))
         self.contracts: Dict[str, FuturesContract] = {}
         self._initialize_contracts()
-        
+
     def _initialize_contracts(self):
-        """Initialize futures contracts with different expiries."""
-        base_assets = ['BTC', 'ETH', 'SOL']
-        expiries = [
-            datetime.now() + timedelta(days=30),  # Monthly
-            datetime.now() + timedelta(days=90),  # Quarterly
-            datetime.now() + timedelta(days=180)  # Bi-annual
-        ]
-        
-        for asset in base_assets:
-            for expiry in expiries:
-                symbol = f"{asset}-PERP"  # Perpetual
-                self.contracts[symbol] = FuturesContract(
-                    symbol=symbol,
-                    expiry=expiry,
-                    initial_price=self._get_initial_price(asset),
-                    tick_size=0.1,
-                    contract_size=1.0
-                )
-                
+        """Initialize a perpetual and the listed dated contracts for every underlying."""
+        now = self.clock.now()
+        first_expiry = datetime(now.year, now.month, now.day, 8) + self.expiry_cycle
+        for i, asset in enumerate(self.assets):
+            self._list_contract(asset, None, self.spot[i], now)
+            for n in range(self.listed_expiries):
+                self._list_contract(asset, first_expiry + n * self.expiry_cycle, self.spot[i], now)
+        self._build_index()
+
+    def _list_contract(self, asset: str, expiry: Optional[datetime], price: float, now: datetime):
+        symbol = f"{asset}-PERP" if expiry is None else f"{asset}-{expiry:%Y%m%d}"
+        self.contracts[symbol] = FuturesContract(
+            symbol=symbol,
+            expiry=expiry,
+            initial_price=price,
+            tick_size=0.1,
+            contract_size=1.0,
+            last_funding=now,
+            underlying=asset
+        )
+
+    def _build_index(self):
+        """Rebuild the column arrays the vectorised step works on."""
+        contracts = list(self.contracts.values())
+        self._contract_list = contracts
+        self._asset_idx = np.array([self._asset_pos[c.underlying] for c in contracts], dtype=np.int64)
+        self._expiry = np.array([c.expiry.timestamp() if c.expiry else np.nan for c in contracts])
+        self._perpetual = np.isnan(self._expiry)
+        self._tick = np.array([c.tick_size for c in contracts])
+
+    def _roll_expired(self, now: datetime) -> List[str]:
+        """Delist expired dated contracts and list the next expiry on the cycle."""
+        expired = [c for c in self.contracts.values() if c.expiry is not None and c.expiry <= now]
+        if not expired:
+            return []
+        for contract in expired:
+            del self.contracts[contract.symbol]
+            last_expiry = max(c.expiry for c in self.contracts.values()
+                              if c.underlying == contract.underlying and c.expiry is not None)
+            spot = self.spot[self._asset_pos[contract.underlying]]
+            self._list_contract(contract.underlying, last_expiry + self.expiry_cycle, spot, now)
+        self._build_index()
+        return [c.symbol for c in expired]
+
     def _get_initial_price(self, asset: str) -> float:
         """Get initial price for an asset."""
         prices = {
@@ -61,74 +141,115 @@ class FuturesSimulator:
             'SOL': 100.0
         }
         return prices.get(asset, 100.0)
-        
-    def _calculate_price_impact(self, base_price: float, volume: float) -> float:
-        """Calculate price impact based on volume."""
+
+    def _calculate_price_impact(self, base_price, volume):
+        """Calculate price impact based on (signed) volume; works on scalars and arrays."""
         impact_factor = 0.0001  # 0.01% impact per unit of volume
         return base_price * (1 + impact_factor * volume)
-        
+
     def _update_funding_rates(self):
         """Update funding rates for perpetual contracts."""
-        current_time = datetime.now()
+        current_time = self.clock.now()
         for contract in self.contracts.values():
-            if '-PERP' in contract.symbol:
+            if contract.is_perpetual:
                 # Update funding rate every 8 hours
-                if (current_time - contract.last_funding).total_seconds() >= 8 * 3600:
-                    # Simulate funding rate based on price deviation from spot
-                    contract.funding_rate = np.random.normal(0.0001, 0.0002)
+                if (current_time - contract.last_funding).total_seconds() >= FUNDING_INTERVAL:
+                    # Funding follows the perpetual's premium over spot
+                    premium = self.premium[self._asset_pos[contract.underlying]]
+                    contract.funding_rate = float(self.rng.normal(0.0001 + premium, 0.0002))
                     contract.last_funding = current_time
-        
+
+    def _step_underlyings(self, dt: float):
+        """One shared shock per underlying, plus the perpetual premium's mean reversion, over ``dt`` seconds."""
+        mu = 0.0001  # drift
+        sigma = 0.001  # volatility
+        shocks = self.rng.standard_normal((2, len(self.assets)))
+        self.spot *= 1 + mu * dt + sigma * np.sqrt(dt) * shocks[0]
+        self.premium += -0.05 * self.premium * dt + 0.0001 * np.sqrt(dt) * shocks[1]
+
     def generate_price_updates(self) -> List[Dict[str, Any]]:
         """Generate price updates for all contracts."""
-        updates = []
+        now = self.clock.now()
+        self._roll_expired(now)
         self._update_funding_rates()
-        
-        for contract in self.contracts.values():
-            # Base price movement
-            mu = 0.0001  # drift
-            sigma = 0.001  # volatility
-            dt = 1  # time step (1 second)
-            
-            # Add time decay for non-perpetual contracts
-            if '-PERP' not in contract.symbol:
-                time_to_expiry = (contract.expiry - datetime.now()).total_seconds()
-                if time_to_expiry > 0:
-                    theta = 0.0001  # time decay factor
-                    mu -= theta
-            
-            # Calculate price movement
-            dW = np.random.normal(0, np.sqrt(dt))
-            price_change = contract.price * (mu * dt + sigma * dW)
-            
-            # Simulate random volume
-            volume = np.random.exponential(10.0)
-            
-            # Apply price impact
-            new_price = contract.price + price_change
-            new_price = self._calculate_price_impact(new_price, volume)
-            
-            # Round to tick size
-            new_price = round(new_price / contract.tick_size) * contract.tick_size
-            
-            contract.price = new_price
-            
+        # The model's rates are per second, the unit of the tick interval
+        self._step_underlyings(dt=self.interval)
+
+        spot = self.spot[self._asset_idx]
+        time_to_expiry = np.where(self._perpetual, 0.0,
+                                  np.maximum(self._expiry - now.timestamp(), 0.0) / SECONDS_PER_YEAR)
+        fair = np.where(self._perpetual,
+                        spot * (1 + self.premium[self._asset_idx]),
+                        spot * np.exp(self.carry[self._asset_idx] * time_to_expiry))
+
+        # Simulate random volume, signed by aggressor side, and its price impact
+        count = len(self._contract_list)
+        volume = self.rng.exponential(10.0, count)
+        side = np.where(self.rng.random(count) < 0.5, -1.0, 1.0)
+        prices = self._calculate_price_impact(fair, side * volume)
+
+        # Round to tick size
+        prices = np.round(prices / self._tick) * self._tick
+        open_interest = self.rng.integers(1000, 10000, count)
+
+        timestamp = now.isoformat()
+        updates = []
+        for contract, price, vol, oi in zip(self._contract_list, prices.tolist(),
+                                            volume.tolist(), open_interest.tolist()):
+            contract.price = price
             updates.append({
                 'contract': contract.to_dict(),
-                'timestamp': datetime.now().isoformat(),
-                'volume': volume,
-                'open_interest': np.random.randint(1000, 10000)
+                'timestamp': timestamp,
+                'volume': vol,
+                'open_interest': oi
             })
-            
         return updates
-        
+
+    def simulate(self, ticks: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yield ``ticks`` rounds of updates on a simulated clock without Redis or sleeping."""
+        if not isinstance(self.clock, SimulatedClock):
+            raise ValueError("simulate() needs a SimulatedClock")
+        for _ in range(ticks):
+            yield self.generate_price_updates()
+            self.clock.advance(self.interval)
+
+    def publish_updates(self, updates: List[Dict[str, Any]]):
+        """Publish one tick of updates in a single pipeline and queue them for the bar store."""
+        with timed(SIMULATOR_PUBLISH_LAG, 'futures'):
+            pipe = self.redis.pipeline(transaction=False)
+            for update in updates:
+                pipe.publish('futures_market_data', json.dumps(update))
+                if self.tick_writer is not None:
+                    contract = update['contract']
+                    self.tick_writer.add(contract['symbol'], update['timestamp'], contract['price'], update['volume'])
+            pipe.execute()
+        SIMULATOR_UPDATES.labels('futures').inc(len(updates))
+
     async def run(self):
         """Run the futures market simulator."""
-        while True:
-            updates = self.generate_price_updates()
-            for update in updates:
-                self.redis.publish('futures_market_data', json.dumps(update))
-            await asyncio.sleep(1)  # Update every second
+        try:
+            while True:
+                with span('futures_simulator.tick'):
+                    with span('generate'), timed(SIMULATOR_TICK_DURATION, 'futures'):
+                        updates = self.generate_price_updates()
+                    with span('publish', updates=len(updates)):
+                        self.publish_updates(updates)
+                await self.clock.sleep(self.interval)
+        finally:
+            if self.tick_writer is not None:
+                self.tick_writer.close()
 
 if __name__ == "__main__":
-    simulator = FuturesSimulator('redis://redis:6379')
+    from src.data.bar_store import BarStore
+    bar_store_path = os.getenv('BAR_STORE_PATH')
+    bar_store = BarStore(bar_store_path) if bar_store_path else None
+    seed = os.getenv('SIMULATION_SEED')
+    assets = os.getenv('FUTURES_ASSETS')
+    simulator = FuturesSimulator(
+        bar_store=bar_store, clock=clock_from_env(),
+        seed=int(seed) if seed else None, interval=float(os.getenv('SIMULATION_INTERVAL', '1')),
+        assets=assets.split(',') if assets else None
+    )
+    start_metrics_server(9103)
+    configure_tracing('futures_simulator')
     asyncio.run(simulator.run())
@@ -1,20 +1,65 @@
 """Comprehensive market data simulation service for multiple asset classes."""
 import asyncio
 import json
-import random
+import os
 from datetime import datetime, timedelta
-import redis
 import numpy as np
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional
+from services.market_simulator.factor_model import FactorModel, synthetic_equities
+from services.market_simulator.fixed_income import BondUniverse, YieldCurve
 from services.market_simulator.instruments import Equity, Bond, Instrument
+from src.utils.clock import Clock, RealTimeClock, SimulatedClock, clock_from_env
+from src.utils.metrics import (
+    SIMULATOR_PUBLISH_LAG, SIMULATOR_TICK_DURATION, SIMULATOR_UPDATES, start_metrics_server, timed
+)
+from src.utils.redis_pool import get_redis
+from src.utils.tracing import configure_tracing, span
+
+if TYPE_CHECKING:
+    # pandas is only needed when a bar store is configured
+    from src.data.bar_store import BarStore, TickWriter
+
+SIMULATION_MODES = ('gbm', 'factor')
 
 class MarketSimulator:
-    def __init__(self, redis_url: str):
-        self.redis = redis.from_url(redis_url)
+    """Simulates equity and bond prices.
+
+    In ``gbm`` mode every instrument follows its own independent random walk.
+    In ``factor`` mode equities move together through a ``FactorModel``
+    (beta times a shared market return plus sector-correlated residuals) and
+    bonds are repriced off a yield curve shifted by the model's rate factor.
+
+    Time comes from ``clock`` and randomness from a generator seeded with
+    ``seed``, so a ``SimulatedClock`` plus a fixed seed reproduces the same
+    market day, as fast as the CPU allows.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, bar_store: Optional['BarStore'] = None, mode: str = 'gbm',
+                 extra_equities: Optional[List[tuple]] = None, clock: Optional[Clock] = None,
+                 seed: Optional[int] = None, interval: float = 1.0):
+        if mode not in SIMULATION_MODES:
+            raise ValueError(f"Unknown simulation mode {mode}")
+        self.redis = get_redis(redis_url)
+        self.bar_store = bar_store
+        # Ticks go to the store from a background thread, in batches
+        self.tick_writer: Optional['TickWriter'] = None
+        if bar_store is not None:
+            from src.data.bar_store import TickWriter
+            self.tick_writer = TickWriter(bar_store)
+        self.mode = mode
+        self.clock = clock or RealTimeClock()
+        self.rng = np.random.default_rng(seed)
+        self.interval = interval
         self.instruments: Dict[str, Instrument] = {}
         self.prices: Dict[str, float] = {}
         self.market_return = 0.0  # Overall market return for CAPM
+        self.factor_model: Optional[FactorModel] = None
         self._initialize_instruments()
+        if extra_equities:
+            self.add_equities(extra_equities)
+        if mode == 'factor':
+            self._build_factor_model()
+            self.update_bond_prices()
         
     def _initialize_instruments(self):
         """Initialize various trading instruments."""
@@ -26,30 +71,78 @@ class MarketSimulator:
             ('XOM', 'Exxon Mobil', 100.0, 'Energy', 450e9, 0.8)
         ]
         
-        for symbol, name, price, sector, mcap, beta in equities:
-            self.instruments[symbol] = Equity(symbol, name, price, sector, mcap, beta)
+        self.add_equities(equities)
         
         # Initialize Bonds with a sample yield curve
         yield_curve = {1: 0.04, 2: 0.042, 5: 0.045, 10: 0.048, 30: 0.05}
+        now = self.clock.now()
         bonds = [
-            ('T-2Y', '2-Year Treasury', 1000.0, 0.042, datetime.now() + timedelta(days=730), 'AAA'),
-            ('T-5Y', '5-Year Treasury', 1000.0, 0.045, datetime.now() + timedelta(days=1825), 'AAA'),
-            ('T-10Y', '10-Year Treasury', 1000.0, 0.048, datetime.now() + timedelta(days=3650), 'AAA'),
-            ('CORP-A', 'Corporate Bond A', 1000.0, 0.06, datetime.now() + timedelta(days=1825), 'A')
+            ('T-2Y', '2-Year Treasury', 1000.0, 0.042, now + timedelta(days=730), 'AAA'),
+            ('T-5Y', '5-Year Treasury', 1000.0, 0.045, now + timedelta(days=1825), 'AAA'),
+            ('T-10Y', '10-Year Treasury', 1000.0, 0.048, now + timedelta(days=3650), 'AAA'),
+            ('CORP-A', 'Corporate Bond A', 1000.0, 0.06, now + timedelta(days=1825), 'A')
         ]
         
         for symbol, name, face_value, coupon, maturity, rating in bonds:
-            self.instruments[symbol] = Bond(symbol, name, face_value, coupon, maturity, rating, yield_curve)
+            self.instruments[symbol] = Bond(symbol, name, face_value, coupon, maturity, rating, yield_curve,
+                                            clock=self.clock, rng=self.rng)
+        self.base_curve = self.yield_curve = YieldCurve.from_dict(yield_curve)
+        self.bonds = [i for i in self.instruments.values() if isinstance(i, Bond)]
+        self.bond_universe = BondUniverse.from_bonds(self.bonds)
         
         # Initialize prices dictionary
         for symbol, instrument in self.instruments.items():
             self.prices[symbol] = instrument.price
     
+    def add_equities(self, equities: List[tuple]):
+        """Add ``(symbol, name, price, sector, market_cap, beta)`` equities to the universe."""
+        for symbol, name, price, sector, mcap, beta in equities:
+            self.instruments[symbol] = Equity(symbol, name, price, sector, mcap, beta,
+                                              clock=self.clock, rng=self.rng)
+            self.prices[symbol] = price
+        if self.factor_model is not None:
+            self._build_factor_model()
+
+    def _build_factor_model(self):
+        self.equities = [i for i in self.instruments.values() if isinstance(i, Equity)]
+        self.factor_model = FactorModel([e.beta for e in self.equities], [e.sector for e in self.equities],
+                                        rng=self.rng)
+
     @property
     def symbols(self) -> List[str]:
         """Get list of all instrument symbols."""
         return list(self.instruments.keys())
     
+    def update_bond_prices(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Reprice every bond off the current yield curve in one vectorised pass."""
+        prices = self.bond_universe.reprice(self.yield_curve, now or self.clock.now())
+        for bond, price, ytm in zip(self.bonds, prices.tolist(), self.bond_universe.ytm.tolist()):
+            bond.price = price
+            bond.ytm = ytm
+            self.prices[bond.symbol] = price
+        return prices
+
+    def generate_factor_updates(self, dt: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Step every instrument from the shared market and rate factors.
+
+        ``dt`` is in seconds, the unit of the model's rates, and defaults to
+        the tick interval.
+        """
+        self.market_return, returns, rate_shift = self.factor_model.step(self.interval if dt is None else dt)
+        timestamp = self.clock.now()
+        prices = np.array([self.prices[e.symbol] for e in self.equities]) * (1 + returns)
+        for equity, price in zip(self.equities, prices.tolist()):
+            equity.price = price
+            self.prices[equity.symbol] = price
+        self.yield_curve = self.base_curve.shifted(rate_shift)
+        self.update_bond_prices(timestamp)
+        volumes = self.rng.uniform(0.1, 10.0, len(self.instruments))
+        iso = timestamp.isoformat()
+        return [
+            {'symbol': symbol, 'price': self.prices[symbol], 'timestamp': iso, 'volume': volume}
+            for symbol, volume in zip(self.symbols, volumes.tolist())
+        ]
+
     def generate_price_update(self, symbol: str) -> Dict[str, Any]:
         """Generate a simulated price update using GBM."""
         current_price = self.prices[symbol]
@@ -59,7 +152,7 @@ class MarketSimulator:
         dt = 1  # time step (1 second)
         
         # Calculate new price
-        dW = np.random.normal(0, np.sqrt(dt))
+        dW = self.rng.normal(0, np.sqrt(dt))
         price_change = current_price * (mu * dt + sigma * dW)
         new_price = current_price + price_change
         
@@ -68,21 +161,66 @@ class MarketSimulator:
         return {
             'symbol': symbol,
             'price': new_price,
-            'timestamp': datetime.now().isoformat(),
-            'volume': random.uniform(0.1, 10.0)
+            'timestamp': self.clock.now().isoformat(),
+            'volume': self.rng.uniform(0.1, 10.0)
         }
+
+    def generate_updates(self) -> List[Dict[str, Any]]:
+        """Generate one tick for every instrument in the configured mode."""
+        if self.mode == 'factor':
+            return self.generate_factor_updates()
+        return [self.generate_price_update(symbol) for symbol in self.symbols]
+
+    def simulate(self, ticks: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yield ``ticks`` rounds of updates on a simulated clock without Redis or sleeping."""
+        if not isinstance(self.clock, SimulatedClock):
+            raise ValueError("simulate() needs a SimulatedClock")
+        for _ in range(ticks):
+            yield self.generate_updates()
+            self.clock.advance(self.interval)
         
+    def publish_updates(self, updates: List[Dict[str, Any]]):
+        """Publish one tick of updates and queue them for the bar store."""
+        with timed(SIMULATOR_PUBLISH_LAG, 'market'):
+            for update in updates:
+                symbol = update['symbol']
+                self.redis.publish('market_data', json.dumps(update))
+                if self.tick_writer is not None:
+                    self.tick_writer.add(symbol, update['timestamp'], update['price'], update['volume'])
+        SIMULATOR_UPDATES.labels('market').inc(len(updates))
+
     async def run(self):
         """Run the market simulator."""
-        while True:
-            for symbol in self.symbols:
-                update = self.generate_price_update(symbol)
-                self.redis.publish('market_data', json.dumps(update))
-            await asyncio.sleep(1)  # Update every second
+        try:
+            while True:
+                with span('market_simulator.tick'):
+                    with span('generate'), timed(SIMULATOR_TICK_DURATION, 'market'):
+                        updates = self.generate_updates()
+                    with span('publish', updates=len(updates)):
+                        self.publish_updates(updates)
+                await self.clock.sleep(self.interval)
+        finally:
+            if self.tick_writer is not None:
+                self.tick_writer.close()
+
+def seed_from_env() -> Optional[int]:
+    """Seed from ``SIMULATION_SEED``; unset means a fresh random seed."""
+    seed = os.getenv('SIMULATION_SEED')
+    return int(seed) if seed else None
 
 def main():
     """Run the market simulator."""
-    simulator = MarketSimulator('redis://redis:6379')
+    from src.data.bar_store import BarStore
+    bar_store_path = os.getenv('BAR_STORE_PATH')
+    bar_store = BarStore(bar_store_path) if bar_store_path else None
+    simulator = MarketSimulator(
+        bar_store=bar_store, mode=os.getenv('SIMULATION_MODE', 'gbm'),
+        extra_equities=synthetic_equities(int(os.getenv('SYNTHETIC_EQUITIES', '0'))),
+        clock=clock_from_env(), seed=seed_from_env(),
+        interval=float(os.getenv('SIMULATION_INTERVAL', '1'))
+    )
+    start_metrics_server(9102)
+    configure_tracing('market_simulator')
     asyncio.run(simulator.run())
 
 if __name__ == "__main__":
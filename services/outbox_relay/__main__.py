@@ -0,0 +1,5 @@
+"""Main entry point for the order events relay."""
+from services.outbox_relay.relay import main
+
+if __name__ == "__main__":
+    main()
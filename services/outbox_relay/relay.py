@@ -0,0 +1,37 @@
+"""Order events relay: moves outbox rows onto the order events Redis Stream."""
+import logging
+import os
+import time
+from src.execution.order_events import OutboxRelay
+from src.utils.metrics import ORDER_EVENTS_RELAYED, start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+
+def run(relay: OutboxRelay, poll_interval: float = 0.05):
+    """Relay events until interrupted, polling every ``poll_interval`` seconds while the outbox is empty.
+
+    A full batch is followed straight away by the next, so a backlog drains
+    at full speed.
+    """
+    while True:
+        try:
+            relayed = relay.relay()
+        except Exception as e:
+            logger.error(str(e))
+            relayed = 0
+            time.sleep(1.0)
+        ORDER_EVENTS_RELAYED.inc(relayed)
+        if relayed < relay.batch_size:
+            time.sleep(poll_interval)
+
+
+def main():
+    """Run the order events relay."""
+    logging.basicConfig(level=logging.INFO)
+    start_metrics_server(9106)
+    relay = OutboxRelay(batch_size=int(os.getenv('OUTBOX_BATCH_SIZE', '500')))
+    run(relay, float(os.getenv('OUTBOX_POLL_INTERVAL', '0.05')))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Main entry point for the PnL marker."""
+from services.pnl_marker.marker import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""PnL marking service: marks open positions to the simulator tick stream."""
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+from src.execution.pnl import PNL_CHANNEL, POSITIONS_CHANNEL, PnlMarker
+from src.utils.metrics import start_metrics_server
+from src.utils.redis_pool import get_redis
+
+logger = logging.getLogger(__name__)
+
+TICK_CHANNELS = ('market_data', 'futures_market_data')
+
+
+def tick_price(channel: str, payload: Dict[str, Any]) -> Tuple[str, Any]:
+    """Extract ``(symbol, price)`` from a simulator message."""
+    if channel == 'futures_market_data':
+        payload = payload['contract']
+    return payload['symbol'], payload['price']
+
+
+class PnlMarkerService:
+    def __init__(self, redis_url: Optional[str] = None, marker: Optional[PnlMarker] = None):
+        self.redis = get_redis(redis_url)
+        self.marker = marker if marker is not None else PnlMarker()
+
+    def handle_message(self, channel: str, data: bytes) -> int:
+        """Process one pub/sub message; returns how many marks it changed."""
+        try:
+            payload = json.loads(data)
+            if channel == POSITIONS_CHANNEL:
+                self.marker.on_position(payload)
+                return 0
+            symbol, price = tick_price(channel, payload)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Dropping malformed message on {channel}: {str(e)}")
+            return 0
+        return self.marker.on_tick(symbol, price)
+
+    def flush(self):
+        """Write pending marks and publish them for live PnL displays."""
+        marks = self.marker.flush()
+        if marks:
+            self.redis.publish(PNL_CHANNEL, json.dumps([
+                {'position_id': m['b_id'], 'account_id': m['b_account'], 'unrealized_pnl': str(m['b_pnl'])}
+                for m in marks
+            ]))
+
+    def run(self):
+        """Consume ticks and position updates until interrupted."""
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        # Subscribe before loading so no position update falls in between
+        pubsub.subscribe(POSITIONS_CHANNEL, *TICK_CHANNELS)
+        logger.info(f"Marking {self.marker.load()} open positions")
+        try:
+            while True:
+                message = pubsub.get_message(timeout=self.marker.flush_interval)
+                if message is not None:
+                    self.handle_message(message['channel'].decode('utf-8'), message['data'])
+                if self.marker.flush_due():
+                    try:
+                        self.flush()
+                    except Exception as e:
+                        logger.error(str(e))
+        finally:
+            pubsub.close()
+            if self.marker.pending_marks:
+                self.flush()
+
+
+def main():
+    """Run the PnL marker."""
+    logging.basicConfig(level=logging.INFO)
+    start_metrics_server(9105)
+    marker = PnlMarker(flush_interval=float(os.getenv('PNL_FLUSH_INTERVAL', '1.0')),
+                       batch_size=int(os.getenv('PNL_BATCH_SIZE', '1000')))
+    PnlMarkerService(None, marker).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Celery queues, routing and worker profiles for trading workloads.
+
+Order execution runs on its own ``orders`` queue with the highest priority,
+so portfolio metrics and corporate actions on the ``batch`` queue can never
+sit in front of a fill. Each worker process picks a profile through
+``WORKER_PROFILE`` that selects the queues it consumes and its concurrency
+and prefetch; explicit ``-Q``/``--concurrency``/``--prefetch-multiplier``
+options still take precedence.
+"""
+from typing import Any, Dict, List
+from celery.schedules import crontab
+from kombu import Queue
+
+ORDERS_QUEUE = 'orders'
+DEFAULT_QUEUE = 'default'
+BATCH_QUEUE = 'batch'
+
+# The Redis transport emulates priorities with one list per step; 0 is served first
+ORDER_PRIORITY = 0
+DEFAULT_PRIORITY = 5
+BATCH_PRIORITY = 9
+
+# Results are only read by callers waiting on them (e.g. the load test)
+RESULT_EXPIRES = 3600
+# Unacknowledged (acks_late) messages are redelivered after this many seconds
+VISIBILITY_TIMEOUT = 600
+
+TASK_ROUTES = {
+    '*.execute_order': {'queue': ORDERS_QUEUE, 'priority': ORDER_PRIORITY},
+    '*.calculate_portfolio_metrics': {'queue': BATCH_QUEUE, 'priority': BATCH_PRIORITY},
+    '*.calculate_all_portfolio_metrics': {'queue': BATCH_QUEUE, 'priority': BATCH_PRIORITY},
+    '*.process_corporate_actions': {'queue': BATCH_QUEUE, 'priority': BATCH_PRIORITY},
+    '*.maintain_partitions': {'queue': BATCH_QUEUE, 'priority': BATCH_PRIORITY},
+}
+
+PORTFOLIO_METRICS_INTERVAL = 15 * 60
+SWEEP_INTERVAL = 60
+
+# Runs skipped by beat's ``expires`` or by a held lock are simply dropped:
+# the next run does the same work. ``process_corporate_actions`` is not
+# scheduled: the schema has no dividend calendar or payment records yet.
+BEAT_SCHEDULE = {
+    'calculate-portfolio-metrics': {
+        'task': 'worker.tasks.calculate_all_portfolio_metrics',
+        'schedule': PORTFOLIO_METRICS_INTERVAL,
+        'options': {'expires': PORTFOLIO_METRICS_INTERVAL},
+    },
+    'sweep-stale-orders': {
+        'task': 'worker.tasks.sweep_stale_orders',
+        'schedule': SWEEP_INTERVAL,
+        'options': {'expires': SWEEP_INTERVAL},
+    },
+    # Well before month end, so next month's partitions always exist
+    'maintain-partitions': {
+        'task': 'worker.tasks.maintain_partitions',
+        'schedule': crontab(hour=1, minute=0),
+    },
+}
+
+# Lock expiry per job, well above its longest expected run; it only matters
+# when a worker dies holding the lock
+LOCK_TIMEOUTS = {
+    'process_corporate_actions': 6 * 3600,
+    'calculate_all_portfolio_metrics': 3600,
+    'sweep_stale_orders': 600,
+    'maintain_partitions': 6 * 3600,
+}
+
+WORKER_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Latency-sensitive: one message reserved per process so a slow fill
+    # never holds others back
+    'orders': {'queues': [ORDERS_QUEUE], 'concurrency': 4, 'prefetch_multiplier': 1},
+    # Throughput: batch jobs are long, so reserving more buys nothing
+    'batch': {'queues': [BATCH_QUEUE, DEFAULT_QUEUE], 'concurrency': 2, 'prefetch_multiplier': 1},
+    # Everything in one process, orders checked first (local development)
+    'all': {'queues': [ORDERS_QUEUE, DEFAULT_QUEUE, BATCH_QUEUE], 'concurrency': None,
+            'prefetch_multiplier': 1},
+}
+
+
+def celery_config(broker_url: str) -> Dict[str, Any]:
+    """Settings for ``celery.conf.update``."""
+    return {
+        'broker_url': broker_url,
+        'result_backend': broker_url,
+        'task_serializer': 'json',
+        'result_serializer': 'json',
+        'accept_content': ['json'],
+        # Routing keys must differ: the queues share the default direct exchange
+        'task_queues': [Queue(name, routing_key=name) for name in (ORDERS_QUEUE, DEFAULT_QUEUE, BATCH_QUEUE)],
+        'task_default_queue': DEFAULT_QUEUE,
+        'task_default_routing_key': DEFAULT_QUEUE,
+        'task_default_priority': DEFAULT_PRIORITY,
+        'task_routes': TASK_ROUTES,
+        'broker_transport_options': {
+            'priority_steps': list(range(10)),
+            'sep': ':',
+            # Poll queues in the order listed instead of round-robin
+            'queue_order_strategy': 'priority',
+            'visibility_timeout': VISIBILITY_TIMEOUT,
+        },
+        'result_expires': RESULT_EXPIRES,
+        'worker_prefetch_multiplier': 1,
+        'beat_schedule': BEAT_SCHEDULE,
+        'timezone': 'UTC',
+    }
+
+
+def worker_profile(name: str) -> Dict[str, Any]:
+    if name not in WORKER_PROFILES:
+        raise ValueError(f"Unknown worker profile {name!r}; expected one of {sorted(WORKER_PROFILES)}")
+    return WORKER_PROFILES[name]
+
+
+def apply_worker_profile(app: Any, name: str) -> List[str]:
+    """Select the profile's queues and set its concurrency and prefetch; returns the queues."""
+    profile = worker_profile(name)
+    app.amqp.queues.select(profile['queues'])
+    app.conf.worker_prefetch_multiplier = profile['prefetch_multiplier']
+    if profile['concurrency'] is not None:
+        app.conf.worker_concurrency = profile['concurrency']
+    return profile['queues']
@@ -8,114 +8,212 @@ project_root = str(Path(__file__).resolve().parents[2])
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from celery import Celery
+from celery import Celery, signals
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 import logging
-from redis import Redis
 import json
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+from src.config import get_settings
+from src.utils.redis_pool import get_redis
+from .celeryconfig import LOCK_TIMEOUTS, PORTFOLIO_METRICS_INTERVAL, apply_worker_profile, celery_config
+
 # Initialize Celery
+settings = get_settings()
 celery = Celery('worker.tasks')
-celery.conf.update(
-    broker_url='redis://redis:6379/0',
-    result_backend='redis://redis:6379/0',
-    imports=['worker.tasks'],
-    task_serializer='json',
-    result_serializer='json',
-    accept_content=['json']
-)
+celery.conf.update(imports=['worker.tasks'], **celery_config(settings.REDIS_URL))
 
 # Import models after Celery configuration to avoid circular imports
-from src.database.models.order import Order, Trade
+from src.database.models.order import Order, Trade, TradeFill
 from src.database.models.account import Position
-from src.database.models.base import OrderStatus, InstrumentType, Instrument
+from src.database.models.base import OrderStatus, OrderType, OrderSide, InstrumentType, Instrument
 from src.database.models.instrument import Equity, Bond, FuturesContract
+from src.database.partitions import archive_partitions, ensure_partitions
 from src.database.session import get_db
+from src.execution.order_events import (
+    ORDER_CANCELLED, ORDER_FIELDS, ORDER_FILLED, ORDER_REJECTED, record_order_event, record_order_events
+)
+from src.execution.pnl import POSITIONS_CHANNEL
+from src.execution.position_keeper import PositionKeeper
+from src.execution.trade_journal import TradeJournal
+from src.utils.locks import single_instance
+from src.utils.metrics import ORDER_LATENCY, ORDERS_EXECUTED, start_metrics_server, timed_job
+from src.utils.tracing import configure_tracing, span, traced
+
+configure_tracing('worker')
+
+def publish_positions(snapshots):
+    """Announce written positions so the PnL marker marks them at their new size."""
+    pipe = get_redis().pipeline(transaction=False)
+    for snapshot in snapshots:
+        pipe.publish(POSITIONS_CHANNEL, json.dumps(snapshot))
+    pipe.execute()
 
-@celery.task
-def execute_order(order_id: int) -> Dict[str, Any]:
+# Positions, written by the journal with the trades that change them
+positions = PositionKeeper(on_write=publish_positions)
+# Fills of this worker process: logged durably, inserted into trades in batches
+journal = TradeJournal(os.getenv('TRADE_JOURNAL_DIR', 'trade-journal'), positions=positions)
+
+# A journaled fill whose order update failed is retried after this many seconds
+FILL_RETRY_SECONDS = int(os.getenv('FILL_RETRY_SECONDS', '5'))
+# Pending market orders should fill within seconds; older ones were missed
+STALE_MARKET_ORDER_MINUTES = int(os.getenv('STALE_MARKET_ORDER_MINUTES', '5'))
+# Orders carry no time in force, so everything else lives for a trading day
+STALE_ORDER_MINUTES = int(os.getenv('STALE_ORDER_MINUTES', '1440'))
+# Order and trade partitions are created this many months ahead...
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+# ...and exported to Parquet under ARCHIVE_DIR, then dropped, after this many months
+PARTITION_RETENTION_MONTHS = int(os.getenv('PARTITION_RETENTION_MONTHS', '12'))
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+# Latest portfolio metrics of each account; kept over one missed run, then dropped
+PORTFOLIO_METRICS_KEY = 'portfolio_metrics:{account_id}'
+PORTFOLIO_METRICS_TTL = 2 * PORTFOLIO_METRICS_INTERVAL
+
+@signals.celeryd_init.connect
+def select_worker_profile(instance=None, **kwargs):
+    """Apply the WORKER_PROFILE (orders, batch or all) before the worker sets up its queues."""
+    profile = os.getenv('WORKER_PROFILE', 'all')
+    queues = apply_worker_profile(instance.app, profile)
+    logger.info(f"Worker profile {profile}: consuming {', '.join(queues)}")
+
+@signals.worker_init.connect
+def start_metrics_sidecar(**kwargs):
+    """Expose worker metrics on METRICS_PORT (default 9101)."""
+    start_metrics_server(9101)
+
+@signals.worker_process_shutdown.connect
+@signals.worker_shutdown.connect
+def flush_journal(**kwargs):
+    """Insert the fills, and their position changes, still pending when a worker process exits."""
+    try:
+        journal.stop()
+    except Exception as e:
+        # The journal segment stays behind and is replayed on the next start
+        logger.error(f"Error flushing trades on shutdown: {str(e)}")
+
+@signals.worker_process_shutdown.connect
+def discard_child_metrics(pid=None, **kwargs):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+# Redelivered if the worker dies mid-fill, and retried if the order update
+# fails once the fill is journaled; a re-run of a filled order is skipped
+@celery.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+@traced('execute_order')
+def execute_order(self, order_id: int) -> Dict[str, Any]:
     """Execute a trade order."""
     db = next(get_db())
+    started = journaled = False
     try:
-        order = db.query(Order).filter(Order.id == order_id).first()
+        journal.start()
+        started = True
+        with span('db.load_order', order_id=order_id):
+            order = db.query(Order).filter(Order.id == order_id).first()
         if not order:
             raise ValueError(f"Order {order_id} not found")
         
         # Check if order is already processed
         if order.status != OrderStatus.PENDING:
+            ORDERS_EXECUTED.labels('skipped').inc()
             return {"status": "skipped", "reason": f"Order already {order.status}"}
-            
-        # Get current market price from Redis
-        redis_client = Redis(host='redis', port=6379, db=0)
-        market_data = redis_client.get(f"quote:{order.instrument.symbol}")
-        if not market_data:
-            raise ValueError(f"No market data for {order.instrument.symbol}")
-            
-        market_data = json.loads(market_data)
-        current_price = float(market_data['price'])
-        
-        # Check if limit order conditions are met
-        if order.type == OrderType.LIMIT:
-            if order.side == OrderSide.BUY and current_price > order.price:
-                return {"status": "pending", "reason": "Price above limit"}
-            if order.side == OrderSide.SELL and current_price < order.price:
-                return {"status": "pending", "reason": "Price below limit"}
-        
-        # Execute trade
-        trade = Trade(
-            order_id=order.id,
-            instrument_id=order.instrument_id,
-            price=current_price,
-            quantity=order.quantity,
-            side=order.side
-        )
-        db.add(trade)
-        
-        # Update position
-        position = db.query(Position).filter(
-            Position.instrument_id == order.instrument_id,
-            Position.account_id == order.account_id
-        ).first()
-        
-        if not position:
-            position = Position(
-                instrument_id=order.instrument_id,
-                account_id=order.account_id,
-                quantity=0
-            )
-            db.add(position)
-        
-        # Update position quantity
-        if order.side == OrderSide.BUY:
-            position.quantity += order.quantity
-        else:
-            position.quantity -= order.quantity
+        if order.created_at:
+            ORDER_LATENCY.labels('submit').observe((datetime.utcnow() - order.created_at).total_seconds())
+
+        # A retried or redelivered order may already have its fill, still in
+        # this process's journal or stored (replayed on start). It is
+        # completed with that fill's time and price, so the order matches its
+        # trade and the fill keys match. Fills never predate their order,
+        # which limits the lookup to recent partitions.
+        fill_id = f"order-{order.id}"
+        with span('db.load_fill', fill_id=fill_id):
+            fill = journal.find(fill_id)
+            if fill is None:
+                stored = db.query(Trade.executed_at, Trade.price).join(
+                    TradeFill, and_(TradeFill.fill_id == Trade.fill_id, TradeFill.executed_at == Trade.executed_at)
+                ).filter(
+                    TradeFill.fill_id == fill_id, Trade.executed_at >= order.created_at
+                ).first()
+                fill = stored._asdict() if stored else None
+
+        if fill is None:
+            # Get current market price from Redis. Only the symbol is loaded:
+            # instrument rows do not map to the instrument subclasses here
+            symbol = db.query(Instrument.symbol).filter(Instrument.id == order.instrument_id).scalar()
+            redis_client = get_redis()
+            with span('redis.quote', symbol=symbol):
+                market_data = redis_client.get(f"quote:{symbol}")
+            if not market_data:
+                raise ValueError(f"No market data for {symbol}")
+
+            market_data = json.loads(market_data)
+            current_price = float(market_data['price'])
+
+            # Check if limit order conditions are met
+            if order.type == OrderType.LIMIT:
+                if order.side == OrderSide.BUY and current_price > order.price:
+                    ORDERS_EXECUTED.labels('pending').inc()
+                    return {"status": "pending", "reason": "Price above limit"}
+                if order.side == OrderSide.SELL and current_price < order.price:
+                    ORDERS_EXECUTED.labels('pending').inc()
+                    return {"status": "pending", "reason": "Price below limit"}
+
+            # Execute trade. The fill is journaled before the order is marked
+            # filled: if the worker dies in between, the order is redelivered
+            # and its fill, keyed by order and time, is only stored once.
+            fill = {
+                'fill_id': fill_id,
+                'order_id': order.id,
+                'account_id': order.account_id,
+                'instrument_id': order.instrument_id,
+                'quantity': order.quantity,
+                'price': Decimal(str(current_price)),
+                'side': order.side,
+                'executed_at': datetime.utcnow(),
+            }
+            with span('journal.record'):
+                journal.record(fill)
+        journaled = True
+        filled_price = float(fill['price'])
         
         # Update order status
         order.status = OrderStatus.FILLED
-        order.filled_price = current_price
-        order.filled_at = datetime.utcnow()
+        order.filled_price = fill['price']
+        order.filled_at = fill['executed_at']
+        record_order_event(db, ORDER_FILLED, order, fill_id=fill_id, filled_price=filled_price,
+                           filled_at=order.filled_at)
         
-        db.commit()
+        with span('db.commit'):
+            db.commit()
+        ORDERS_EXECUTED.labels('filled').inc()
+        if order.created_at:
+            ORDER_LATENCY.labels('fill').observe((order.filled_at - order.created_at).total_seconds())
         
         return {
             "status": "success",
-            "trade_id": trade.id,
-            "filled_price": current_price
+            "fill_id": fill_id,
+            "filled_price": filled_price
         }
         
     except Exception as e:
         logger.error(f"Error executing order {order_id}: {str(e)}")
+        ORDERS_EXECUTED.labels('error').inc()
         db.rollback()
+        if journaled or not started:
+            # The fill stands, or the journal could not start yet: retry until
+            # the order is decided, rather than leave it pending for the sweep
+            raise self.retry(exc=e, countdown=FILL_RETRY_SECONDS)
         
         # Update order status to rejected
         try:
             order.status = OrderStatus.REJECTED
             order.rejection_reason = str(e)
+            record_order_event(db, ORDER_REJECTED, order, reason=str(e))
             db.commit()
         except:
             pass
@@ -124,7 +222,9 @@ def execute_order(order_id: int) -> Dict[str, Any]:
     finally:
         db.close()
 
-@celery.task
+@celery.task(ignore_result=True)
+@timed_job('process_corporate_actions')
+@single_instance('process_corporate_actions', LOCK_TIMEOUTS['process_corporate_actions'])
 def process_corporate_actions():
     """Process corporate actions for equities (dividends, splits, etc)."""
     db = next(get_db())
@@ -168,67 +268,134 @@ def process_corporate_actions():
     finally:
         db.close()
 
-@celery.task
+@celery.task(ignore_result=True)
 def calculate_portfolio_metrics(account_id: int):
-    """Calculate portfolio metrics for an account."""
+    """Calculate an account's market value, beta and asset allocation and cache them in Redis."""
     db = next(get_db())
     try:
-        positions = db.query(Position).filter(
+        rows = db.query(
+            Position.quantity, Position.average_entry_price, Instrument.type, Instrument.last_price, Equity.beta
+        ).join(
+            Instrument, Position.instrument_id == Instrument.id
+        ).outerjoin(
+            Equity, Equity.id == Instrument.id
+        ).filter(
             Position.account_id == account_id,
             Position.quantity != 0
         ).all()
-        
-        total_value = 0
-        portfolio_beta = 0
-        asset_allocation = {
-            InstrumentType.EQUITY: 0,
-            InstrumentType.BOND: 0,
-            InstrumentType.FUTURES: 0
-        }
-        
-        for position in positions:
-            instrument = position.instrument
-            current_value = position.quantity * float(instrument.last_price)
+
+        total_value = Decimal(0)
+        beta_value = Decimal(0)
+        asset_allocation = {instrument_type: Decimal(0) for instrument_type in InstrumentType}
+
+        for quantity, entry_price, instrument_type, last_price, beta in rows:
+            # Positions in instruments never priced yet are valued at cost
+            current_value = quantity * (last_price if last_price is not None else entry_price)
             total_value += current_value
-            
-            # Track asset allocation
-            asset_allocation[instrument.type] += current_value
-            
-            # Calculate portfolio beta (for equities)
-            if instrument.type == InstrumentType.EQUITY:
-                portfolio_beta += (current_value / total_value) * instrument.beta
-        
-        # Convert asset allocation to percentages
-        for asset_type in asset_allocation:
-            asset_allocation[asset_type] = (
-                asset_allocation[asset_type] / total_value * 100
-                if total_value > 0 else 0
-            )
-        
-        # Store metrics
-        metrics = PortfolioMetrics(
-            account_id=account_id,
-            total_value=total_value,
-            portfolio_beta=portfolio_beta,
-            equity_allocation=asset_allocation[InstrumentType.EQUITY],
-            bond_allocation=asset_allocation[InstrumentType.BOND],
-            futures_allocation=asset_allocation[InstrumentType.FUTURES],
-            timestamp=datetime.utcnow()
-        )
-        db.add(metrics)
+            asset_allocation[instrument_type] += current_value
+            # Non-equities (and equities without a beta) count as beta 0
+            if instrument_type == InstrumentType.EQUITY and beta is not None:
+                beta_value += current_value * Decimal(str(beta))
+
+        metrics = {
+            "total_value": float(total_value),
+            "portfolio_beta": float(beta_value / total_value) if total_value else 0.0,
+            # Percent of the total market value
+            "asset_allocation": {
+                instrument_type.value: float(value / total_value * 100) if total_value else 0.0
+                for instrument_type, value in asset_allocation.items()
+            },
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        get_redis().set(PORTFOLIO_METRICS_KEY.format(account_id=account_id), json.dumps(metrics),
+                        ex=PORTFOLIO_METRICS_TTL)
+
+        return {"status": "success", "metrics": metrics}
+
+    except Exception as e:
+        logger.error(f"Error calculating portfolio metrics: {str(e)}")
+        return {"status": "error", "error": str(e)}
+    finally:
+        db.close()
+
+@celery.task(ignore_result=True)
+@timed_job('calculate_all_portfolio_metrics')
+@single_instance('calculate_all_portfolio_metrics', LOCK_TIMEOUTS['calculate_all_portfolio_metrics'])
+def calculate_all_portfolio_metrics():
+    """Calculate portfolio metrics for every account holding positions."""
+    db = next(get_db())
+    try:
+        account_ids = [
+            account_id for (account_id,) in
+            db.query(Position.account_id).filter(Position.quantity != 0).distinct()
+        ]
+    finally:
+        db.close()
+
+    failed = [
+        account_id for account_id in account_ids
+        if calculate_portfolio_metrics(account_id)["status"] != "success"
+    ]
+    return {
+        "status": "error" if failed else "success",
+        "accounts": len(account_ids),
+        "failed": failed
+    }
+
+@celery.task(ignore_result=True)
+@timed_job('sweep_stale_orders')
+@single_instance('sweep_stale_orders', LOCK_TIMEOUTS['sweep_stale_orders'])
+def sweep_stale_orders(market_minutes: int = None, max_age_minutes: int = None):
+    """Cancel pending orders that will never fill: missed market orders and expired day orders."""
+    now = datetime.utcnow()
+    market_cutoff = now - timedelta(minutes=market_minutes or STALE_MARKET_ORDER_MINUTES)
+    cutoff = now - timedelta(minutes=max_age_minutes or STALE_ORDER_MINUTES)
+    db = next(get_db())
+    try:
+        orders = Order.__table__
+        cancelled = db.execute(
+            orders.update().where(
+                orders.c.status == OrderStatus.PENDING,
+                or_(
+                    and_(orders.c.type == OrderType.MARKET, orders.c.created_at < market_cutoff),
+                    orders.c.created_at < cutoff
+                )
+            ).values(status=OrderStatus.CANCELLED, updated_at=now)
+            .returning(*[orders.c[field] for field in ORDER_FIELDS])
+        ).all()
+        record_order_events(db, ORDER_CANCELLED, [{**row._asdict(), 'reason': 'stale'} for row in cancelled])
         db.commit()
-        
+        cancelled = len(cancelled)
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} stale orders")
+        return {"status": "success", "cancelled": cancelled}
+
+    except Exception as e:
+        logger.error(f"Error sweeping stale orders: {str(e)}")
+        db.rollback()
+        return {"status": "error", "error": str(e)}
+    finally:
+        db.close()
+
+@celery.task(ignore_result=True)
+@timed_job('maintain_partitions')
+@single_instance('maintain_partitions', LOCK_TIMEOUTS['maintain_partitions'])
+def maintain_partitions(months_ahead: int = None, retention_months: int = None):
+    """Create the coming months' order and trade partitions and archive expired ones to Parquet."""
+    db = next(get_db())
+    try:
+        created = ensure_partitions(db, months_ahead or PARTITION_MONTHS_AHEAD)
+        archived = archive_partitions(db, ARCHIVE_DIR, retention_months or PARTITION_RETENTION_MONTHS)
+        if created:
+            logger.info(f"Created partitions {', '.join(created)}")
         return {
             "status": "success",
-            "metrics": {
-                "total_value": total_value,
-                "portfolio_beta": portfolio_beta,
-                "asset_allocation": asset_allocation
-            }
+            "created": created,
+            "archived": [name for name, _ in archived]
         }
-        
+
     except Exception as e:
-        logger.error(f"Error calculating portfolio metrics: {str(e)}")
+        logger.error(f"Error maintaining partitions: {str(e)}")
         db.rollback()
         return {"status": "error", "error": str(e)}
     finally:
@@ -0,0 +1,264 @@
+"""Redis reads shared by all the websocket clients of a process.
+
+A websocket reading Redis itself holds a pooled connection for as long as
+its client stays connected. Instead each process runs one reader per
+source, which copies every message into a bounded queue per client, and
+``serve`` sends a client its queue until the client disconnects, noticed
+by a concurrent receive, or falls too far behind.
+"""
+import asyncio
+import logging
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+from fastapi import WebSocket
+from src.execution.order_events import ORDER_EVENTS_STREAM, StreamEntry, decode_entry_id, decode_event
+from src.utils.metrics import WEBSOCKET_QUEUE_DEPTH
+from src.utils.redis_pool import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Messages queued for one client before it counts as too slow
+QUEUE_SIZE = 1000
+# Close code asking a client that fell behind to reconnect
+TRY_AGAIN_LATER = 1013
+# How long one pub/sub read waits, so the reader notices when its last client leaves
+READ_TIMEOUT = 1.0
+
+
+def stream_id_key(entry_id: str) -> Tuple[int, int]:
+    """Sort key of a Redis stream id (``<ms>-<seq>``)."""
+    ms, _, seq = entry_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+class Subscription:
+    """One client's queue of messages from a reader.
+
+    ``get`` returns None once the subscription is closed: by the client
+    disconnecting, by the reader failing, or by the queue overflowing.
+    With ``drop_oldest`` a full queue loses its oldest message instead of
+    overflowing, for feeds where only the latest values matter.
+    """
+
+    def __init__(self, endpoint: str, maxsize: int = QUEUE_SIZE, drop_oldest: bool = False):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.drop_oldest = drop_oldest
+        self.closed = False
+        self.overflowed = False
+        self.depth = WEBSOCKET_QUEUE_DEPTH.labels(endpoint)
+
+    def put(self, message: Any):
+        if self.closed:
+            return
+        if self.queue.full() and self.drop_oldest:
+            self.queue.get_nowait()
+            self.depth.dec()
+        if self.queue.full():
+            # Skipping messages would leave a gap the client cannot see;
+            # it reconnects and resumes instead
+            self.overflowed = True
+            self.close()
+            return
+        self.queue.put_nowait(message)
+        self.depth.inc()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.depth.dec(self.queue.qsize())
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Any:
+        message = await self.queue.get()
+        if message is None:
+            # Closed: stay closed for later calls
+            self.queue.put_nowait(None)
+            return None
+        self.depth.dec()
+        return message
+
+
+class StreamFanout:
+    """The order events stream, read by one XREAD loop for every client of the process.
+
+    The reader starts with the first subscriber after the newest event and
+    stops within ``block_ms`` of the last one leaving. Clients resuming from
+    an older id read the events in between with ``backlog``.
+    """
+
+    def __init__(self, redis_client: Optional[Callable[[], Any]] = None, stream: str = ORDER_EVENTS_STREAM,
+                 queue_size: int = QUEUE_SIZE, block_ms: int = 5000, count: int = 100):
+        self.redis_client = redis_client or get_async_redis
+        self.stream = stream
+        self.queue_size = queue_size
+        self.block_ms = block_ms
+        self.count = count
+        self._subscribers: Set[Subscription] = set()
+        self._last_id: Optional[str] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def subscribe(self, endpoint: str) -> Subscription:
+        """A queue of ``(stream id, event)`` for every event after the newest one now."""
+        subscription = Subscription(endpoint, self.queue_size)
+        if self._reader is None:
+            newest = await self.redis_client().xrevrange(self.stream, count=1)
+            if self._reader is None:
+                self._last_id = decode_entry_id(newest[0][0]) if newest else '0-0'
+                self._reader = asyncio.get_running_loop().create_task(self._read())
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        self._subscribers.discard(subscription)
+
+    async def backlog(self, after_id: str) -> AsyncIterator[StreamEntry]:
+        """Events after ``after_id`` up to the newest, oldest first."""
+        client = self.redis_client()
+        while True:
+            entries = await client.xrange(self.stream, min=f"({after_id}", max='+', count=self.count)
+            for entry_id, fields in entries:
+                after_id = decode_entry_id(entry_id)
+                yield after_id, decode_event(fields)
+            if len(entries) < self.count:
+                return
+
+    async def _read(self):
+        client = self.redis_client()
+        try:
+            while self._subscribers:
+                response = await client.xread({self.stream: self._last_id}, count=self.count, block=self.block_ms)
+                for entry_id, fields in (response[0][1] if response else []):
+                    self._last_id = decode_entry_id(entry_id)
+                    event = decode_event(fields)
+                    for subscription in list(self._subscribers):
+                        subscription.put((self._last_id, event))
+        except Exception as e:
+            logger.error(f"Error reading {self.stream}: {str(e)}")
+            # Clients reconnect and resume from their last event
+            for subscription in list(self._subscribers):
+                self.unsubscribe(subscription)
+        finally:
+            self._reader = None
+
+
+class ChannelFanout:
+    """Redis pub/sub channels, read over one connection for every client of the process.
+
+    A channel is subscribed in Redis with its first client and unsubscribed
+    with its last; the connection is closed once no channel is left.
+    Clients that fall behind lose their oldest messages.
+    """
+
+    def __init__(self, redis_client: Optional[Callable[[], Any]] = None, queue_size: int = QUEUE_SIZE):
+        self.redis_client = redis_client or get_async_redis
+        self.queue_size = queue_size
+        self._channels: Dict[str, Set[Subscription]] = {}
+        self._pubsub: Any = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def subscribe(self, channel: str, endpoint: str) -> Subscription:
+        """A queue of the messages published to ``channel`` from now on."""
+        subscription = Subscription(endpoint, self.queue_size, drop_oldest=True)
+        if self._pubsub is None:
+            self._pubsub = self.redis_client().pubsub()
+        pubsub = self._pubsub
+        subscribers = self._channels.get(channel)
+        if subscribers is None:
+            subscribers = self._channels[channel] = set()
+            try:
+                await pubsub.subscribe(channel)
+            except Exception:
+                # Clients that joined meanwhile were never subscribed either
+                for other in self._channels.pop(channel, ()):
+                    other.close()
+                raise
+        subscribers.add(subscription)
+        if self._reader is None:
+            self._reader = asyncio.get_running_loop().create_task(self._read(pubsub))
+        return subscription
+
+    async def unsubscribe(self, channel: str, subscription: Subscription):
+        subscription.close()
+        subscribers = self._channels.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._channels[channel]
+            try:
+                await self._pubsub.unsubscribe(channel)
+            except Exception as e:
+                logger.error(f"Error unsubscribing from {channel}: {str(e)}")
+
+    async def _read(self, pubsub: Any):
+        try:
+            while self._channels:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=READ_TIMEOUT)
+                if message is None or message['type'] != 'message':
+                    continue
+                channel = message['channel']
+                channel = channel.decode('utf-8') if isinstance(channel, bytes) else channel
+                data = message['data']
+                data = data.decode('utf-8') if isinstance(data, bytes) else data
+                for subscription in list(self._channels.get(channel, ())):
+                    subscription.put(data)
+        except Exception as e:
+            logger.error(f"Error reading market data: {str(e)}")
+            # Clients reconnect, getting a fresh connection
+            for subscribers in self._channels.values():
+                for subscription in subscribers:
+                    subscription.close()
+            self._channels.clear()
+        finally:
+            self._reader = None
+            self._pubsub = None
+            await pubsub.aclose()
+
+
+async def serve(websocket: WebSocket, subscription: Subscription, send: Callable[[Any], Awaitable[None]]):
+    """Pass the subscription's messages to ``send`` until the client disconnects or falls behind."""
+    async def watch():
+        try:
+            while (await websocket.receive())['type'] != 'websocket.disconnect':
+                pass
+        finally:
+            subscription.close()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        while True:
+            message = await subscription.get()
+            if message is None:
+                break
+            await send(message)
+        if subscription.overflowed:
+            await websocket.close(code=TRY_AGAIN_LATER)
+    finally:
+        watcher.cancel()
+
+
+# One fan-out per event loop, like the async Redis pools
+_channel_fanouts: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ChannelFanout]' = weakref.WeakKeyDictionary()
+_stream_fanouts: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, StreamFanout]' = weakref.WeakKeyDictionary()
+
+
+def channel_fanout() -> ChannelFanout:
+    """The pub/sub fan-out of the running event loop."""
+    loop = asyncio.get_running_loop()
+    fanout = _channel_fanouts.get(loop)
+    if fanout is None:
+        fanout = _channel_fanouts[loop] = ChannelFanout()
+    return fanout
+
+
+def stream_fanout() -> StreamFanout:
+    """The order events fan-out of the running event loop."""
+    loop = asyncio.get_running_loop()
+    fanout = _stream_fanouts.get(loop)
+    if fanout is None:
+        fanout = _stream_fanouts[loop] = StreamFanout()
+    return fanout
@@ -1,30 +1,22 @@
 """FastAPI application entry point."""
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import time
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-import uvicorn
 from sqlalchemy.orm import Session
 
 from src.api.database import get_db
-# Direct import from models.py to avoid circular imports
-import importlib.util
-import os
-
-# Directly import the models.py file
-models_path = os.path.join(os.path.dirname(__file__), '..', 'database', 'models.py')
-spec = importlib.util.spec_from_file_location('models_module', models_path)
-models_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(models_module)
-
-# Get the models from the imported module
-Base = models_module.Base
-FinancialModel = models_module.FinancialModel
-Strategy = models_module.Strategy
-Backtest = models_module.Backtest
-FuturesContract = models_module.FuturesContract
-Position = models_module.Position
-OrderModel = models_module.Order
+from src.database.session import engine
+from src.utils.metrics import observe_request, register_db_pool, render_metrics
+from src.utils.profiling import authorized, profile, profiling_token
+from src.utils.redis_pool import get_redis_manager
+from src.utils.tracing import configure_tracing, span
+from src.database.models_export import (
+    Base, FinancialModel, Strategy, Backtest, FuturesContract, Position, Order as OrderModel
+)
 
 # Import routers
 from src.api.routes import trading
@@ -34,6 +26,27 @@ app = FastAPI(title="Trading System API")
 # Include routers
 app.include_router(trading.router)
 
+register_db_pool(engine, 'api')
+configure_tracing('api')
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency and a trace span per route template, so path parameters don't explode the label set."""
+    started = time.perf_counter()
+    status = 500
+    with span(f"{request.method} {request.url.path}", **{'http.method': request.method}) as request_span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get('route')
+            route_path = route.path if route is not None else 'unmatched'
+            request_span.update_name(f"{request.method} {route_path}")
+            request_span.set_attribute('http.route', route_path)
+            request_span.set_attribute('http.status_code', status)
+            observe_request(request.method, route_path, status, time.perf_counter() - started)
+
 # Pydantic models for request validation
 class ModelCreate(BaseModel):
     name: str
@@ -64,6 +77,40 @@ class FuturesContractCreate(BaseModel):
 async def root():
     return {"status": "running"}
 
+@app.get("/health")
+async def health(response: Response):
+    """Liveness plus dependency checks; 503 when Redis is unreachable."""
+    manager = get_redis_manager()
+    redis_health = await manager.async_health()
+    if not redis_health['ok']:
+        response.status_code = 503
+    return {"status": "ok" if redis_health['ok'] else "degraded",
+            "redis": {**redis_health, "pools": manager.stats()}}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for the API process."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/debug/profile", include_in_schema=False)
+async def debug_profile(seconds: float = 5.0, format: str = 'json', memory: bool = True,
+                        x_admin_token: Optional[str] = Header(None)):
+    """Profile the running API for ``seconds``.
+
+    Disabled unless PROFILING_TOKEN is set; the token must be sent in the
+    X-Admin-Token header. ``format=folded`` returns only the collapsed
+    stacks for flamegraph tools, ``json`` adds the tracemalloc growth diff.
+    """
+    if profiling_token() is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not authorized(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    result = await asyncio.to_thread(profile, seconds, memory=memory and format != 'folded')
+    if format == 'folded':
+        return PlainTextResponse(result['folded'])
+    return result
+
 @app.post("/api/models/")
 async def create_model(model: ModelCreate, db: Session = Depends(get_db)):
     """Create a new model."""
@@ -147,4 +194,5 @@ async def get_positions(db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -4,8 +4,10 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-import redis
 from ..database import get_db
+from src.api.broadcast import channel_fanout, serve
+from src.utils.metrics import WEBSOCKET_CLIENTS
+from src.utils.redis_pool import get_async_redis
 from ...database.models import (
     Instrument, Equity, Bond, Position, Order,
     OrderType, OrderSide, OrderStatus, InstrumentType
@@ -71,8 +73,7 @@ async def get_quote(instrument_id: int, db: Session = Depends(get_db)):
     if not instrument:
         raise HTTPException(status_code=404, detail="Instrument not found")
     
-    redis_client = redis.from_url('redis://redis:6379')
-    quote_data = redis_client.get(f"quote:{instrument.symbol}")
+    quote_data = await get_async_redis().get(f"quote:{instrument.symbol}")
     
     if not quote_data:
         raise HTTPException(status_code=404, detail="Quote not available")
@@ -86,21 +87,24 @@ async def market_data_websocket(
 ):
     """WebSocket endpoint for real-time market data."""
     await websocket.accept()
-    redis_client = redis.from_url('redis://redis:6379')
-    pubsub = redis_client.pubsub()
+    endpoint = '/api/instruments/market-data'
+    fanout = channel_fanout()
     
     # Subscribe to appropriate channel based on instrument type
     channel = f"market_data:{instrument_type.value}"
-    pubsub.subscribe(channel)
     
+    clients = WEBSOCKET_CLIENTS.labels(endpoint)
+    clients.inc()
+    subscription = None
     try:
-        for message in pubsub.listen():
-            if message['type'] == 'message':
-                await websocket.send_text(message['data'].decode('utf-8'))
+        subscription = await fanout.subscribe(channel, endpoint)
+        await serve(websocket, subscription, websocket.send_text)
     except Exception:
         await websocket.close()
     finally:
-        pubsub.unsubscribe(channel)
+        if subscription is not None:
+            await fanout.unsubscribe(channel, subscription)
+        clients.dec()
 
 @router.post("/{instrument_id}/orders")
 async def place_order(
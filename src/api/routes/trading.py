@@ -1,29 +1,17 @@
 """Trading API endpoints."""
-from fastapi import APIRouter, HTTPException, Depends, WebSocket
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel, field_validator, ConfigDict
 from datetime import datetime
 import json
-import redis
 from ..database import get_db
-# Direct import from models.py to avoid circular imports
-import importlib.util
-import os
-
-# Directly import the models.py file
-models_path = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'models.py')
-spec = importlib.util.spec_from_file_location('models_module', models_path)
-models_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(models_module)
-
-# Get the models from the imported module
-Order = models_module.Order
-OrderType = models_module.OrderType
-OrderSide = models_module.OrderSide
-OrderStatus = models_module.OrderStatus
-Position = models_module.Position
-FuturesContract = models_module.FuturesContract
+from src.api.broadcast import channel_fanout, serve, stream_fanout, stream_id_key
+from src.execution.order_events import ORDER_CANCELLED, ORDER_CREATED, record_order_event
+from src.utils.metrics import WEBSOCKET_CLIENTS
+from src.database.models_export import (
+    Order, OrderType, OrderSide, OrderStatus, Position, FuturesContract
+)
 
 router = APIRouter(prefix="/api/trading", tags=["trading"])
 
@@ -158,6 +146,8 @@ async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
     )
     db.add(db_order)
     try:
+        db.flush()
+        record_order_event(db, ORDER_CREATED, db_order)
         db.commit()
         db.refresh(db_order)
     except Exception as e:
@@ -169,14 +159,23 @@ async def create_order(order: OrderCreate, db: Session = Depends(get_db)):
 async def list_orders(
     status: Optional[OrderStatus] = None,
     contract_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
     db: Session = Depends(get_db)
 ):
+    """Newest orders first. Orders are partitioned by month of ``created_at``,
+    so ``start``/``end`` limit the query to the months they span."""
     query = db.query(Order)
     if status:
         query = query.filter(Order.status == status)
     if contract_id:
         query = query.filter(Order.contract_id == contract_id)
-    return query.all()
+    if start:
+        query = query.filter(Order.created_at >= start)
+    if end:
+        query = query.filter(Order.created_at < end)
+    return query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit).all()
 
 @router.post("/orders/{order_id}/cancel", response_model=OrderResponse)
 async def cancel_order(order_id: int, db: Session = Depends(get_db)):
@@ -189,6 +188,7 @@ async def cancel_order(order_id: int, db: Session = Depends(get_db)):
     
     order.status = OrderStatus.CANCELLED
     try:
+        record_order_event(db, ORDER_CANCELLED, order)
         db.commit()
         db.refresh(order)
     except Exception as e:
@@ -209,15 +209,61 @@ async def list_positions(
 @router.websocket("/market-data")
 async def market_data_websocket(websocket: WebSocket):
     await websocket.accept()
-    redis_client = redis.from_url('redis://redis:6379')
-    pubsub = redis_client.pubsub()
-    pubsub.subscribe('futures_market_data')
+    endpoint = '/api/trading/market-data'
+    fanout = channel_fanout()
     
+    clients = WEBSOCKET_CLIENTS.labels(endpoint)
+    clients.inc()
+    subscription = None
+    try:
+        subscription = await fanout.subscribe('futures_market_data', endpoint)
+        await serve(websocket, subscription, websocket.send_text)
+    except Exception:
+        await websocket.close()
+    finally:
+        if subscription is not None:
+            await fanout.unsubscribe('futures_market_data', subscription)
+        clients.dec()
+
+@router.websocket("/order-updates")
+async def order_updates_websocket(websocket: WebSocket, account_id: Optional[int] = None,
+                                  last_id: Optional[str] = None):
+    """Push order events as they reach the order events stream.
+
+    Each message carries its ``stream_id``; reconnecting with ``last_id`` set
+    to the last one received resumes without missing events.
+    """
+    await websocket.accept()
+    endpoint = '/api/trading/order-updates'
+    fanout = stream_fanout()
+    last_key = None
+
+    async def send(entry):
+        nonlocal last_key
+        stream_id, event = entry
+        # Events in both the backlog and the live queue go out once
+        key = stream_id_key(stream_id)
+        if last_key is not None and key <= last_key:
+            return
+        last_key = key
+        if account_id is None or event['account_id'] == account_id:
+            await websocket.send_text(json.dumps({'stream_id': stream_id, **event}))
+
+    clients = WEBSOCKET_CLIENTS.labels(endpoint)
+    clients.inc()
+    subscription = None
     try:
-        for message in pubsub.listen():
-            if message['type'] == 'message':
-                await websocket.send_text(message['data'].decode('utf-8'))
+        # A malformed last_id closes the socket like any other failure
+        last_key = stream_id_key(last_id) if last_id is not None else None
+        # Subscribed before reading the backlog, so no event falls between the two
+        subscription = await fanout.subscribe(endpoint)
+        if last_id is not None:
+            async for entry in fanout.backlog(last_id):
+                await send(entry)
+        await serve(websocket, subscription, send)
     except Exception:
         await websocket.close()
     finally:
-        pubsub.unsubscribe('futures_market_data')
+        if subscription is not None:
+            fanout.unsubscribe(subscription)
+        clients.dec()
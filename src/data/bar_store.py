@@ -0,0 +1,335 @@
+"""Columnar on-disk store for historical OHLCV bars.
+
+Bars are kept as raw little-endian column files partitioned by timeframe,
+symbol and UTC day::
+
+    <root>/<timeframe>/<symbol>/<YYYY-MM-DD>/<column>.bin
+
+Appends are plain ``write`` calls at the end of each column file and reads go
+through ``numpy.memmap``, so a range inside one partition is returned as a
+zero-copy view onto the page cache.
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+COLUMN_DTYPES = {
+    'timestamp': np.dtype('<i8'),  # nanoseconds since the epoch, UTC
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<f8'),
+}
+logger = logging.getLogger(__name__)
+
+TICK_TIMEFRAME = 'tick'
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def to_nanoseconds(values: Any) -> np.ndarray:
+    """Convert datetimes (or epoch milliseconds, as returned by ccxt) to int64 ns."""
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype('datetime64[ns]').astype(np.int64)
+    if arr.dtype == object or arr.dtype.kind in 'US':
+        return arr.astype('datetime64[ns]').astype(np.int64)
+    return arr.astype(np.int64) * 1_000_000
+
+
+def _scalar_ns(value: Any) -> int:
+    return int(to_nanoseconds([value])[0])
+
+
+class BarStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._maps: Dict[str, Tuple[int, np.memmap]] = {}
+        self._tails: Dict[str, int] = {}
+        self._checked: Set[str] = set()
+
+    # Paths
+
+    def _symbol_dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, timeframe, quote(symbol, safe=''))
+
+    def partitions(self, symbol: str, timeframe: str = '1m') -> List[str]:
+        """List the day partitions (``YYYY-MM-DD``) stored for a symbol."""
+        path = self._symbol_dir(symbol, timeframe)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.listdir(path))
+
+    def symbols(self, timeframe: str = '1m') -> List[str]:
+        """List symbols with data for a timeframe."""
+        path = os.path.join(self.root, timeframe)
+        if not os.path.isdir(path):
+            return []
+        return sorted(unquote(name) for name in os.listdir(path))
+
+    # Writes
+
+    def append(self, symbol: str, bars: Any, timeframe: str = '1m') -> int:
+        """Append bars for a symbol and return the number of rows written.
+
+        ``bars`` may be a DataFrame or a mapping of column name to array-like.
+        Rows at or before the last stored timestamp of their partition are
+        dropped, so overlapping fetches can be appended without duplicating.
+        """
+        columns = {name: np.asarray(bars[name]) for name in COLUMNS}
+        timestamps = to_nanoseconds(columns['timestamp'])
+        if not len(timestamps):
+            return 0
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        data = {name: columns[name][order].astype(COLUMN_DTYPES[name]) for name in COLUMNS[1:]}
+        data['timestamp'] = timestamps
+
+        days = timestamps // NS_PER_DAY
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        written = 0
+        for chunk in np.split(np.arange(len(timestamps)), boundaries):
+            written += self._append_partition(
+                symbol, timeframe, int(days[chunk[0]]), {name: values[chunk] for name, values in data.items()}
+            )
+        return written
+
+    def append_ticks(self, symbol: str, timestamps: Sequence[Any], prices: Sequence[float],
+                     volumes: Sequence[float]) -> int:
+        """Append raw ticks as degenerate bars under the ``tick`` timeframe."""
+        prices = np.asarray(prices, dtype=np.float64)
+        return self.append(symbol, {
+            'timestamp': timestamps,
+            'open': prices,
+            'high': prices,
+            'low': prices,
+            'close': prices,
+            'volume': volumes,
+        }, timeframe=TICK_TIMEFRAME)
+
+    def _append_partition(self, symbol: str, timeframe: str, day: int,
+                          data: Dict[str, np.ndarray]) -> int:
+        day_name = np.datetime64(day, 'D').astype(str)
+        path = os.path.join(self._symbol_dir(symbol, timeframe), day_name)
+        if path not in self._checked:
+            if os.path.isdir(path):
+                self._truncate_torn(path)
+            self._checked.add(path)
+        tail = self._tail(path)
+        if tail is not None:
+            keep = data['timestamp'] > tail
+            if not keep.all():
+                data = {name: values[keep] for name, values in data.items()}
+        # Keep only strictly increasing timestamps within the batch itself
+        if len(data['timestamp']) > 1:
+            keep = np.concatenate(([True], np.diff(data['timestamp']) > 0))
+            if not keep.all():
+                data = {name: values[keep] for name, values in data.items()}
+        if not len(data['timestamp']):
+            return 0
+
+        os.makedirs(path, exist_ok=True)
+        # The timestamp column is written last: readers trim every column to the
+        # shortest one, so a torn append is never visible.
+        for name in COLUMNS[1:] + COLUMNS[:1]:
+            with open(os.path.join(path, f"{name}.bin"), 'ab') as f:
+                f.write(np.ascontiguousarray(data[name]).tobytes())
+        self._tails[path] = int(data['timestamp'][-1])
+        return len(data['timestamp'])
+
+    def _truncate_torn(self, path: str):
+        """Cut every column back to the shortest one left by an interrupted append."""
+        sizes = {}
+        for name in COLUMNS:
+            filename = os.path.join(path, f"{name}.bin")
+            sizes[filename] = os.path.getsize(filename) if os.path.exists(filename) else 0
+        rows = min(size // COLUMN_DTYPES['timestamp'].itemsize for size in sizes.values())
+        for filename, size in sizes.items():
+            if size > rows * COLUMN_DTYPES['timestamp'].itemsize:
+                os.truncate(filename, rows * COLUMN_DTYPES['timestamp'].itemsize)
+                self._maps.pop(filename, None)
+
+    def _tail(self, path: str) -> Optional[int]:
+        if path not in self._tails:
+            columns = self._open_partition(path, ('timestamp',))
+            if columns is None or not len(columns['timestamp']):
+                return None
+            self._tails[path] = int(columns['timestamp'][-1])
+        return self._tails[path]
+
+    # Reads
+
+    def _memmap(self, filename: str, dtype: np.dtype) -> np.ndarray:
+        size = os.path.getsize(filename)
+        cached = self._maps.get(filename)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        if size < dtype.itemsize:
+            array = np.empty(0, dtype=dtype)
+        else:
+            array = np.memmap(filename, dtype=dtype, mode='r', shape=(size // dtype.itemsize,))
+        self._maps[filename] = (size, array)
+        return array
+
+    def _open_partition(self, path: str, columns: Sequence[str] = COLUMNS) -> Optional[Dict[str, np.ndarray]]:
+        if not os.path.isfile(os.path.join(path, 'timestamp.bin')):
+            return None
+        wanted = tuple(dict.fromkeys(('timestamp',) + tuple(columns)))
+        arrays = {name: self._memmap(os.path.join(path, f"{name}.bin"), COLUMN_DTYPES[name]) for name in wanted}
+        length = min(len(values) for values in arrays.values())
+        return {name: values[:length] for name, values in arrays.items()}
+
+    def iter_partitions(self, symbol: str, start: Any = None, end: Any = None,
+                        timeframe: str = '1m', columns: Sequence[str] = COLUMNS) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield zero-copy column views for each partition overlapping ``[start, end)``."""
+        start_ns = None if start is None else _scalar_ns(start)
+        end_ns = None if end is None else _scalar_ns(end)
+        for day_name in self.partitions(symbol, timeframe):
+            day_start = int(np.datetime64(day_name, 'ns').astype(np.int64))
+            if end_ns is not None and day_start >= end_ns:
+                break
+            if start_ns is not None and day_start + NS_PER_DAY <= start_ns:
+                continue
+            data = self._open_partition(os.path.join(self._symbol_dir(symbol, timeframe), day_name), columns)
+            if data is None:
+                continue
+            timestamps = data['timestamp']
+            lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, side='left'))
+            hi = len(timestamps) if end_ns is None else int(np.searchsorted(timestamps, end_ns, side='left'))
+            if hi > lo:
+                yield {name: data[name][lo:hi] for name in columns}
+
+    def read(self, symbol: str, start: Any = None, end: Any = None, timeframe: str = '1m',
+             columns: Sequence[str] = COLUMNS) -> Dict[str, np.ndarray]:
+        """Read bars in ``[start, end)`` as a mapping of column to array.
+
+        A range within a single day is a zero-copy memmap view; ranges spanning
+        several partitions are concatenated.
+        """
+        chunks = list(self.iter_partitions(symbol, start, end, timeframe, columns))
+        if not chunks:
+            return {name: np.empty(0, dtype=COLUMN_DTYPES[name]) for name in columns}
+        if len(chunks) == 1:
+            return chunks[0]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in columns}
+
+    def read_frame(self, symbol: str, start: Any = None, end: Any = None,
+                   timeframe: str = '1m') -> pd.DataFrame:
+        """Read bars as a DataFrame shaped like ``MarketDataService.fetch_ohlcv`` output."""
+        data = self.read(symbol, start, end, timeframe)
+        df = pd.DataFrame({name: data[name] for name in COLUMNS[1:]})
+        df.insert(0, 'timestamp', data['timestamp'].view('datetime64[ns]'))
+        return df
+
+    def read_closes(self, symbols: Sequence[str], start: Any = None, end: Any = None,
+                    timeframe: str = '1m') -> pd.DataFrame:
+        """Read close prices for several symbols aligned on timestamp.
+
+        The result has one column per symbol, which is the ``price_history``
+        layout ``RiskManager.calculate_var`` expects.
+        """
+        series = {}
+        for symbol in symbols:
+            data = self.read(symbol, start, end, timeframe, columns=('timestamp', 'close'))
+            series[symbol] = pd.Series(data['close'], index=data['timestamp'].view('datetime64[ns]'))
+        return pd.DataFrame(series).sort_index()
+
+    def last_timestamp(self, symbol: str, timeframe: str = '1m') -> Optional[datetime]:
+        """Return the timestamp of the most recent stored bar, if any."""
+        for day_name in reversed(self.partitions(symbol, timeframe)):
+            tail = self._tail(os.path.join(self._symbol_dir(symbol, timeframe), day_name))
+            if tail is not None:
+                return pd.Timestamp(tail).to_pydatetime()
+        return None
+
+
+class TickWriter:
+    """Buffers ticks per symbol and appends them to a ``BarStore`` from a background thread.
+
+    ``add`` only appends to in-memory lists, so publishing a tick never waits
+    on disk. Every ``flush_interval`` seconds the writer thread hands each
+    symbol's buffered ticks to one ``append_ticks`` call, which writes each
+    column file once for the lot. ``close`` writes whatever is left.
+    """
+
+    def __init__(self, store: BarStore, flush_interval: float = 1.0):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # symbol -> (timestamps, prices, volumes)
+        self._buffers: Dict[str, Tuple[List[Any], List[float], List[float]]] = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='tick-writer', daemon=True)
+                self._thread.start()
+
+    def add(self, symbol: str, timestamp: Any, price: float, volume: float):
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            buffer = self._buffers.get(symbol)
+            if buffer is None:
+                buffer = self._buffers[symbol] = ([], [], [])
+            buffer[0].append(timestamp)
+            buffer[1].append(price)
+            buffer[2].append(volume)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(buffer[0]) for buffer in self._buffers.values())
+
+    def flush(self) -> int:
+        """Append every buffered tick; returns the rows written.
+
+        If an append fails, the ticks not yet written go back into the
+        buffers, ahead of any added since, for the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                buffers, self._buffers = self._buffers, {}
+            pending = list(buffers.items())
+            written = 0
+            try:
+                while pending:
+                    symbol, (timestamps, prices, volumes) = pending[-1]
+                    written += self.store.append_ticks(symbol, timestamps, prices, volumes)
+                    pending.pop()
+            except Exception:
+                with self._lock:
+                    for symbol, buffer in pending:
+                        newer = self._buffers.get(symbol)
+                        if newer is not None:
+                            for column, added in zip(buffer, newer):
+                                column.extend(added)
+                        self._buffers[symbol] = buffer
+                raise
+            return written
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing ticks: {str(e)}")
+
+    def close(self):
+        """Stop the writer thread and write the remaining ticks."""
+        self._stopping.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        self.flush()
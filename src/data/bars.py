@@ -0,0 +1,166 @@
+"""Streaming tick-to-bar aggregation with fixed-size ring buffers."""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.bar_store import COLUMNS, COLUMN_DTYPES, to_nanoseconds
+
+NS_PER_SECOND = 1_000_000_000
+TIMEFRAMES = {
+    '1s': 1 * NS_PER_SECOND,
+    '1m': 60 * NS_PER_SECOND,
+    '5m': 300 * NS_PER_SECOND,
+    '1h': 3600 * NS_PER_SECOND,
+}
+
+
+class BarRingBuffer:
+    """Holds the most recent ``capacity`` completed bars in preallocated arrays."""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self._columns = {name: np.empty(capacity, dtype=COLUMN_DTYPES[name]) for name in COLUMNS}
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: int, open_: float, high: float, low: float,
+               close: float, volume: float):
+        """Store a completed bar, overwriting the oldest one when full."""
+        i = self._next
+        columns = self._columns
+        columns['timestamp'][i] = timestamp
+        columns['open'][i] = open_
+        columns['high'][i] = high
+        columns['low'][i] = low
+        columns['close'][i] = close
+        columns['volume'][i] = volume
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def columns(self, last: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Return the stored bars (oldest first) as a mapping of column to array."""
+        count = self._count if last is None else min(last, self._count)
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return {name: values[start:start + count].copy() for name, values in self._columns.items()}
+        head = self.capacity - start
+        return {
+            name: np.concatenate((values[start:], values[:count - head]))
+            for name, values in self._columns.items()
+        }
+
+    def to_frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """Return the stored bars as an OHLCV frame, the layout strategies consume."""
+        data = self.columns(last)
+        df = pd.DataFrame({name: data[name] for name in COLUMNS[1:]})
+        df.insert(0, 'timestamp', data['timestamp'].view('datetime64[ns]'))
+        return df
+
+
+class _WorkingBar:
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'volume', 'ticks')
+
+    def __init__(self, start: int, price: float, volume: float):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+        self.ticks = 1
+
+    def add(self, price: float, volume: float):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+        self.ticks += 1
+
+
+class BarAggregator:
+    """Builds OHLCV bars for every symbol and timeframe from a stream of ticks.
+
+    A bar is completed when the first tick of the following bucket arrives (or
+    when ``close_stale`` is called with a later time). Ticks older than the
+    open bar are folded into it rather than reopening history.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = ('1s', '1m', '5m', '1h'), capacity: int = 1000):
+        unknown = set(timeframes) - set(TIMEFRAMES)
+        if unknown:
+            raise ValueError(f"Unsupported timeframes: {sorted(unknown)}")
+        self.timeframes = tuple(timeframes)
+        self.capacity = capacity
+        self._working: Dict[Tuple[str, str], _WorkingBar] = {}
+        self._history: Dict[Tuple[str, str], BarRingBuffer] = {}
+
+    def on_tick(self, symbol: str, timestamp: int, price: float, volume: float) -> List[Dict[str, Any]]:
+        """Apply a tick (timestamp in ns) and return any bars it completed."""
+        completed = []
+        for timeframe in self.timeframes:
+            width = TIMEFRAMES[timeframe]
+            bucket = timestamp - timestamp % width
+            key = (symbol, timeframe)
+            bar = self._working.get(key)
+            if bar is None:
+                self._working[key] = _WorkingBar(bucket, price, volume)
+            elif bucket > bar.start:
+                completed.append(self._complete(key, bar))
+                self._working[key] = _WorkingBar(bucket, price, volume)
+            else:
+                bar.add(price, volume)
+        return completed
+
+    def close_stale(self, now: int) -> List[Dict[str, Any]]:
+        """Complete open bars whose bucket ended before ``now`` (ns)."""
+        completed = []
+        for key, bar in list(self._working.items()):
+            if now >= bar.start + TIMEFRAMES[key[1]]:
+                completed.append(self._complete(key, bar))
+                del self._working[key]
+        return completed
+
+    def _complete(self, key: Tuple[str, str], bar: _WorkingBar) -> Dict[str, Any]:
+        history = self._history.get(key)
+        if history is None:
+            history = self._history[key] = BarRingBuffer(self.capacity)
+        history.append(bar.start, bar.open, bar.high, bar.low, bar.close, bar.volume)
+        symbol, timeframe = key
+        return {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'timestamp': pd.Timestamp(bar.start).isoformat(),
+            'open': bar.open,
+            'high': bar.high,
+            'low': bar.low,
+            'close': bar.close,
+            'volume': bar.volume,
+            'ticks': bar.ticks,
+        }
+
+    def history(self, symbol: str, timeframe: str) -> Optional[BarRingBuffer]:
+        """Return the ring buffer of completed bars for a symbol, if any."""
+        return self._history.get((symbol, timeframe))
+
+    def frame(self, symbol: str, timeframe: str, last: Optional[int] = None) -> pd.DataFrame:
+        """Return completed bars as an OHLCV frame (empty if none yet)."""
+        history = self.history(symbol, timeframe)
+        if history is None:
+            return BarRingBuffer(1).to_frame()
+        return history.to_frame(last)
+
+
+def parse_tick(channel: str, payload: Dict[str, Any]) -> Tuple[str, int, float, float]:
+    """Extract ``(symbol, timestamp_ns, price, volume)`` from a simulator message."""
+    if channel == 'futures_market_data':
+        contract = payload['contract']
+        symbol, price = contract['symbol'], contract['price']
+    else:
+        symbol, price = payload['symbol'], payload['price']
+    timestamp = int(to_nanoseconds([payload['timestamp']])[0])
+    return symbol, timestamp, float(price), float(payload.get('volume', 0.0))
@@ -0,0 +1,416 @@
+"""Incremental technical indicators shared by strategies, simulators and backtests.
+
+Every streaming indicator keeps O(1) state per update and follows the exact
+floating point recurrences pandas uses for ``rolling``/``ewm`` so that a
+value produced live is bit-for-bit identical to the batch value computed on
+the same history.
+"""
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+import pandas as pd
+
+NAN = float('nan')
+
+
+def _ewm_alpha(span: Optional[float] = None, alpha: Optional[float] = None) -> float:
+    """Derive the smoothing factor the same way pandas does (via centre of mass)."""
+    if (span is None) == (alpha is None):
+        raise ValueError("Exactly one of span or alpha must be given")
+    if span is not None:
+        if span < 1:
+            raise ValueError("span must satisfy span >= 1")
+        com = (span - 1) / 2.0
+    else:
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must satisfy 0 < alpha <= 1")
+        com = (1 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+class Indicator:
+    """Base class for streaming indicators."""
+
+    def __init__(self):
+        self.value = NAN
+
+    @property
+    def ready(self) -> bool:
+        """Whether the indicator has produced a non-NaN value."""
+        return not math.isnan(self.value)
+
+    def update(self, *args: float) -> float:
+        raise NotImplementedError
+
+    def reset(self):
+        """Drop all accumulated state."""
+        self.__init__(**self._params())
+
+    def _params(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """Simple moving average, equivalent to ``Series.rolling(window).mean()``."""
+
+    def __init__(self, window: int, min_periods: Optional[int] = None):
+        super().__init__()
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self._values: Deque[float] = deque()
+        self._nobs = 0
+        self._sum = 0.0
+        self._neg_ct = 0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same_count = 0
+        self._prev = NAN
+
+    def _params(self) -> Dict[str, Any]:
+        return {'window': self.window, 'min_periods': self.min_periods}
+
+    def _add(self, val: float):
+        if val != val:
+            return
+        self._nobs += 1
+        y = val - self._comp_add
+        t = self._sum + y
+        self._comp_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg_ct += 1
+        if val == self._prev:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev = val
+
+    def _remove(self, val: float):
+        if val != val:
+            return
+        self._nobs -= 1
+        y = -val - self._comp_remove
+        t = self._sum + y
+        self._comp_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, val) < 0:
+            self._neg_ct -= 1
+
+    def update(self, x: float) -> float:
+        """Add an observation and return the current average."""
+        x = float(x)
+        if self.window == 1:
+            # pandas re-seeds the accumulator when consecutive windows don't overlap
+            self.__init__(**self._params())
+        self._values.append(x)
+        if len(self._values) > self.window:
+            self._remove(self._values.popleft())
+        self._add(x)
+
+        nobs = self._nobs
+        if nobs >= self.min_periods and nobs > 0:
+            result = self._sum / nobs
+            if self._same_count >= nobs:
+                result = self._prev
+            elif self._neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self._neg_ct == nobs and result > 0:
+                result = 0.0
+        else:
+            result = NAN
+        self.value = result
+        return result
+
+
+class RollingStd(Indicator):
+    """Rolling standard deviation, equivalent to ``Series.rolling(window).std(ddof)``."""
+
+    def __init__(self, window: int, ddof: int = 1, min_periods: Optional[int] = None):
+        super().__init__()
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.window = window
+        self.ddof = ddof
+        self.min_periods = window if min_periods is None else min_periods
+        self._values: Deque[float] = deque()
+        self._nobs = 0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same_count = 0
+        self._prev = NAN
+
+    def _params(self) -> Dict[str, Any]:
+        return {'window': self.window, 'ddof': self.ddof, 'min_periods': self.min_periods}
+
+    def _add(self, val: float):
+        if val != val:
+            return
+        self._nobs += 1
+        if val == self._prev:
+            self._same_count += 1
+        else:
+            self._same_count = 1
+        self._prev = val
+        # Welford's method with Kahan compensation, as in pandas' add_var
+        prev_mean = self._mean - self._comp_add
+        y = val - self._comp_add
+        t = y - self._mean
+        self._comp_add = t + self._mean - y
+        if self._nobs:
+            self._mean = self._mean + t / self._nobs
+        else:
+            self._mean = 0.0
+        self._ssqdm = self._ssqdm + (val - prev_mean) * (val - self._mean)
+
+    def _remove(self, val: float):
+        if val != val:
+            return
+        self._nobs -= 1
+        if self._nobs:
+            prev_mean = self._mean - self._comp_remove
+            y = val - self._comp_remove
+            t = y - self._mean
+            self._comp_remove = t + self._mean - y
+            self._mean = self._mean - t / self._nobs
+            self._ssqdm = self._ssqdm - (val - prev_mean) * (val - self._mean)
+        else:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+
+    def update(self, x: float) -> float:
+        """Add an observation and return the current standard deviation."""
+        x = float(x)
+        if self.window == 1:
+            self.__init__(**self._params())
+        self._values.append(x)
+        if len(self._values) > self.window:
+            self._remove(self._values.popleft())
+        self._add(x)
+
+        nobs = self._nobs
+        if nobs >= self.min_periods and nobs > self.ddof:
+            if nobs == 1 or self._same_count >= nobs:
+                var = 0.0
+            else:
+                var = self._ssqdm / (nobs - self.ddof)
+        else:
+            var = NAN
+        if var != var:
+            result = NAN
+        else:
+            result = math.sqrt(var) if var > 0 else 0.0
+        self.value = result
+        return result
+
+
+class EMA(Indicator):
+    """Exponential moving average, equivalent to ``Series.ewm(..., adjust=False).mean()``."""
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None,
+                 min_periods: int = 0):
+        super().__init__()
+        self.span = span
+        self.input_alpha = alpha
+        self.alpha = _ewm_alpha(span, alpha)
+        self.min_periods = max(min_periods, 1)
+        self._old_wt_factor = 1.0 - self.alpha
+        self._weighted = NAN
+        self._old_wt = 1.0
+        self._nobs = 0
+        self._started = False
+
+    def _params(self) -> Dict[str, Any]:
+        return {'span': self.span, 'alpha': self.input_alpha, 'min_periods': self.min_periods}
+
+    def update(self, x: float) -> float:
+        """Add an observation and return the current average."""
+        cur = float(x)
+        is_observation = cur == cur
+        self._nobs += is_observation
+        weighted = self._weighted
+        if not self._started:
+            self._started = True
+            weighted = cur
+            self._old_wt = 1.0
+        elif weighted == weighted:
+            self._old_wt *= self._old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = self._old_wt * weighted + self.alpha * cur
+                    weighted /= (self._old_wt + self.alpha)
+                self._old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        self._weighted = weighted
+        self.value = weighted if self._nobs >= self.min_periods else NAN
+        return self.value
+
+
+class VWAP(Indicator):
+    """Cumulative volume weighted average price."""
+
+    def __init__(self):
+        super().__init__()
+        self._cum_pv = 0.0
+        self._cum_volume = 0.0
+
+    def _params(self) -> Dict[str, Any]:
+        return {}
+
+    def update(self, price: float, volume: float) -> float:
+        """Add a trade (or bar typical price) and return the running VWAP."""
+        self._cum_pv += float(price) * float(volume)
+        self._cum_volume += float(volume)
+        self.value = self._cum_pv / self._cum_volume if self._cum_volume else NAN
+        return self.value
+
+
+class ATR(Indicator):
+    """Average true range using Wilder smoothing (``ewm(alpha=1/window, adjust=False)``)."""
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self._ema = EMA(alpha=1.0 / window)
+        self._prev_close = NAN
+
+    def _params(self) -> Dict[str, Any]:
+        return {'window': self.window}
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """Add a bar and return the current ATR."""
+        high, low, close = float(high), float(low), float(close)
+        true_range = high - low
+        if self._prev_close == self._prev_close:
+            true_range = max(true_range, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        self.value = self._ema.update(true_range)
+        return self.value
+
+
+class RSI(Indicator):
+    """Relative strength index using Wilder smoothing."""
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self._gain = EMA(alpha=1.0 / window, min_periods=window)
+        self._loss = EMA(alpha=1.0 / window, min_periods=window)
+        self._prev_close = NAN
+
+    def _params(self) -> Dict[str, Any]:
+        return {'window': self.window}
+
+    def update(self, close: float) -> float:
+        """Add a closing price and return the current RSI."""
+        close = float(close)
+        delta = close - self._prev_close
+        self._prev_close = close
+        if delta != delta:
+            gain = loss = NAN
+        else:
+            gain = max(delta, 0.0)
+            loss = max(-delta, 0.0)
+        avg_gain = self._gain.update(gain)
+        avg_loss = self._loss.update(loss)
+        self.value = _rsi_from_averages(avg_gain, avg_loss)
+        return self.value
+
+
+def _rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    """Apply ``100 - 100 / (1 + gain / loss)`` with numpy division semantics."""
+    if avg_gain != avg_gain or avg_loss != avg_loss:
+        return NAN
+    if avg_loss == 0:
+        if avg_gain == 0:
+            return NAN
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+# Batch equivalents. These are the reference implementations the streaming
+# classes above are tested against.
+
+def sma(series: pd.Series, window: int) -> pd.Series:
+    """Simple moving average over a full series."""
+    return series.rolling(window=window).mean()
+
+
+def rolling_std(series: pd.Series, window: int, ddof: int = 1) -> pd.Series:
+    """Rolling standard deviation over a full series."""
+    return series.rolling(window=window).std(ddof=ddof)
+
+
+def ema(series: pd.Series, span: Optional[float] = None, alpha: Optional[float] = None,
+        min_periods: int = 0) -> pd.Series:
+    """Exponential moving average over a full series."""
+    return series.ewm(span=span, alpha=alpha, min_periods=min_periods, adjust=False).mean()
+
+
+def vwap(price: pd.Series, volume: pd.Series) -> pd.Series:
+    """Cumulative volume weighted average price over a full series."""
+    return (price * volume).cumsum() / volume.cumsum()
+
+
+def atr(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> pd.Series:
+    """Average true range over a full series."""
+    prev_close = close.shift()
+    true_range = pd.concat(
+        [high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1
+    ).max(axis=1)
+    return ema(true_range, alpha=1.0 / window)
+
+
+def rsi(close: pd.Series, window: int = 14) -> pd.Series:
+    """Relative strength index over a full series."""
+    delta = close.diff()
+    avg_gain = ema(delta.clip(lower=0), alpha=1.0 / window, min_periods=window)
+    avg_loss = ema(-delta.clip(upper=0), alpha=1.0 / window, min_periods=window)
+    return pd.Series(
+        [_rsi_from_averages(g, l) for g, l in zip(avg_gain.to_numpy(), avg_loss.to_numpy())],
+        index=close.index,
+        dtype='float64',
+    )
+
+
+class BarIndicators:
+    """Streaming version of the columns ``MarketDataService.process_raw_data`` adds.
+
+    The moving average columns are named after the window (``sma_20`` and
+    ``ema_20`` for the default of 20); ``columns`` lists them.
+    """
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.columns = self.column_names(window)
+        self.sma = SMA(window)
+        self.ema = EMA(span=window)
+        self.volume_ma = SMA(window)
+
+    @staticmethod
+    def column_names(window: int) -> Tuple[str, str, str]:
+        return f'sma_{window}', f'ema_{window}', 'volume_ma'
+
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """Feed one OHLCV bar and return the indicator values for it."""
+        sma_column, ema_column, volume_column = self.columns
+        return {
+            sma_column: self.sma.update(bar['close']),
+            ema_column: self.ema.update(bar['close']),
+            volume_column: self.volume_ma.update(bar['volume']),
+        }
+
+    @staticmethod
+    def apply(df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
+        """Compute the same columns over a whole frame, returning a new frame."""
+        sma_column, ema_column, volume_column = BarIndicators.column_names(window)
+        return df.assign(**{
+            sma_column: sma(df['close'], window),
+            ema_column: ema(df['close'], span=window),
+            volume_column: sma(df['volume'], window),
+        })
@@ -1,34 +1,161 @@
 """Market data acquisition and processing module."""
-from typing import Dict, List, Optional
-import ccxt
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import pandas as pd
 from datetime import datetime
+from src.data.bar_store import BarStore
+from src.data.indicators import BarIndicators
+from src.data.order_book import BookSequenceError, L2Book
+from src.utils.rate_limit import AsyncTokenBucket
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class _CachedBars:
+    __slots__ = ('rows', 'fetched_at')
+
+    def __init__(self, rows: List[List[float]], fetched_at: float):
+        self.rows = rows
+        self.fetched_at = fetched_at
+
 
 class MarketDataService:
-    def __init__(self, exchange_id: str = 'binance'):
-        self.exchange = getattr(ccxt, exchange_id)()
-        
+    """Async market data client with an incremental OHLCV cache.
+
+    Bars are cached per ``(symbol, timeframe)`` in an LRU of ``cache_size``
+    entries. While an entry is younger than ``cache_ttl`` seconds only bars
+    from the cached tail onwards are requested; older entries are refetched
+    in full. Requests are throttled with a client-side token bucket instead
+    of ccxt's sleeping rate limiter.
+    """
+
+    def __init__(self, exchange_id: str = 'binance', bar_store: Optional[BarStore] = None,
+                 exchange: Any = None, cache_ttl: float = 300.0, cache_size: int = 256,
+                 max_bars: int = 5000, max_concurrency: int = 8,
+                 rate_limiter: Optional[AsyncTokenBucket] = None):
+        if exchange is None:
+            # ccxt takes ~0.5s to import; only pay for it when talking to a real exchange
+            import ccxt.async_support as ccxt_async
+            exchange = getattr(ccxt_async, exchange_id)({'enableRateLimit': False})
+        self.exchange = exchange
+        self.bar_store = bar_store
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.max_bars = max_bars
+        self.rate_limiter = rate_limiter or AsyncTokenBucket.for_exchange(exchange, burst=max_concurrency)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: 'OrderedDict[Tuple[str, str], _CachedBars]' = OrderedDict()
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.order_books: Dict[str, L2Book] = {}
+
+    async def __aenter__(self) -> 'MarketDataService':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Release the exchange's HTTP session."""
+        await self.exchange.close()
+
+    async def _request(self, method: str, *args, **kwargs) -> Any:
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            return await getattr(self.exchange, method)(*args, **kwargs)
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[_CachedBars]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.fetched_at > self.cache_ttl:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _cache_put(self, key: Tuple[str, str], rows: List[List[float]]):
+        self._cache[key] = _CachedBars(rows[-self.max_bars:], time.monotonic())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Drop cached bars, optionally only for one symbol and/or timeframe."""
+        for key in list(self._cache):
+            if (symbol is None or key[0] == symbol) and (timeframe is None or key[1] == timeframe):
+                del self._cache[key]
+
     async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> pd.DataFrame:
         """Fetch OHLCV (Open, High, Low, Close, Volume) data."""
+        key = (symbol, timeframe)
+        lock = self._locks.setdefault(key, asyncio.Lock())
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            async with lock:
+                entry = self._cache_get(key)
+                if entry is not None and len(entry.rows) >= limit:
+                    # The cached tail bar may still have been forming, so refetch from it
+                    since = int(entry.rows[-1][0])
+                    fresh = await self._request('fetch_ohlcv', symbol, timeframe, since=since)
+                    rows = ([row for row in entry.rows if row[0] < since] + fresh) if fresh else entry.rows
+                else:
+                    fresh = rows = await self._request('fetch_ohlcv', symbol, timeframe, limit=limit)
+                self._cache_put(key, rows)
         except Exception as e:
             raise Exception(f"Error fetching market data: {str(e)}")
 
+        if self.bar_store is not None and len(fresh) > 1:
+            # The newest bar may still be forming; only persist bars known to be complete
+            self.bar_store.append(symbol, self._to_frame(fresh[:-1]), timeframe=timeframe)
+        return self._to_frame(rows[-limit:])
+
+    async def fetch_many(self, symbols: Sequence[str], timeframe: str = '1m',
+                         limit: int = 100) -> Dict[str, pd.DataFrame]:
+        """Fetch OHLCV data for several symbols concurrently."""
+        frames = await asyncio.gather(*(self.fetch_ohlcv(symbol, timeframe, limit) for symbol in symbols))
+        return dict(zip(symbols, frames))
+
+    @staticmethod
+    def _to_frame(rows: List[List[float]]) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df
+
     async def fetch_orderbook(self, symbol: str, limit: int = 20) -> Dict:
         """Fetch current orderbook."""
         try:
-            return self.exchange.fetch_order_book(symbol, limit=limit)
+            return await self._request('fetch_order_book', symbol, limit=limit)
         except Exception as e:
             raise Exception(f"Error fetching orderbook: {str(e)}")
 
+    async def sync_order_book(self, symbol: str, limit: int = 100) -> L2Book:
+        """Load (or reload) the L2 book for a symbol from an exchange snapshot."""
+        snapshot = await self.fetch_orderbook(symbol, limit=limit)
+        book = self.order_books.get(symbol)
+        if book is None:
+            book = self.order_books[symbol] = L2Book(symbol)
+        book.apply_snapshot(snapshot['bids'], snapshot['asks'],
+                            snapshot.get('nonce'), snapshot.get('timestamp'))
+        return book
+
+    async def apply_order_book_delta(self, symbol: str, delta: Dict[str, Any]) -> L2Book:
+        """Apply an incremental book update, resyncing from a snapshot on a sequence gap."""
+        book = self.order_books.get(symbol)
+        if book is None:
+            return await self.sync_order_book(symbol)
+        try:
+            book.apply_delta(delta.get('bids', ()), delta.get('asks', ()),
+                             delta.get('sequence'), delta.get('timestamp'))
+        except BookSequenceError:
+            return await self.sync_order_book(symbol)
+        return book
+
     def process_raw_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Process raw market data."""
-        # Add basic technical indicators
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['ema_20'] = df['close'].ewm(span=20, adjust=False).mean()
-        df['volume_ma'] = df['volume'].rolling(window=20).mean()
-        return df
+        """Process raw market data.
+
+        Returns a new frame with basic technical indicators; the input is left
+        untouched. Live consumers should feed bars through ``BarIndicators.update``
+        instead, which yields identical values without recomputing the history.
+        """
+        return BarIndicators.apply(df)
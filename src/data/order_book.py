@@ -0,0 +1,165 @@
+"""Level-2 order books maintained from snapshots and incremental deltas."""
+import json
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+BID = 'bids'
+ASK = 'asks'
+
+Level = Tuple[float, float]
+
+
+class BookSequenceError(Exception):
+    """Raised when a delta does not follow the book's last sequence number."""
+
+
+class L2Book:
+    """Price-level book kept as sorted parallel arrays per side.
+
+    Each side stores sort keys ascending with the best level last (bids are
+    keyed by price, asks by negated price), so the top of book, any level by
+    index and the microprice are O(1), and the frequent updates near the
+    touch only shift a handful of elements.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.sequence: Optional[int] = None
+        self.timestamp: Optional[int] = None
+        self._keys: Dict[str, List[float]] = {BID: [], ASK: []}
+        self._sizes: Dict[str, List[float]] = {BID: [], ASK: []}
+
+    @staticmethod
+    def _key(side: str, price: float) -> float:
+        return price if side == BID else -price
+
+    @staticmethod
+    def _price(side: str, key: float) -> float:
+        return key if side == BID else -key
+
+    def apply_snapshot(self, bids: Iterable[Sequence[float]], asks: Iterable[Sequence[float]],
+                       sequence: Optional[int] = None, timestamp: Optional[int] = None):
+        """Replace the whole book, e.g. from a ccxt ``fetch_order_book`` result."""
+        for side, levels in ((BID, bids), (ASK, asks)):
+            ordered = sorted((self._key(side, float(level[0])), float(level[1]))
+                             for level in levels if level[1] > 0)
+            self._keys[side] = [key for key, _ in ordered]
+            self._sizes[side] = [size for _, size in ordered]
+        self.sequence = sequence
+        self.timestamp = timestamp
+
+    def update_level(self, side: str, price: float, size: float):
+        """Set the size resting at a price; a size of zero removes the level."""
+        keys, sizes = self._keys[side], self._sizes[side]
+        key = self._key(side, float(price))
+        i = bisect_left(keys, key)
+        exists = i < len(keys) and keys[i] == key
+        if size > 0:
+            if exists:
+                sizes[i] = float(size)
+            else:
+                keys.insert(i, key)
+                sizes.insert(i, float(size))
+        elif exists:
+            del keys[i]
+            del sizes[i]
+
+    def apply_delta(self, bids: Iterable[Sequence[float]] = (), asks: Iterable[Sequence[float]] = (),
+                    sequence: Optional[int] = None, timestamp: Optional[int] = None):
+        """Apply an incremental update.
+
+        When both the book and the delta carry sequence numbers the delta must
+        be the next one; otherwise ``BookSequenceError`` is raised and the book
+        should be resynchronised from a fresh snapshot.
+        """
+        if sequence is not None and self.sequence is not None:
+            if sequence <= self.sequence:
+                return  # already applied
+            if sequence != self.sequence + 1:
+                raise BookSequenceError(
+                    f"{self.symbol}: expected sequence {self.sequence + 1}, got {sequence}"
+                )
+        for price, size in bids:
+            self.update_level(BID, price, size)
+        for price, size in asks:
+            self.update_level(ASK, price, size)
+        if sequence is not None:
+            self.sequence = sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+    # Queries
+
+    def levels(self, side: str) -> int:
+        """Number of price levels on a side."""
+        return len(self._keys[side])
+
+    def level(self, side: str, n: int = 0) -> Optional[Level]:
+        """Return ``(price, size)`` of the n-th best level (0 is the touch)."""
+        keys = self._keys[side]
+        if n >= len(keys):
+            return None
+        i = len(keys) - 1 - n
+        return self._price(side, keys[i]), self._sizes[side][i]
+
+    @property
+    def best_bid(self) -> Optional[Level]:
+        return self.level(BID)
+
+    @property
+    def best_ask(self) -> Optional[Level]:
+        return self.level(ASK)
+
+    @property
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    @property
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    @property
+    def microprice(self) -> Optional[float]:
+        """Touch prices weighted by the opposite side's size."""
+        bid, ask = self.best_bid, self.best_ask
+        if bid is None or ask is None:
+            return None
+        return (bid[0] * ask[1] + ask[0] * bid[1]) / (bid[1] + ask[1])
+
+    def depth(self, side: str, n: int) -> List[Level]:
+        """Return the best ``n`` levels of a side, best first."""
+        keys, sizes = self._keys[side], self._sizes[side]
+        start = max(len(keys) - n, 0)
+        return [(self._price(side, keys[i]), sizes[i]) for i in range(len(keys) - 1, start - 1, -1)]
+
+    def size_at_depth(self, side: str, n: int) -> float:
+        """Total size resting in the best ``n`` levels of a side."""
+        sizes = self._sizes[side]
+        return sum(sizes[max(len(sizes) - n, 0):])
+
+    def to_dict(self, depth: Optional[int] = None) -> Dict[str, Any]:
+        """Snapshot in the ccxt order book layout."""
+        n = depth if depth is not None else max(self.levels(BID), self.levels(ASK))
+        return {
+            'symbol': self.symbol,
+            'bids': [list(level) for level in self.depth(BID, n)],
+            'asks': [list(level) for level in self.depth(ASK, n)],
+            'timestamp': self.timestamp,
+            'nonce': self.sequence,
+        }
+
+
+def publish_snapshot(redis_client: Any, book: L2Book, depth: int = 20):
+    """Publish a book snapshot on ``orderbook:<symbol>`` and keep the latest under the same key."""
+    key = f"orderbook:{book.symbol}"
+    payload = json.dumps(book.to_dict(depth))
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(key, payload)
+    pipe.publish(key, payload)
+    pipe.execute()
@@ -0,0 +1,185 @@
+"""Offline stand-in for an async ccxt exchange, replaying recorded or synthetic bars."""
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.data.bar_store import BarStore
+
+TIMEFRAME_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """Convert a ccxt timeframe string such as ``'5m'`` to milliseconds."""
+    return int(timeframe[:-1]) * TIMEFRAME_SECONDS[timeframe[-1]] * 1000
+
+
+class ReplayExchange:
+    """Serves OHLCV history through the subset of the ccxt async API we use.
+
+    Only the first ``visible`` bars of each series are exposed; ``advance``
+    reveals more, which is how tests and backtests simulate the passage of
+    time. Every request is recorded in ``calls``.
+    """
+
+    id = 'replay'
+    rateLimit = 50
+
+    def __init__(self, bars: Dict[str, List[List[float]]], timeframe: str = '1m',
+                 visible: Optional[int] = None, latency: float = 0.0):
+        self.timeframe = timeframe
+        self.latency = latency
+        self._bars = {symbol: rows for symbol, rows in bars.items()}
+        self._visible = {
+            symbol: len(rows) if visible is None else min(visible, len(rows))
+            for symbol, rows in self._bars.items()
+        }
+        self.calls: List[Dict[str, Any]] = []
+        self.closed = False
+
+    @classmethod
+    def synthetic(cls, symbols: Sequence[str], periods: int = 1000, timeframe: str = '1m',
+                  start_ms: int = 1_704_067_200_000, seed: int = 0, **kwargs) -> 'ReplayExchange':
+        """Build a replay of geometric random walk bars for the given symbols."""
+        rng = np.random.default_rng(seed)
+        step = timeframe_to_ms(timeframe)
+        timestamps = start_ms + step * np.arange(periods)
+        bars = {}
+        for symbol in symbols:
+            close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.001, periods)))
+            open_ = np.concatenate(([close[0]], close[:-1]))
+            spread = np.abs(rng.normal(0, 0.0005, periods)) * close
+            high = np.maximum(open_, close) + spread
+            low = np.minimum(open_, close) - spread
+            volume = rng.exponential(10.0, periods)
+            bars[symbol] = np.column_stack((timestamps, open_, high, low, close, volume)).tolist()
+        return cls(bars, timeframe=timeframe, **kwargs)
+
+    @classmethod
+    def from_bar_store(cls, store: BarStore, symbols: Sequence[str], timeframe: str = '1m',
+                       **kwargs) -> 'ReplayExchange':
+        """Build a replay from history already recorded in a bar store."""
+        bars = {}
+        for symbol in symbols:
+            data = store.read(symbol, timeframe=timeframe)
+            bars[symbol] = np.column_stack((
+                data['timestamp'] // 1_000_000, data['open'], data['high'],
+                data['low'], data['close'], data['volume']
+            )).tolist()
+        return cls(bars, timeframe=timeframe, **kwargs)
+
+    def advance(self, bars: int = 1):
+        """Reveal the next ``bars`` bars of every series."""
+        for symbol, rows in self._bars.items():
+            self._visible[symbol] = min(self._visible[symbol] + bars, len(rows))
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Optional[Dict] = None) -> List[List[float]]:
+        self.calls.append({'method': 'fetch_ohlcv', 'symbol': symbol, 'timeframe': timeframe,
+                           'since': since, 'limit': limit})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if symbol not in self._bars:
+            raise ValueError(f"Unknown symbol {symbol}")
+        if timeframe != self.timeframe:
+            raise ValueError(f"Replay only serves {self.timeframe} bars")
+        rows = self._bars[symbol][:self._visible[symbol]]
+        if since is not None:
+            rows = [row for row in rows if row[0] >= since]
+            return [list(row) for row in rows[:limit]] if limit else [list(row) for row in rows]
+        return [list(row) for row in (rows[-limit:] if limit else rows)]
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None,
+                               params: Optional[Dict] = None) -> Dict[str, Any]:
+        self.calls.append({'method': 'fetch_order_book', 'symbol': symbol, 'limit': limit})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        last = self._bars[symbol][self._visible[symbol] - 1]
+        close = last[4]
+        depth = limit or 20
+        tick = close * 0.0001
+        return {
+            'symbol': symbol,
+            'bids': [[close - tick * (i + 1), 1.0 + i] for i in range(depth)],
+            'asks': [[close + tick * (i + 1), 1.0 + i] for i in range(depth)],
+            'timestamp': int(last[0]),
+            'nonce': self._visible[symbol],
+        }
+
+    async def close(self):
+        self.closed = True
+
+
+class SyntheticBookFeed:
+    """Deterministic L2 snapshot and delta stream for building and benchmarking books offline.
+
+    The feed keeps its own reference book so every delta it emits is valid
+    (levels never cross) and tests can compare a rebuilt book against it.
+    """
+
+    def __init__(self, symbol: str, mid: float = 100.0, tick: float = 0.01,
+                 levels: int = 50, seed: int = 0):
+        self.symbol = symbol
+        self.tick = tick
+        self.rng = np.random.default_rng(seed)
+        self.sequence = 0
+        mid_ticks = int(round(mid / tick))
+        self.bids: Dict[int, float] = {mid_ticks - i - 1: self._size() for i in range(levels)}
+        self.asks: Dict[int, float] = {mid_ticks + i + 1: self._size() for i in range(levels)}
+
+    def _size(self) -> float:
+        return float(np.round(self.rng.exponential(10.0) + 0.01, 2))
+
+    def _price(self, ticks: int) -> float:
+        return round(ticks * self.tick, 10)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full book in the ccxt layout, best levels first."""
+        return {
+            'symbol': self.symbol,
+            'bids': [[self._price(t), self.bids[t]] for t in sorted(self.bids, reverse=True)],
+            'asks': [[self._price(t), self.asks[t]] for t in sorted(self.asks)],
+            'timestamp': None,
+            'nonce': self.sequence,
+        }
+
+    def next_delta(self) -> Dict[str, Any]:
+        """Generate the next incremental update and apply it to the reference book."""
+        is_bid = bool(self.rng.random() < 0.5)
+        book = self.bids if is_bid else self.asks
+        best_bid, best_ask = max(self.bids), min(self.asks)
+        touch = best_bid if is_bid else best_ask
+        away = -1 if is_bid else 1
+        action = self.rng.random()
+        if action < 0.7 or len(book) < 2:
+            # Resize one of the levels close to the touch
+            ticks = touch + away * int(self.rng.integers(0, 5))
+            size = self._size()
+        elif action < 0.85:
+            ticks = touch  # the touch is consumed
+            size = 0.0
+        else:
+            # New level, possibly improving the touch without crossing
+            offset = int(self.rng.integers(-2, 6))
+            ticks = touch + away * offset
+            if is_bid:
+                ticks = min(ticks, best_ask - 1)
+            else:
+                ticks = max(ticks, best_bid + 1)
+            size = self._size()
+        if size > 0:
+            book[ticks] = size
+        else:
+            book.pop(ticks, None)
+        self.sequence += 1
+        level = [[self._price(ticks), size]]
+        return {
+            'symbol': self.symbol,
+            'sequence': self.sequence,
+            'bids': level if is_bid else [],
+            'asks': [] if is_bid else level,
+        }
+
+    def deltas(self, count: int) -> List[Dict[str, Any]]:
+        """Generate ``count`` consecutive deltas."""
+        return [self.next_delta() for _ in range(count)]
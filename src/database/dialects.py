@@ -0,0 +1,15 @@
+"""Dialect-specific SQL constructs shared by the batch writers."""
+from typing import Any
+from sqlalchemy.orm import Session
+
+
+def insert_for(db: Session, table: Any) -> Any:
+    """An INSERT on ``table`` supporting ``on_conflict_do_*`` for the session's database."""
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise Exception(f"Error building upsert: unsupported database {dialect}")
+    return insert(table)
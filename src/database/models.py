@@ -1,7 +1,7 @@
 """Database models for the trading system."""
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON
 from sqlalchemy.orm import declarative_base, relationship
 import enum
 
@@ -139,3 +139,14 @@ class Order(Base):
     account = relationship("Account", back_populates="orders")
     instrument = relationship("Instrument", back_populates="orders")
     contract = relationship("FuturesContract")
+
+class OrderEvent(Base):
+    """Outbox of order state changes; mirrors ``src.database.models.order.OrderEvent``."""
+    __tablename__ = "order_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    type = Column(String(32), nullable=False)
+    order_id = Column(Integer, nullable=False)
+    account_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,5 +1,5 @@
 """Account and position models for the trading system."""
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Numeric, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Numeric, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -23,6 +23,9 @@ class Account(Base):
 
 class Position(Base):
     __tablename__ = 'positions'
+    __table_args__ = (
+        UniqueConstraint('account_id', 'instrument_id', name='uq_positions_account_instrument'),
+    )
     
     id = Column(Integer, primary_key=True)
     account_id = Column(Integer, ForeignKey('accounts.id'), nullable=False)
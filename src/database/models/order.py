@@ -1,9 +1,14 @@
 """Order and trade models for the trading system."""
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Numeric
+from sqlalchemy import (
+    BigInteger, Column, Integer, String, Float, DateTime, ForeignKey, Enum, JSON, Numeric, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base, OrderType, OrderSide, OrderStatus
 
+# In PostgreSQL both tables are partitioned by month on their timestamp
+# (see src/database/partitions.py), so their primary keys there are
+# (id, created_at) and (id, executed_at); ids stay unique through the sequence.
 class Order(Base):
     __tablename__ = 'orders'
     
@@ -16,7 +21,7 @@ class Order(Base):
     quantity = Column(Numeric(20, 8), nullable=False)
     filled_quantity = Column(Numeric(20, 8), default=0)
     price = Column(Numeric(20, 8))  # Limit price or stop price
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -26,17 +31,52 @@ class Order(Base):
 
 class Trade(Base):
     __tablename__ = 'trades'
+    __table_args__ = (
+        # Set by the trade journal. Unique keys of a partitioned table must
+        # include its partition column, so a fill_id alone is kept unique by
+        # trade_fills.
+        UniqueConstraint('fill_id', 'executed_at', name='uq_trades_fill_id'),
+    )
     
     id = Column(Integer, primary_key=True)
+    fill_id = Column(String(64))
+    # Not enforced in PostgreSQL, which cannot reference the partitioned orders by id alone
     order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
     account_id = Column(Integer, ForeignKey('accounts.id'), nullable=False)
     instrument_id = Column(Integer, ForeignKey('instruments.id'), nullable=False)
     quantity = Column(Numeric(20, 8), nullable=False)
     price = Column(Numeric(20, 8), nullable=False)
     side = Column(Enum(OrderSide), nullable=False)
-    executed_at = Column(DateTime, default=datetime.utcnow)
+    executed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     
     # Relationships
     order = relationship('Order', back_populates='trades')
     account = relationship('Account', back_populates='trades')
     instrument = relationship('Instrument', back_populates='trades')
+
+class TradeFill(Base):
+    """The fill id of every stored trade, unpartitioned so each fill is stored once.
+
+    The trade journal claims a fill here in the transaction that inserts its
+    trade, so a fill replayed or redelivered with another ``executed_at`` is
+    skipped; ``executed_at`` locates the trade's partition.
+    """
+    __tablename__ = 'trade_fills'
+
+    fill_id = Column(String(64), primary_key=True)
+    executed_at = Column(DateTime, nullable=False, index=True)
+
+class OrderEvent(Base):
+    """Order state change written in the transaction that made it (transactional outbox).
+
+    Rows are relayed to the order events stream and deleted; see
+    ``src/execution/order_events.py``.
+    """
+    __tablename__ = 'order_events'
+    
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True)
+    type = Column(String(32), nullable=False)
+    order_id = Column(Integer, nullable=False)
+    account_id = Column(Integer, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
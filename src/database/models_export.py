@@ -1,33 +1,57 @@
 """
 Export database models for easier imports.
 This file helps avoid circular imports by providing a single import point.
+
+``src/database/models.py`` is shadowed by the ``src.database.models``
+package, so it is loaded from its path here, once per process, the first
+time any model is accessed. Every importer gets the same classes and the
+same declarative registry.
 """
-# Import from models.py
-from src.database.models import (
-    Base, 
-    FinancialModel, 
-    Strategy, 
-    Backtest, 
-    FuturesContract, 
-    Position, 
-    Order,
-    ModelStatus,
-    OrderType,
-    OrderSide,
-    OrderStatus
-)
+import importlib.util
+import os
+import sys
+import threading
+from types import ModuleType
+
+MODULE_NAME = 'src.database.api_models'
+_lock = threading.Lock()
 
-# Make all these available for import from this module
 __all__ = [
-    'Base', 
-    'FinancialModel', 
-    'Strategy', 
-    'Backtest', 
-    'FuturesContract', 
-    'Position', 
+    'Base',
+    'FinancialModel',
+    'Strategy',
+    'Backtest',
+    'Account',
+    'Instrument',
+    'FuturesContract',
+    'Position',
     'Order',
+    'OrderEvent',
     'ModelStatus',
     'OrderType',
     'OrderSide',
     'OrderStatus'
 ]
+
+
+def load_models() -> ModuleType:
+    """Load ``models.py`` on first use and return the cached module afterwards."""
+    module = sys.modules.get(MODULE_NAME)
+    if module is not None:
+        return module
+    with _lock:
+        module = sys.modules.get(MODULE_NAME)
+        if module is None:
+            path = os.path.join(os.path.dirname(__file__), 'models.py')
+            spec = importlib.util.spec_from_file_location(MODULE_NAME, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            # Only publish a fully executed module
+            sys.modules[MODULE_NAME] = module
+    return module
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return getattr(load_models(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
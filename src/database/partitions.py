@@ -0,0 +1,172 @@
+"""Monthly range partitions of the orders and trades tables, and their archival to Parquet.
+
+Both tables are partitioned by month on their timestamp column (see the
+``64452ee3c0ae`` migration), one child table per month named
+``<table>_<YYYY>_<MM>``. ``ensure_partitions`` creates the current month and
+the next few ahead of time, so inserts never fall into the default
+partition. ``archive_partitions`` exports months past the retention period
+to compressed Parquet and drops them, which keeps the hot tables, and their
+indexes, at a constant size. PostgreSQL only.
+"""
+import logging
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> the column it is partitioned on
+PARTITIONED_TABLES = {
+    'orders': 'created_at',
+    'trades': 'executed_at',
+}
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(table: str, name: str) -> Optional[date]:
+    """The month of a partition named by ``partition_name``; None for others (e.g. the default)."""
+    prefix = f"{table}_"
+    if not name.startswith(prefix):
+        return None
+    try:
+        year, month = name[len(prefix):].split('_')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month from ``first`` to ``last`` inclusive."""
+    months, month = [], month_start(first)
+    while month <= month_start(last):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def list_partitions(db: Session, table: str) -> Dict[date, str]:
+    """Monthly partitions currently attached to ``table``, by month."""
+    rows = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {'table': table}).scalars()
+    partitions = {}
+    for name in rows:
+        month = partition_month(table, name)
+        if month is not None:
+            partitions[month] = name
+    return partitions
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """Create any missing partition from this month to ``months_ahead`` months out; returns those created."""
+    current = month_start(today or datetime.utcnow().date())
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = list_partitions(db, table)
+        for month in months_between(current, add_months(current, months_ahead)):
+            if month not in existing:
+                db.execute(text(create_partition_sql(table, month)))
+                created.append(partition_name(table, month))
+    db.commit()
+    return created
+
+
+def export_parquet(db: Session, query: str, path: str, params: Optional[Dict[str, Any]] = None,
+                   chunk_rows: int = 50_000, compression: str = 'zstd') -> int:
+    """Stream the rows of ``query`` into a Parquet file; returns the row count.
+
+    Rows are fetched and written ``chunk_rows`` at a time, so memory stays
+    flat however large the result. Requires ``pyarrow``.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Error exporting to Parquet: pyarrow is not installed")
+
+    result = db.execute(text(query).execution_options(stream_results=True, max_row_buffer=chunk_rows),
+                        params or {})
+    columns = list(result.keys())
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial = f"{path}.partial"
+    writer = None
+    rows = 0
+    try:
+        for chunk in result.partitions(chunk_rows):
+            data = {column: [_parquet_value(row[i]) for row in chunk] for i, column in enumerate(columns)}
+            batch = pa.table(data)
+            if writer is None:
+                writer = pq.ParquetWriter(partial, batch.schema, compression=compression)
+            writer.write_table(batch.cast(writer.schema))
+            rows += len(chunk)
+        if writer is None:
+            # Empty result: still leave a file recording the columns
+            writer = pq.ParquetWriter(partial, pa.schema([(column, pa.null()) for column in columns]),
+                                      compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+    # Only a complete export appears under the final name
+    os.replace(partial, path)
+    return rows
+
+
+def _parquet_value(value: Any) -> Any:
+    # Enum columns come back as enum members from the ORM types; store their values
+    return getattr(value, 'value', value)
+
+
+def archive_partitions(db: Session, export_dir: str, retention_months: int = 12,
+                       today: Optional[date] = None) -> List[Tuple[str, int]]:
+    """Export partitions older than ``retention_months`` to Parquet, then drop them.
+
+    Each month goes to ``<export_dir>/<table>/<YYYY>-<MM>.parquet``. A
+    partition is only dropped after its file is complete and holds every
+    row; returns ``(partition, rows)`` for each one archived.
+    """
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -retention_months)
+    archived = []
+    for table in PARTITIONED_TABLES:
+        for month, name in sorted(list_partitions(db, table).items()):
+            if month >= cutoff:
+                continue
+            path = os.path.join(export_dir, table, f"{month.year:04d}-{month.month:02d}.parquet")
+            rows = export_parquet(db, f"SELECT * FROM {name} ORDER BY id", path)
+            count = db.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            if count != rows:
+                raise Exception(f"Error archiving {name}: exported {rows} of {count} rows")
+            db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            if table == 'trades':
+                # Fills that old are never replayed or redelivered
+                db.execute(text("DELETE FROM trade_fills WHERE executed_at >= :start AND executed_at < :end"),
+                           {'start': month, 'end': add_months(month, 1)})
+            db.commit()
+            logger.info(f"Archived {name} ({rows} rows) to {path}")
+            archived.append((name, rows))
+    return archived
@@ -0,0 +1,214 @@
+"""Order events: a transactional outbox relayed to a Redis Stream read through consumer groups.
+
+Code that changes an order calls ``record_order_event`` with the same
+session before committing, so the event exists exactly when the change
+does. ``OutboxRelay`` moves committed events, oldest first, onto the
+``order_events`` stream and deletes them from the outbox. A relay that dies
+between the two re-publishes its last batch, so delivery is at least once;
+consumers skip ``event_id``s they have already seen.
+
+Consumers read the stream in a group (``OrderEventConsumer``), which keeps
+each group's offset and its unacknowledged entries in Redis, or directly
+from a stream id they remember (the order updates websocket).
+"""
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from redis.exceptions import ResponseError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.database.models.order import OrderEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_STREAM = 'order_events'
+# Approximate cap on stream length; consumers further behind than this lose events
+STREAM_MAXLEN = 1_000_000
+
+ORDER_CREATED = 'order.created'
+ORDER_FILLED = 'order.filled'
+ORDER_CANCELLED = 'order.cancelled'
+ORDER_REJECTED = 'order.rejected'
+
+ORDER_FIELDS = ('id', 'account_id', 'instrument_id', 'type', 'side', 'status', 'quantity', 'price', 'created_at')
+
+StreamEntry = Tuple[str, Dict[str, Any]]
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    # Enums are stored by value, as the API returns them
+    return getattr(value, 'value', value)
+
+
+def order_snapshot(order: Any) -> Dict[str, Any]:
+    """The event fields of an order (of either the API or the worker models)."""
+    return {field: _json_value(getattr(order, field, None)) for field in ORDER_FIELDS}
+
+
+def record_order_event(db: Session, event_type: str, order: Any, **data: Any):
+    """Add an event for ``order`` to the outbox in the session's transaction.
+
+    The order must have its id (flush first for new orders). ``data`` adds
+    event-specific fields, e.g. the fill price.
+    """
+    record_order_events(db, event_type, [{**order_snapshot(order), **data}])
+
+
+def record_order_events(db: Session, event_type: str, snapshots: Iterable[Dict[str, Any]]):
+    """Add one event per order snapshot to the outbox, with a single INSERT."""
+    now = datetime.utcnow()
+    rows = [
+        {
+            'type': event_type,
+            'order_id': snapshot['id'],
+            'account_id': snapshot['account_id'],
+            'payload': {key: _json_value(value) for key, value in snapshot.items()},
+            'created_at': now,
+        }
+        for snapshot in snapshots
+    ]
+    if rows:
+        db.execute(OrderEvent.__table__.insert(), rows)
+
+
+def decode_event(fields: Dict[Any, Any]) -> Dict[str, Any]:
+    """An event as published by the relay, from its raw stream entry fields."""
+    fields = {
+        (key.decode('utf-8') if isinstance(key, bytes) else key): (
+            value.decode('utf-8') if isinstance(value, bytes) else value
+        )
+        for key, value in fields.items()
+    }
+    return {
+        'event_id': int(fields['event_id']),
+        'type': fields['type'],
+        'order_id': int(fields['order_id']),
+        'account_id': int(fields['account_id']),
+        'created_at': fields['created_at'],
+        'order': json.loads(fields['order']),
+    }
+
+
+def decode_entry_id(entry_id: Any) -> str:
+    """A stream entry id as text, as redis-py returns it as bytes."""
+    return entry_id.decode('utf-8') if isinstance(entry_id, bytes) else entry_id
+
+
+class OutboxRelay:
+    """Publishes outbox events to the order events stream in batches.
+
+    Each ``relay`` call claims up to ``batch_size`` of the oldest events with
+    ``FOR UPDATE SKIP LOCKED``, so several relays can run side by side,
+    XADDs them in one pipeline round trip, then deletes them. If Redis fails
+    the transaction rolls back and the events are retried on the next call.
+    With a single relay an order's events are published in the order they
+    happened, since each change to an order commits before the next starts;
+    events of different orders may interleave out of id order.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None,
+                 redis_client: Optional[Callable[[], Any]] = None, stream: str = ORDER_EVENTS_STREAM,
+                 batch_size: int = 500, maxlen: int = STREAM_MAXLEN):
+        if session_factory is None:
+            from src.database.session import SessionLocal
+            session_factory = SessionLocal
+        if redis_client is None:
+            from src.utils.redis_pool import get_redis
+            redis_client = get_redis
+        self.session_factory = session_factory
+        self.redis_client = redis_client
+        self.stream = stream
+        self.batch_size = batch_size
+        self.maxlen = maxlen
+
+    def relay(self) -> int:
+        """Publish one batch of events; returns how many were published."""
+        events = OrderEvent.__table__
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(events).order_by(events.c.id).limit(self.batch_size).with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                db.rollback()
+                return 0
+            pipe = self.redis_client().pipeline(transaction=False)
+            for row in rows:
+                pipe.xadd(self.stream, {
+                    'event_id': row.id,
+                    'type': row.type,
+                    'order_id': row.order_id,
+                    'account_id': row.account_id,
+                    'created_at': row.created_at.isoformat(),
+                    'order': json.dumps(row.payload),
+                }, maxlen=self.maxlen, approximate=True)
+            pipe.execute()
+            db.execute(events.delete().where(events.c.id.in_([row.id for row in rows])))
+            db.commit()
+            return len(rows)
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error relaying order events: {str(e)}")
+        finally:
+            db.close()
+
+
+class OrderEventConsumer:
+    """One consumer in a consumer group on the order events stream.
+
+    The group's offset lives in Redis, so a restarted consumer carries on
+    where its group left off. Entries are pending until ``ack``ed: ``read``
+    first returns this consumer's own unacknowledged entries (those it had
+    read before a crash), then new ones. ``claim_stale`` takes over the
+    pending entries of consumers that have gone away.
+    """
+
+    def __init__(self, group: str, consumer: str, redis_client: Optional[Callable[[], Any]] = None,
+                 stream: str = ORDER_EVENTS_STREAM):
+        if redis_client is None:
+            from src.utils.redis_pool import get_redis
+            redis_client = get_redis
+        self.group = group
+        self.consumer = consumer
+        self.redis_client = redis_client
+        self.stream = stream
+        # Position in this consumer's own pending entries; None once they are all re-read
+        self._pending_from: Optional[str] = '0'
+
+    def ensure_group(self, start_id: str = '0'):
+        """Create the group if needed, starting at ``start_id`` ('0' for the whole stream, '$' for new events)."""
+        try:
+            self.redis_client().xgroup_create(self.stream, self.group, id=start_id, mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def read(self, count: int = 100, block_ms: Optional[int] = 1000) -> List[StreamEntry]:
+        """The next entries for this consumer as ``(stream id, event)``."""
+        client = self.redis_client()
+        if self._pending_from is not None:
+            response = client.xreadgroup(self.group, self.consumer, {self.stream: self._pending_from}, count=count)
+            # Entries trimmed from the stream come back without fields
+            entries = response[0][1] if response else []
+            if entries:
+                self._pending_from = decode_entry_id(entries[-1][0])
+                return [(decode_entry_id(entry_id), decode_event(fields)) for entry_id, fields in entries if fields]
+            self._pending_from = None
+        response = client.xreadgroup(self.group, self.consumer, {self.stream: '>'}, count=count, block=block_ms)
+        entries = response[0][1] if response else []
+        return [(decode_entry_id(entry_id), decode_event(fields)) for entry_id, fields in entries]
+
+    def ack(self, *entry_ids: str) -> int:
+        return self.redis_client().xack(self.stream, self.group, *entry_ids) if entry_ids else 0
+
+    def claim_stale(self, min_idle_ms: int = 60_000, count: int = 100) -> List[StreamEntry]:
+        """Take over entries other consumers read but left unacknowledged for ``min_idle_ms``."""
+        response = self.redis_client().xautoclaim(self.stream, self.group, self.consumer, min_idle_ms,
+                                                  start_id='0-0', count=count)
+        return [(decode_entry_id(entry_id), decode_event(fields)) for entry_id, fields in response[1] if fields]
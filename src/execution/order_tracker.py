@@ -0,0 +1,167 @@
+"""Order state reconciliation from exchange execution reports."""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+from src.database.models.base import OrderStatus
+from src.database.models.order import Order
+from src.execution.trading_engine import TradingEngine
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED}
+
+_CCXT_STATUSES = {
+    'closed': OrderStatus.FILLED,
+    'canceled': OrderStatus.CANCELLED,
+    'cancelled': OrderStatus.CANCELLED,
+    'expired': OrderStatus.CANCELLED,
+    'rejected': OrderStatus.REJECTED,
+}
+
+
+def order_status(report: Dict[str, Any]) -> OrderStatus:
+    """Map a ccxt order structure to our order status."""
+    status = _CCXT_STATUSES.get(report.get('status'))
+    if status is not None:
+        return status
+    return OrderStatus.PARTIALLY_FILLED if (report.get('filled') or 0) > 0 else OrderStatus.PENDING
+
+
+class _WorkingOrder:
+    __slots__ = ('order_id', 'symbol', 'status', 'filled', 'timestamp')
+
+    def __init__(self, order_id: int, symbol: str, status: OrderStatus, filled: float, timestamp: Optional[int]):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.status = status
+        self.filled = filled
+        self.timestamp = timestamp
+
+
+class OrderTracker:
+    """Keeps working orders in memory and writes their status changes back in batches.
+
+    Execution reports arrive from the exchange's push stream (``run``) or
+    from ``poll``, which asks for many orders per request. Changes are
+    coalesced per order and written with a single executemany UPDATE on
+    ``flush``, every ``flush_interval`` seconds or ``batch_size`` changes.
+    """
+
+    def __init__(self, engine: TradingEngine, session_factory: Optional[Callable[[], Session]] = None,
+                 flush_interval: float = 0.5, batch_size: int = 500):
+        if session_factory is None:
+            from src.database.session import SessionLocal
+            session_factory = SessionLocal
+        self.engine = engine
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.working: Dict[str, _WorkingOrder] = {}
+        self._changes: Dict[int, Dict[str, Any]] = {}
+        self._last_flush = time.monotonic()
+
+    def track(self, order_id: int, exchange_order: Dict[str, Any]):
+        """Start tracking an order placed on the exchange for the given ``orders`` row."""
+        self.working[str(exchange_order['id'])] = _WorkingOrder(
+            order_id, exchange_order['symbol'], OrderStatus.PENDING, 0.0, exchange_order.get('timestamp')
+        )
+        self.on_execution_report(exchange_order)
+
+    def on_execution_report(self, report: Dict[str, Any]) -> bool:
+        """Apply one execution report; returns whether it changed the order."""
+        order = self.working.get(str(report.get('id')))
+        if order is None:
+            return False
+        status = order_status(report)
+        filled = float(report.get('filled') or 0.0)
+        if status == order.status and filled == order.filled:
+            return False
+        order.status = status
+        order.filled = filled
+        self._changes[order.order_id] = {
+            'b_id': order.order_id,
+            'b_status': status,
+            'b_filled': filled,
+            'b_updated': datetime.utcnow(),
+        }
+        if status in TERMINAL_STATUSES:
+            del self.working[str(report['id'])]
+        return True
+
+    @property
+    def pending_changes(self) -> int:
+        return len(self._changes)
+
+    def flush(self) -> int:
+        """Write coalesced status changes to the orders table; returns the rows written."""
+        self._last_flush = time.monotonic()
+        if not self._changes:
+            return 0
+        changes, self._changes = list(self._changes.values()), {}
+        orders = Order.__table__
+        stmt = (
+            orders.update()
+            .where(orders.c.id == bindparam('b_id'))
+            .values(status=bindparam('b_status'), filled_quantity=bindparam('b_filled'),
+                    updated_at=bindparam('b_updated'))
+        )
+        db = self.session_factory()
+        try:
+            db.execute(stmt, changes)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Keep the changes for the next flush unless newer ones superseded them
+            for change in changes:
+                self._changes.setdefault(change['b_id'], change)
+            raise Exception(f"Error writing order updates: {str(e)}")
+        finally:
+            db.close()
+        return len(changes)
+
+    def _flush_due(self) -> bool:
+        return (len(self._changes) >= self.batch_size
+                or (self._changes and time.monotonic() - self._last_flush >= self.flush_interval))
+
+    async def poll(self) -> int:
+        """Bulk-poll the exchange for every working order; returns how many changed."""
+        by_symbol: Dict[str, List[_WorkingOrder]] = {}
+        for order in self.working.values():
+            by_symbol.setdefault(order.symbol, []).append(order)
+        if self.engine.has('fetchOrders'):
+            batches = await asyncio.gather(*(
+                self.engine.fetch_orders(symbol, since=min((o.timestamp or 0) for o in orders))
+                for symbol, orders in by_symbol.items()
+            ))
+            reports = [report for batch in batches for report in batch]
+        else:
+            results = await asyncio.gather(
+                *(self.engine.update_order_status(exchange_id, order.symbol)
+                  for exchange_id, order in self.working.items()),
+                return_exceptions=True
+            )
+            reports = [r for r in results if not isinstance(r, Exception)]
+        return sum(self.on_execution_report(report) for report in reports)
+
+    async def run(self):
+        """Consume the exchange's order stream until cancelled, flushing as changes accumulate."""
+        try:
+            while True:
+                try:
+                    reports = await asyncio.wait_for(self.engine.watch_orders(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    reports = []
+                for report in reports:
+                    self.on_execution_report(report)
+                if self._flush_due():
+                    await asyncio.to_thread(self.flush)
+        finally:
+            if self._changes:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Dropping {len(self._changes)} order updates: {str(e)}")
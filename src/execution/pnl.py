@@ -0,0 +1,196 @@
+"""Position PnL: average price and realized PnL on fills, unrealized PnL marked from ticks."""
+import logging
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from src.database.models.account import Position
+from src.database.models.base import Instrument
+
+logger = logging.getLogger(__name__)
+
+# Position snapshots written by the position keepers
+POSITIONS_CHANNEL = 'positions'
+# Unrealized PnL marks, one message per flush
+PNL_CHANNEL = 'pnl'
+
+PRICE_PLACES = Decimal('1e-8')
+PNL_PLACES = Decimal('0.01')
+
+
+def apply_fill(quantity: Decimal, average_price: Decimal, delta: Decimal,
+               price: Decimal) -> Tuple[Decimal, Decimal, Decimal]:
+    """Fold a signed fill into a position; returns the new quantity, average price and realized PnL.
+
+    Adding to a position moves the average price; reducing it realizes PnL
+    against the average price and leaves it unchanged. A fill that crosses
+    zero closes the old position and opens the remainder at the fill price.
+    """
+    new_quantity = quantity + delta
+    if quantity == 0 or (quantity > 0) == (delta > 0):
+        average = (quantity * average_price + delta * price) / new_quantity
+        return new_quantity, average.quantize(PRICE_PLACES), Decimal(0)
+    closed = min(abs(delta), abs(quantity))
+    realized = closed * (price - average_price) if quantity > 0 else closed * (average_price - price)
+    if new_quantity == 0:
+        average = Decimal(0)
+    elif (new_quantity > 0) == (quantity > 0):
+        average = average_price
+    else:
+        average = price
+    return new_quantity, average, realized
+
+
+def unrealized_pnl(quantity: Decimal, average_price: Decimal, price: Decimal) -> Decimal:
+    return (quantity * (price - average_price)).quantize(PNL_PLACES)
+
+
+class _Mark:
+    __slots__ = ('account_id', 'quantity', 'average_price', 'pnl')
+
+    def __init__(self, account_id: int, quantity: Decimal, average_price: Decimal, pnl: Optional[Decimal]):
+        self.account_id = account_id
+        self.quantity = quantity
+        self.average_price = average_price
+        self.pnl = pnl
+
+
+class PnlMarker:
+    """Marks open positions to market as their symbols tick and writes the marks in batches.
+
+    Positions are indexed by symbol, so a tick only touches the positions in
+    that symbol. Quantity and average price come from ``load`` and are kept
+    current by the position keepers' snapshots (``on_position``). Marks are
+    coalesced per position, only written when they change, and flushed with
+    one executemany UPDATE every ``flush_interval`` seconds or ``batch_size``
+    positions.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None, flush_interval: float = 1.0,
+                 batch_size: int = 1000):
+        if session_factory is None:
+            from src.database.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.by_symbol: Dict[str, Dict[int, _Mark]] = {}
+        self.symbols: Dict[int, str] = {}
+        self._marks: Dict[int, Dict[str, Any]] = {}
+        self._last_flush = time.monotonic()
+
+    def load(self) -> int:
+        """Index every open position by symbol; returns how many were loaded."""
+        positions = Position.__table__
+        instruments = Instrument.__table__
+        db = self.session_factory()
+        try:
+            self.symbols = dict(db.execute(select(instruments.c.id, instruments.c.symbol)).all())
+            rows = db.execute(
+                select(positions.c.id, positions.c.account_id, positions.c.instrument_id, positions.c.quantity,
+                       positions.c.average_entry_price, positions.c.unrealized_pnl)
+                .where(positions.c.quantity != 0)
+            ).all()
+        finally:
+            db.close()
+        self.by_symbol = {}
+        for position_id, account_id, instrument_id, quantity, average_price, pnl in rows:
+            symbol = self.symbols.get(instrument_id)
+            if symbol is not None:
+                self.by_symbol.setdefault(symbol, {})[position_id] = _Mark(
+                    account_id, Decimal(quantity), Decimal(average_price or 0), pnl
+                )
+        return len(rows)
+
+    def _symbol(self, instrument_id: int) -> Optional[str]:
+        symbol = self.symbols.get(instrument_id)
+        if symbol is None:
+            instruments = Instrument.__table__
+            db = self.session_factory()
+            try:
+                symbol = db.execute(
+                    select(instruments.c.symbol).where(instruments.c.id == instrument_id)
+                ).scalar()
+            finally:
+                db.close()
+            if symbol is not None:
+                self.symbols[instrument_id] = symbol
+        return symbol
+
+    def on_position(self, update: Dict[str, Any]):
+        """Apply a position snapshot published by a position keeper."""
+        symbol = self._symbol(update['instrument_id'])
+        if symbol is None:
+            return
+        positions = self.by_symbol.setdefault(symbol, {})
+        mark = positions.get(update['id'])
+        quantity = Decimal(str(update['quantity']))
+        average_price = Decimal(str(update['average_entry_price']))
+        if mark is None:
+            positions[update['id']] = _Mark(update['account_id'], quantity, average_price, None)
+        else:
+            mark.quantity = quantity
+            mark.average_price = average_price
+
+    def on_tick(self, symbol: str, price: Any) -> int:
+        """Mark the positions in ``symbol`` at ``price``; returns how many marks changed."""
+        positions = self.by_symbol.get(symbol)
+        if not positions:
+            return 0
+        price = Decimal(str(price))
+        changed = 0
+        closed = []
+        for position_id, mark in positions.items():
+            pnl = unrealized_pnl(mark.quantity, mark.average_price, price)
+            if mark.quantity == 0:
+                closed.append(position_id)
+            if pnl == mark.pnl:
+                continue
+            mark.pnl = pnl
+            self._marks[position_id] = {
+                'b_id': position_id,
+                'b_account': mark.account_id,
+                'b_pnl': pnl,
+                'b_updated': datetime.utcnow(),
+            }
+            changed += 1
+        # Flat positions are marked to zero once, then dropped from the index
+        for position_id in closed:
+            del positions[position_id]
+        return changed
+
+    @property
+    def pending_marks(self) -> int:
+        return len(self._marks)
+
+    def flush_due(self) -> bool:
+        return (len(self._marks) >= self.batch_size
+                or (bool(self._marks) and time.monotonic() - self._last_flush >= self.flush_interval))
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Write pending marks to the positions table; returns the marks written."""
+        self._last_flush = time.monotonic()
+        if not self._marks:
+            return []
+        marks, self._marks = list(self._marks.values()), {}
+        positions = Position.__table__
+        stmt = (
+            positions.update()
+            .where(positions.c.id == bindparam('b_id'))
+            .values(unrealized_pnl=bindparam('b_pnl'), updated_at=bindparam('b_updated'))
+        )
+        db = self.session_factory()
+        try:
+            db.execute(stmt, marks)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Keep the marks for the next flush unless newer ones superseded them
+            for mark in marks:
+                self._marks.setdefault(mark['b_id'], mark)
+            raise Exception(f"Error writing PnL marks: {str(e)}")
+        finally:
+            db.close()
+        return marks
@@ -0,0 +1,162 @@
+"""Positions written with the fills that change them."""
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, select, tuple_
+from sqlalchemy.orm import Session
+from src.database.dialects import insert_for
+from src.database.models.account import Position
+from src.database.models.base import OrderSide
+from src.execution.pnl import PNL_PLACES, PRICE_PLACES, apply_fill
+
+logger = logging.getLogger(__name__)
+
+PositionKey = Tuple[int, int]
+# A fill as a signed quantity and a price
+Fill = Tuple[Decimal, Decimal]
+
+POSITION_FIELDS = ('id', 'account_id', 'instrument_id', 'quantity', 'average_entry_price', 'realized_pnl')
+
+
+def _decimal(value: Any) -> Decimal:
+    # Through str so float prices keep their printed digits
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+class PositionState:
+    """One account's holding of one instrument."""
+
+    __slots__ = ('account_id', 'instrument_id', 'quantity', 'average_entry_price', 'realized_pnl')
+
+    def __init__(self, account_id: int, instrument_id: int, quantity: Decimal = Decimal(0),
+                 average_entry_price: Decimal = Decimal(0), realized_pnl: Decimal = Decimal(0)):
+        self.account_id = account_id
+        self.instrument_id = instrument_id
+        self.quantity = quantity
+        self.average_entry_price = average_entry_price
+        self.realized_pnl = realized_pnl
+
+
+class PositionKeeper:
+    """Positions written in the transaction that stores their fills.
+
+    ``write`` applies fills to the positions table in the caller's
+    transaction; the trade journal calls it in the one that inserts the
+    fills' trades, so a position changes exactly when its fills are stored,
+    survives a crash with them and is not moved again by a replayed fill.
+    The stored rows are locked before they are read and the fills folded
+    into them, so several processes can keep positions over the same table
+    and the average price and realized PnL stay exact whichever process an
+    account's fills go through. After the commit, ``written`` passes the
+    rows to ``on_write``.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None,
+                 on_write: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        if session_factory is None:
+            from src.database.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.on_write = on_write
+
+    def write(self, db: Session, fills: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold fills (with the trade's ``account_id``, ``instrument_id``, ``side``, ``quantity``
+        and ``price``) into their stored positions in ``db``'s transaction; returns the rows written.
+
+        Rows are locked (``FOR UPDATE``, in key order so writers never
+        deadlock) before they are read, so concurrent writers apply their
+        fills one after the other. Each position's fills are applied in the
+        order given and written with one UPDATE for all positions.
+        """
+        by_key: Dict[PositionKey, List[Fill]] = {}
+        for fill in fills:
+            quantity = _decimal(fill['quantity'])
+            delta = quantity if OrderSide(fill['side']) == OrderSide.BUY else -quantity
+            by_key.setdefault((fill['account_id'], fill['instrument_id']), []).append(
+                (delta, _decimal(fill['price']))
+            )
+        if not by_key:
+            return []
+        table = Position.__table__
+        keys = sorted(by_key)
+        now = datetime.utcnow()
+        # New positions get an empty row first, so every row can be locked
+        db.execute(
+            insert_for(db, table).on_conflict_do_nothing(index_elements=[table.c.account_id, table.c.instrument_id]),
+            [{'account_id': account_id, 'instrument_id': instrument_id, 'quantity': 0, 'average_entry_price': 0,
+              'realized_pnl': 0, 'created_at': now, 'updated_at': now} for account_id, instrument_id in keys]
+        )
+        rows = db.execute(
+            select(*[table.c[field] for field in POSITION_FIELDS])
+            .where(tuple_(table.c.account_id, table.c.instrument_id).in_(keys))
+            .order_by(table.c.account_id, table.c.instrument_id)
+            .with_for_update()
+        ).all()
+        written = []
+        for position_id, account_id, instrument_id, quantity, average, realized in rows:
+            position = PositionState(account_id, instrument_id, _decimal(quantity), _decimal(average or 0),
+                                     _decimal(realized or 0))
+            _fold(position, by_key[(account_id, instrument_id)])
+            # Rounded as the columns store them
+            written.append({
+                'id': position_id,
+                'account_id': account_id,
+                'instrument_id': instrument_id,
+                'quantity': position.quantity.quantize(PRICE_PLACES),
+                'average_entry_price': position.average_entry_price.quantize(PRICE_PLACES),
+                'realized_pnl': position.realized_pnl.quantize(PNL_PLACES),
+            })
+        db.execute(
+            table.update().where(table.c.id == bindparam('b_id')).values(
+                quantity=bindparam('b_quantity'),
+                average_entry_price=bindparam('b_average_entry_price'),
+                realized_pnl=bindparam('b_realized_pnl'),
+                updated_at=now,
+            ),
+            [{f"b_{key}": value for key, value in row.items() if key not in ('account_id', 'instrument_id')}
+             for row in written]
+        )
+        return written
+
+    def written(self, rows: List[Dict[str, Any]]):
+        """Publish rows returned by ``write`` once their transaction has committed."""
+        if self.on_write is not None and rows:
+            snapshots = [{field: str(value) if isinstance(value, Decimal) else value for field, value in row.items()}
+                         for row in rows]
+            try:
+                self.on_write(snapshots)
+            except Exception as e:
+                logger.error(f"Error publishing positions: {str(e)}")
+
+    def apply_fills(self, fills: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write fills to their positions in a transaction of their own; returns the rows written.
+
+        For fills stored without the trade journal.
+        """
+        db = self.session_factory()
+        try:
+            written = self.write(db, fills)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error writing positions: {str(e)}")
+        finally:
+            db.close()
+        self.written(written)
+        return written
+
+    def apply_fill(self, account_id: int, instrument_id: int, side: OrderSide, quantity: Any,
+                   price: Any) -> Dict[str, Any]:
+        """Write one fill to its position; returns the row written."""
+        written, = self.apply_fills([{'account_id': account_id, 'instrument_id': instrument_id, 'side': side,
+                                      'quantity': quantity, 'price': price}])
+        return written
+
+
+def _fold(position: PositionState, fills: List[Fill]):
+    for delta, price in fills:
+        position.quantity, position.average_entry_price, realized = apply_fill(
+            position.quantity, position.average_entry_price, delta, price
+        )
+        position.realized_pnl += realized
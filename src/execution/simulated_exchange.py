@@ -0,0 +1,215 @@
+"""Offline exchange adapter that fills orders against simulated market prices."""
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+
+
+class SimulatedExchange:
+    """Implements the subset of the ccxt async order API used by ``TradingEngine``.
+
+    Prices come from a ``MarketSimulator`` (its ``prices`` dict) or a plain
+    ``{symbol: price}`` mapping. Market orders and marketable limit orders
+    fill immediately at the current price; other limit orders rest until
+    ``step`` moves the price through them. Every state change is also pushed
+    to ``watch_orders`` consumers, like a ccxt.pro order stream.
+    """
+
+    id = 'simulated'
+    rateLimit = 10
+    has = {'createOrders': True, 'cancelOrders': True, 'editOrder': True, 'fetchOrders': True}
+
+    def __init__(self, simulator: Any = None, prices: Optional[Dict[str, float]] = None,
+                 latency: float = 0.0, fee_rate: float = 0.001):
+        if simulator is None and prices is None:
+            raise ValueError("Either a simulator or a price mapping is required")
+        self.simulator = simulator
+        self.prices = simulator.prices if simulator is not None else dict(prices)
+        self.latency = latency
+        self.fee_rate = fee_rate
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[str, float] = {}
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._updates: List[Dict[str, Any]] = []
+        self._updated = asyncio.Event()
+
+    async def _roundtrip(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    def _market_price(self, symbol: str) -> float:
+        if symbol not in self.prices:
+            raise ValueError(f"Unknown symbol {symbol}")
+        return float(self.prices[symbol])
+
+    def _new_order(self, symbol: str, order_type: str, side: str, amount: float,
+                   price: Optional[float], params: Optional[Dict]) -> Dict[str, Any]:
+        if side not in ('buy', 'sell'):
+            raise ValueError(f"Invalid side {side}")
+        if order_type not in ('market', 'limit'):
+            raise ValueError(f"Unsupported order type {order_type}")
+        if amount <= 0:
+            raise ValueError("Order amount must be positive")
+        if order_type == 'limit' and price is None:
+            raise ValueError("Limit orders require a price")
+        self._market_price(symbol)
+        now = int(time.time() * 1000)
+        order = {
+            'id': str(next(self._ids)),
+            'clientOrderId': (params or {}).get('clientOrderId'),
+            'timestamp': now,
+            'lastTradeTimestamp': None,
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'price': price,
+            'amount': float(amount),
+            'filled': 0.0,
+            'remaining': float(amount),
+            'average': None,
+            'cost': 0.0,
+            'fee': {'currency': None, 'cost': 0.0},
+            'status': 'open',
+        }
+        self.orders[order['id']] = order
+        self._try_fill(order)
+        self._emit(order)
+        return order
+
+    def _emit(self, order: Dict[str, Any]):
+        self._updates.append(dict(order))
+        self._updated.set()
+
+    def _try_fill(self, order: Dict[str, Any], resting: bool = False) -> bool:
+        market = self._market_price(order['symbol'])
+        fill_price = market
+        if order['type'] == 'limit':
+            marketable = market <= order['price'] if order['side'] == 'buy' else market >= order['price']
+            if not marketable:
+                return False
+            if resting:
+                # A resting order crossed by the market fills at its limit
+                fill_price = order['price']
+        amount = order['remaining']
+        order['filled'] = order['amount']
+        order['remaining'] = 0.0
+        order['average'] = fill_price
+        order['cost'] = fill_price * amount
+        order['fee']['cost'] = order['cost'] * self.fee_rate
+        order['status'] = 'closed'
+        order['lastTradeTimestamp'] = int(time.time() * 1000)
+        signed = amount if order['side'] == 'buy' else -amount
+        self.positions[order['symbol']] = self.positions.get(order['symbol'], 0.0) + signed
+        return True
+
+    def step(self) -> List[Dict[str, Any]]:
+        """Advance the simulator one tick and fill resting orders; returns the fills."""
+        if self.simulator is not None:
+            for symbol in self.simulator.symbols:
+                self.simulator.generate_price_update(symbol)
+        return self.match()
+
+    def match(self) -> List[Dict[str, Any]]:
+        """Fill resting orders the current prices have moved through."""
+        fills = []
+        for order in self.orders.values():
+            if order['status'] == 'open' and self._try_fill(order, resting=True):
+                self._emit(order)
+                fills.append(dict(order))
+        return fills
+
+    # ccxt async API
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float,
+                           price: Optional[float] = None, params: Optional[Dict] = None) -> Dict[str, Any]:
+        await self._roundtrip()
+        return dict(self._new_order(symbol, type, side, amount, price, params))
+
+    async def create_orders(self, orders: List[Dict[str, Any]], params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        await self._roundtrip()
+        return [dict(self._new_order(o['symbol'], o['type'], o['side'], o['amount'],
+                                     o.get('price'), o.get('params'))) for o in orders]
+
+    def _cancel(self, order_id: str) -> Dict[str, Any]:
+        order = self.orders.get(str(order_id))
+        if order is None:
+            raise ValueError(f"Order {order_id} not found")
+        if order['status'] != 'open':
+            raise ValueError(f"Order {order_id} is {order['status']}")
+        order['status'] = 'canceled'
+        self._emit(order)
+        return dict(order)
+
+    async def cancel_order(self, id: str, symbol: Optional[str] = None,
+                           params: Optional[Dict] = None) -> Dict[str, Any]:
+        await self._roundtrip()
+        return self._cancel(id)
+
+    async def cancel_orders(self, ids: List[str], symbol: Optional[str] = None,
+                            params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        await self._roundtrip()
+        return [self._cancel(order_id) for order_id in ids]
+
+    async def edit_order(self, id: str, symbol: str, type: str, side: str,
+                         amount: Optional[float] = None, price: Optional[float] = None,
+                         params: Optional[Dict] = None) -> Dict[str, Any]:
+        await self._roundtrip()
+        old = self._cancel(id)
+        return dict(self._new_order(symbol, type, side, amount or old['amount'],
+                                    price if price is not None else old['price'], params))
+
+    async def fetch_order(self, id: str, symbol: Optional[str] = None,
+                          params: Optional[Dict] = None) -> Dict[str, Any]:
+        await self._roundtrip()
+        order = self.orders.get(str(id))
+        if order is None:
+            raise ValueError(f"Order {id} not found")
+        return dict(order)
+
+    async def fetch_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                           limit: Optional[int] = None, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        await self._roundtrip()
+        orders = [dict(order) for order in self.orders.values()
+                  if (symbol is None or order['symbol'] == symbol)
+                  and (since is None or order['timestamp'] >= since)]
+        return orders[-limit:] if limit else orders
+
+    async def fetch_open_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                                limit: Optional[int] = None, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        orders = await self.fetch_orders(symbol, since, None, params)
+        orders = [order for order in orders if order['status'] == 'open']
+        return orders[-limit:] if limit else orders
+
+    async def watch_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                           limit: Optional[int] = None, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Wait for order updates and return those not yet delivered."""
+        while True:
+            ready = [u for u in self._updates if symbol is None or u['symbol'] == symbol]
+            if ready:
+                self._updates = [u for u in self._updates if not (symbol is None or u['symbol'] == symbol)]
+                return ready
+            self._updated.clear()
+            await self._updated.wait()
+
+    async def fetch_position(self, symbol: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        await self._roundtrip()
+        contracts = self.positions.get(symbol, 0.0)
+        return {
+            'symbol': symbol,
+            'contracts': abs(contracts),
+            'side': 'long' if contracts > 0 else 'short' if contracts < 0 else None,
+            'markPrice': self._market_price(symbol),
+        }
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,324 @@
+"""Append-only trade journal: fills are logged durably, then inserted into ``trades`` in batches."""
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from src.database.dialects import insert_for
+from src.database.models.base import OrderSide
+from src.database.models.order import Trade, TradeFill
+from src.execution.position_keeper import PositionKeeper
+
+logger = logging.getLogger(__name__)
+
+FILL_FIELDS = ('fill_id', 'order_id', 'account_id', 'instrument_id', 'quantity', 'price', 'side', 'executed_at')
+
+
+def _encode(fill: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **fill,
+        'quantity': str(fill['quantity']),
+        'price': str(fill['price']),
+        'side': OrderSide(fill['side']).value,
+        'executed_at': fill['executed_at'].isoformat(),
+    }
+
+
+def _decode(fill: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **fill,
+        'quantity': Decimal(fill['quantity']),
+        'price': Decimal(fill['price']),
+        'side': OrderSide(fill['side']),
+        'executed_at': datetime.fromisoformat(fill['executed_at']),
+    }
+
+
+def read_segment(f: Any) -> Iterator[Dict[str, Any]]:
+    """Entries of a log segment, stopping at a line torn by a crash."""
+    for line in f:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            return
+
+
+class TradeJournal:
+    """Fills in an in-process buffer backed by a write-ahead log, inserted into ``trades`` in batches.
+
+    ``record`` appends a fill to this process's log segment and, with
+    ``durable``, returns once the segment is fsynced. One fsync covers every
+    fill recorded while the previous one ran (group commit). A writer thread
+    inserts buffered fills with one multi-row INSERT per ``batch_size`` rows,
+    at least every ``flush_interval`` seconds, and appends a checkpoint to
+    the segment after each commit.
+
+    Segments are locked by the process writing them. ``start`` replays the
+    unlocked segments left behind by processes that died: every fill after a
+    segment's last checkpoint is inserted again. Inserts skip fills whose
+    ``fill_id`` is already claimed in ``trade_fills``, so replaying a fill
+    that was committed just before the crash, or storing a redelivered
+    order's fill again at another time, is harmless.
+
+    With ``positions``, the fills inserted are applied to their positions in
+    the same transaction (``PositionKeeper.write``), so positions are as
+    durable as the log and never count a fill twice.
+    """
+
+    def __init__(self, wal_dir: str, session_factory: Optional[Callable[[], Session]] = None,
+                 flush_interval: float = 0.01, batch_size: int = 1000, capacity: int = 100_000,
+                 segment_bytes: int = 64 * 1024 * 1024, positions: Optional[PositionKeeper] = None):
+        if session_factory is None:
+            from src.database.session import SessionLocal
+            session_factory = SessionLocal
+        self.wal_dir = wal_dir
+        self.session_factory = session_factory
+        self.positions = positions
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.capacity = capacity
+        self.segment_bytes = segment_bytes
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        # (sequence, fill) recorded but not yet inserted, oldest first
+        self._buffer: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._seq = 0
+        self._synced = 0
+        self._segment: Optional[Any] = None
+        self._segment_path: Optional[str] = None
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+
+    # Log segments
+
+    def _open_segment(self):
+        os.makedirs(self.wal_dir, exist_ok=True)
+        name = f"trades-{os.getpid()}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.wal"
+        self._segment_path = os.path.join(self.wal_dir, name)
+        # Locked under a name recover() ignores, then renamed, so no other
+        # process can see the segment unlocked and take it for abandoned
+        partial = os.path.join(self.wal_dir, f".{name}.tmp")
+        self._segment = open(partial, 'ab')
+        fcntl.flock(self._segment.fileno(), fcntl.LOCK_EX)
+        os.rename(partial, self._segment_path)
+
+    def _close_segment(self, remove: bool):
+        self._segment.close()
+        if remove:
+            os.unlink(self._segment_path)
+        self._segment = None
+        self._segment_path = None
+
+    def _append(self, entry: Dict[str, Any]):
+        self._segment.write(json.dumps(entry, separators=(',', ':')).encode() + b'\n')
+
+    # Lifecycle
+
+    def start(self) -> int:
+        """Replay abandoned segments and start the log and writer threads, once per process.
+
+        Returns the number of fills replayed.
+        """
+        # Threads do not survive a fork, so prefork children start their own
+        if self._pid == os.getpid():
+            return 0
+        self._stopping = False
+        self._buffer.clear()
+        self._seq = self._synced = 0
+        # Started only once everything has succeeded, so a failed replay
+        # (e.g. the database briefly down) is retried by the next start
+        replayed = self.recover()
+        self._open_segment()
+        self._threads = [
+            threading.Thread(target=self._sync_loop, name='journal-sync', daemon=True),
+            threading.Thread(target=self._write_loop, name='journal-writer', daemon=True),
+        ]
+        try:
+            for thread in self._threads:
+                thread.start()
+        except Exception:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            for thread in self._threads:
+                if thread.is_alive():
+                    thread.join()
+            self._threads = []
+            with self._cond:
+                self._close_segment(remove=True)
+            raise
+        self._pid = os.getpid()
+        return replayed
+
+    def stop(self):
+        """Insert everything still buffered, then remove this process's segment."""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._pid = None
+        while self._buffer:
+            self.flush()
+        with self._cond:
+            self._close_segment(remove=True)
+
+    def recover(self) -> int:
+        """Insert the unacknowledged fills of segments no live process holds; returns how many."""
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.wal_dir, 'trades-*.wal'))):
+            with open(path, 'rb') as f:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # still being written
+                checkpoint, fills = 0, []
+                for entry in read_segment(f):
+                    if 'checkpoint' in entry:
+                        checkpoint = entry['checkpoint']
+                    else:
+                        fills.append((entry['seq'], entry['fill']))
+                pending = [_decode(fill) for seq, fill in fills if seq > checkpoint]
+                for i in range(0, len(pending), self.batch_size):
+                    self._insert(pending[i:i + self.batch_size])
+                replayed += len(pending)
+                if pending:
+                    logger.warning(f"Replayed {len(pending)} fills from {os.path.basename(path)}")
+                os.unlink(path)
+        return replayed
+
+    # Recording
+
+    def record(self, fill: Dict[str, Any], durable: bool = True) -> int:
+        """Journal a fill (the ``FILL_FIELDS`` of a trade); returns its sequence number.
+
+        With ``durable`` this returns once the fill is on disk; it is inserted
+        into ``trades`` by the writer thread shortly after.
+        """
+        fill = {field: fill[field] for field in FILL_FIELDS}
+        with self._cond:
+            if self._segment is None:
+                raise Exception("Error recording fill: trade journal is not started")
+            while len(self._buffer) >= self.capacity:
+                # Writer fell behind (database slow or down); hold fills back
+                self._cond.wait()
+            self._seq += 1
+            seq = self._seq
+            self._append({'seq': seq, 'fill': _encode(fill)})
+            self._buffer.append((seq, fill))
+            self._cond.notify_all()
+            if durable:
+                while self._synced < seq:
+                    self._cond.wait()
+        return seq
+
+    def find(self, fill_id: str) -> Optional[Dict[str, Any]]:
+        """A fill recorded by this process and not yet inserted, if any."""
+        with self._cond:
+            for _, fill in reversed(self._buffer):
+                if fill['fill_id'] == fill_id:
+                    return dict(fill)
+        return None
+
+    @property
+    def pending(self) -> int:
+        """Fills recorded but not yet inserted."""
+        return len(self._buffer)
+
+    def _sync_loop(self):
+        while True:
+            with self._cond:
+                while self._synced == self._seq and not self._stopping:
+                    self._cond.wait()
+                if self._synced == self._seq:
+                    return
+                target = self._seq
+                self._segment.flush()
+                fd = self._segment.fileno()
+            # Fills recorded meanwhile wait for the next fsync
+            os.fsync(fd)
+            with self._cond:
+                self._synced = target
+                self._cond.notify_all()
+
+    def _write_loop(self):
+        while True:
+            deadline = time.monotonic() + self.flush_interval
+            with self._cond:
+                while len(self._buffer) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(str(e))
+                time.sleep(self.flush_interval)
+
+    # Writing
+
+    def _insert(self, fills: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store the fills not stored yet, in one transaction; returns those inserted."""
+        unique: Dict[str, Dict[str, Any]] = {}
+        for fill in fills:
+            unique.setdefault(fill['fill_id'], fill)
+        trade_fills, trades = TradeFill.__table__, Trade.__table__
+        db = self.session_factory()
+        try:
+            claim = insert_for(db, trade_fills).on_conflict_do_nothing(
+                index_elements=[trade_fills.c.fill_id]
+            ).returning(trade_fills.c.fill_id)
+            claimed = set(db.execute(
+                claim, [{'fill_id': fill_id, 'executed_at': fill['executed_at']} for fill_id, fill in unique.items()]
+            ).scalars())
+            # In the order recorded, which is the order positions apply them
+            new = [fill for fill_id, fill in unique.items() if fill_id in claimed]
+            written = []
+            if new:
+                db.execute(trades.insert(), new)
+                if self.positions is not None:
+                    written = self.positions.write(db, new)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise Exception(f"Error inserting trades: {str(e)}")
+        finally:
+            db.close()
+        if written:
+            self.positions.written(written)
+        return new
+
+    def flush(self) -> int:
+        """Insert up to ``batch_size`` buffered fills and checkpoint them; returns how many."""
+        with self._flush_lock:
+            with self._cond:
+                batch = [self._buffer[i] for i in range(min(self.batch_size, len(self._buffer)))]
+            if not batch:
+                return 0
+            self._insert([fill for _, fill in batch])
+            with self._cond:
+                for _ in batch:
+                    self._buffer.popleft()
+                self._append({'checkpoint': batch[-1][0]})
+                # Start a fresh segment once everything in this one is stored
+                # and no fsync is running on it
+                if not self._buffer and self._synced == self._seq and self._segment.tell() >= self.segment_bytes:
+                    self._close_segment(remove=True)
+                    self._open_segment()
+                self._cond.notify_all()
+            return len(batch)
@@ -1,45 +1,152 @@
 """Trading execution engine."""
-from typing import Dict, Any, Optional
-import ccxt
-from datetime import datetime
+import asyncio
+from typing import Dict, Any, List, Optional, Sequence
+from src.utils.rate_limit import AsyncTokenBucket
 
 class TradingEngine:
-    def __init__(self, exchange_id: str, api_key: Optional[str] = None, api_secret: Optional[str] = None):
-        self.exchange = getattr(ccxt, exchange_id)({
-            'apiKey': api_key,
-            'secret': api_secret,
-            'enableRateLimit': True
-        })
-        
-    async def place_order(self, symbol: str, order_type: str, side: str, 
-                         amount: float, price: Optional[float] = None) -> Dict[str, Any]:
+    """Async execution gateway around a ccxt async exchange.
+
+    One exchange instance (and so one HTTP session) is reused for every
+    request. At most ``max_in_flight`` requests are outstanding at a time and
+    requests are throttled by a client-side token bucket rather than ccxt's
+    sleeping rate limiter. Batch operations use the exchange's native batch
+    endpoints when it has them and fall back to concurrent single requests.
+    """
+
+    def __init__(self, exchange_id: str = 'binance', api_key: Optional[str] = None,
+                 api_secret: Optional[str] = None, exchange: Any = None,
+                 max_in_flight: int = 16, batch_size: int = 20,
+                 rate_limiter: Optional[AsyncTokenBucket] = None):
+        if exchange is None:
+            # ccxt takes ~0.5s to import; only pay for it when talking to a real exchange
+            import ccxt.async_support as ccxt_async
+            exchange = getattr(ccxt_async, exchange_id)({
+                'apiKey': api_key,
+                'secret': api_secret,
+                'enableRateLimit': False
+            })
+        self.exchange = exchange
+        self.batch_size = batch_size
+        self.rate_limiter = rate_limiter or AsyncTokenBucket.for_exchange(exchange, burst=max_in_flight)
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self) -> 'TradingEngine':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Release the exchange's HTTP session."""
+        await self.exchange.close()
+
+    def has(self, feature: str) -> bool:
+        """Whether the exchange advertises a ccxt capability such as ``'createOrders'``."""
+        return bool((getattr(self.exchange, 'has', None) or {}).get(feature))
+
+    async def _request(self, method: str, *args, **kwargs) -> Any:
+        async with self._in_flight:
+            await self.rate_limiter.acquire()
+            return await getattr(self.exchange, method)(*args, **kwargs)
+
+    async def place_order(self, symbol: str, order_type: str, side: str,
+                          amount: float, price: Optional[float] = None,
+                          params: Optional[Dict] = None) -> Dict[str, Any]:
         """Place an order on the exchange."""
         try:
-            params = {}
-            if price:
-                return await self.exchange.create_order(symbol, order_type, side, amount, price, params)
-            else:
-                return await self.exchange.create_order(symbol, order_type, side, amount, params)
+            return await self._request('create_order', symbol, order_type, side, amount, price, params or {})
         except Exception as e:
             raise Exception(f"Error placing order: {str(e)}")
-    
-    async def cancel_order(self, order_id: str, symbol: str) -> Dict[str, Any]:
+
+    async def place_orders(self, orders: Sequence[Dict[str, Any]]) -> List[Any]:
+        """Place many orders concurrently.
+
+        Each order is a dict with ``symbol``, ``type``, ``side``, ``amount`` and
+        optionally ``price`` and ``params``. Results come back in input order;
+        an order that failed is returned as the exception raised for it.
+        """
+        if self.has('createOrders'):
+            chunks = [list(orders[i:i + self.batch_size]) for i in range(0, len(orders), self.batch_size)]
+            results = await asyncio.gather(*(self._place_chunk(chunk) for chunk in chunks))
+            return [result for chunk in results for result in chunk]
+        return await asyncio.gather(
+            *(self.place_order(o['symbol'], o['type'], o['side'], o['amount'], o.get('price'), o.get('params'))
+              for o in orders),
+            return_exceptions=True
+        )
+
+    async def _place_chunk(self, chunk: List[Dict[str, Any]]) -> List[Any]:
+        try:
+            return await self._request('create_orders', chunk)
+        except Exception as e:
+            error = Exception(f"Error placing order: {str(e)}")
+            return [error] * len(chunk)
+
+    async def cancel_order(self, order_id: str, symbol: Optional[str] = None) -> Dict[str, Any]:
         """Cancel an existing order."""
         try:
-            return await self.exchange.cancel_order(order_id, symbol)
+            return await self._request('cancel_order', order_id, symbol)
         except Exception as e:
             raise Exception(f"Error canceling order: {str(e)}")
-    
+
+    async def cancel_orders(self, order_ids: Sequence[str], symbol: Optional[str] = None) -> List[Any]:
+        """Cancel many orders; failures are returned in place as exceptions."""
+        if self.has('cancelOrders'):
+            try:
+                return await self._request('cancel_orders', list(order_ids), symbol)
+            except Exception as e:
+                return [Exception(f"Error canceling order: {str(e)}")] * len(order_ids)
+        return await asyncio.gather(
+            *(self.cancel_order(order_id, symbol) for order_id in order_ids),
+            return_exceptions=True
+        )
+
+    async def replace_order(self, order_id: str, symbol: str, order_type: str, side: str,
+                            amount: float, price: Optional[float] = None) -> Dict[str, Any]:
+        """Amend an order, or cancel it and place the replacement if the exchange cannot edit."""
+        try:
+            if self.has('editOrder'):
+                return await self._request('edit_order', order_id, symbol, order_type, side, amount, price)
+            await self._request('cancel_order', order_id, symbol)
+            return await self._request('create_order', symbol, order_type, side, amount, price, {})
+        except Exception as e:
+            raise Exception(f"Error replacing order: {str(e)}")
+
+    async def replace_orders(self, replacements: Sequence[Dict[str, Any]]) -> List[Any]:
+        """Replace many orders concurrently.
+
+        Each replacement is an order dict as for ``place_orders`` plus the
+        ``id`` of the order being replaced.
+        """
+        return await asyncio.gather(
+            *(self.replace_order(r['id'], r['symbol'], r['type'], r['side'], r['amount'], r.get('price'))
+              for r in replacements),
+            return_exceptions=True
+        )
+
     async def get_position(self, symbol: str) -> Dict[str, Any]:
         """Get current position for a symbol."""
         try:
-            return await self.exchange.fetch_position(symbol)
+            return await self._request('fetch_position', symbol)
         except Exception as e:
             raise Exception(f"Error fetching position: {str(e)}")
-    
-    def update_order_status(self, order_id: str) -> Dict[str, Any]:
+
+    async def fetch_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                           open_only: bool = False) -> List[Dict[str, Any]]:
+        """Fetch many orders in one request."""
+        method = 'fetch_open_orders' if open_only else 'fetch_orders'
+        try:
+            return await self._request(method, symbol, since)
+        except Exception as e:
+            raise Exception(f"Error fetching orders: {str(e)}")
+
+    async def watch_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Wait for the next batch of order updates from the exchange's push stream."""
+        return await self.exchange.watch_orders(symbol)
+
+    async def update_order_status(self, order_id: str, symbol: Optional[str] = None) -> Dict[str, Any]:
         """Update the status of an existing order."""
         try:
-            return self.exchange.fetch_order(order_id)
+            return await self._request('fetch_order', order_id, symbol)
         except Exception as e:
             raise Exception(f"Error updating order status: {str(e)}")
@@ -0,0 +1,291 @@
+"""Load generation for the order pipeline: API submission and execution."""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+import httpx
+import numpy as np
+
+ORDERS_PATH = "/api/trading/orders"
+CONTRACTS_PATH = "/api/trading/contracts"
+# Execution outcome whose latency is recorded as ``fill``
+FILLED = 'filled'
+
+
+class OrderMix:
+    """Generates a realistic stream of order requests.
+
+    Mostly market orders with a tail of limit orders priced a few ticks
+    around the reference price, a slight buy bias and lognormal sizes, spread
+    across the given contracts with a Zipf-like popularity skew.
+    """
+
+    def __init__(self, contract_ids: Sequence[int], reference_prices: Optional[Dict[int, float]] = None,
+                 market_share: float = 0.7, buy_share: float = 0.52, seed: Optional[int] = None):
+        if not contract_ids:
+            raise ValueError("At least one contract is required")
+        self.contract_ids = list(contract_ids)
+        self.reference_prices = reference_prices or {}
+        self.market_share = market_share
+        self.buy_share = buy_share
+        self.rng = np.random.default_rng(seed)
+        weights = 1.0 / np.arange(1, len(self.contract_ids) + 1)
+        self._weights = weights / weights.sum()
+
+    def next_order(self) -> Dict[str, Any]:
+        contract_id = self.contract_ids[self.rng.choice(len(self.contract_ids), p=self._weights)]
+        side = 'buy' if self.rng.random() < self.buy_share else 'sell'
+        order = {
+            'contract_id': int(contract_id),
+            'type': 'market',
+            'side': side,
+            'quantity': round(float(self.rng.lognormal(0.0, 0.75)), 4),
+            'price': None,
+        }
+        if self.rng.random() >= self.market_share:
+            reference = self.reference_prices.get(contract_id, 100.0)
+            offset = float(self.rng.normal(0.0, 0.002)) * (-1 if side == 'buy' else 1)
+            order['type'] = 'limit'
+            order['price'] = round(reference * (1 + offset), 2)
+        return order
+
+
+class LatencyRecorder:
+    """Collects per-stage latencies, execution outcomes and errors for a load run."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.outcomes: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, stage: str, seconds: float):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def outcome(self, name: str):
+        self.outcomes[name] = self.outcomes.get(name, 0) + 1
+
+    def error(self, reason: str):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self) -> Dict[str, Any]:
+        """Throughput and latency percentiles (milliseconds) per stage."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        stages = {}
+        for stage, samples in self.samples.items():
+            ms = np.asarray(samples) * 1000
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            stages[stage] = {
+                'count': len(ms),
+                'throughput': len(ms) / elapsed if elapsed > 0 else 0.0,
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(p50),
+                'p90_ms': float(p90),
+                'p99_ms': float(p99),
+                'max_ms': float(ms.max()),
+            }
+        return {
+            'elapsed_s': elapsed,
+            'stages': stages,
+            'outcomes': dict(self.outcomes),
+            'errors': dict(self.errors),
+            'error_count': sum(self.errors.values()),
+        }
+
+
+class ApiSubmitter:
+    """Submits orders through the trading API, over HTTP or to an in-process ASGI app."""
+
+    def __init__(self, base_url: str = "http://localhost:8000", app: Any = None, timeout: float = 10.0):
+        transport = httpx.ASGITransport(app=app) if app is not None else None
+        self.client = httpx.AsyncClient(base_url=base_url if app is None else "http://loadtest",
+                                        transport=transport, timeout=timeout)
+
+    async def create_contracts(self, count: int, prefix: str = "LOAD") -> List[int]:
+        """Create futures contracts to trade against; returns their ids."""
+        stamp = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        ids = []
+        for i in range(count):
+            response = await self.client.post(CONTRACTS_PATH, json={
+                'symbol': f"{prefix}-{stamp}-{i}",
+                'expiry': (datetime.utcnow() + timedelta(days=90)).isoformat(),
+                'tick_size': 0.01,
+                'contract_size': 1.0,
+                'margin_requirement': 0.1,
+            })
+            response.raise_for_status()
+            ids.append(response.json()['id'])
+        return ids
+
+    async def submit(self, order: Dict[str, Any]) -> int:
+        response = await self.client.post(ORDERS_PATH, json=order)
+        response.raise_for_status()
+        return response.json()['id']
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class CeleryExecutor:
+    """Runs ``execute_order`` on the Celery workers and waits for the result.
+
+    The app shares the workers' configuration, so orders are routed to the
+    ``orders`` queue at order priority as the API's would be. Returns the
+    outcome: ``filled``, or the task's status for orders it left unfilled
+    (``pending`` limit orders, ``skipped`` re-runs).
+    """
+
+    def __init__(self, broker_url: str, task_name: str = 'worker.tasks.execute_order', timeout: float = 30.0):
+        from celery import Celery
+        from services.worker.celeryconfig import celery_config
+        self.app = Celery('loadtest')
+        self.app.conf.update(celery_config(broker_url))
+        self.task_name = task_name
+        self.timeout = timeout
+
+    async def execute(self, order_id: int, order: Dict[str, Any]) -> str:
+        result = self.app.send_task(self.task_name, args=[order_id])
+        outcome = await asyncio.to_thread(result.get, timeout=self.timeout)
+        status = outcome.get('status')
+        if status == 'error':
+            raise Exception(outcome.get('error'))
+        return FILLED if status == 'success' else status
+
+
+class SimulatedExecutor:
+    """In-process stand-in for the execution path, filling orders on a ``SimulatedExchange``.
+
+    Returns ``filled``, or ``resting`` for limit orders left on the book.
+    """
+
+    def __init__(self, engine: Any, symbol_for_contract: Optional[Dict[int, str]] = None,
+                 default_symbol: str = 'AAPL'):
+        self.engine = engine
+        self.symbol_for_contract = symbol_for_contract or {}
+        self.default_symbol = default_symbol
+
+    async def execute(self, order_id: int, order: Dict[str, Any]) -> str:
+        symbol = self.symbol_for_contract.get(order['contract_id'], self.default_symbol)
+        placed = await self.engine.place_order(symbol, order['type'], order['side'],
+                                               order['quantity'], order.get('price'),
+                                               {'clientOrderId': str(order_id)})
+        return FILLED if placed['status'] == 'closed' else 'resting'
+
+
+class OrderLoadTest:
+    """Open-loop load generator: submits orders at a fixed rate regardless of response times.
+
+    Each order is timed from submission to API acknowledgement (``submit``)
+    and, when an executor is given and fills it, to execution (``fill``,
+    measured from the same start); every execution outcome is counted. At most ``max_outstanding`` orders are in flight; arrivals
+    beyond that are counted as ``dropped`` so an overloaded target shows up in
+    the report instead of silently lowering the offered rate.
+    """
+
+    def __init__(self, submitter: ApiSubmitter, mix: OrderMix, executor: Any = None,
+                 rate: float = 50.0, duration: float = 10.0, max_outstanding: int = 256):
+        self.submitter = submitter
+        self.mix = mix
+        self.executor = executor
+        self.rate = rate
+        self.duration = duration
+        self.max_outstanding = max_outstanding
+        self.recorder = LatencyRecorder()
+
+    async def _one(self, order: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            order_id = await self.submitter.submit(order)
+        except Exception as e:
+            self.recorder.error(f"submit: {type(e).__name__}")
+            return
+        self.recorder.record('submit', time.perf_counter() - started)
+        if self.executor is None:
+            return
+        try:
+            outcome = await self.executor.execute(order_id, order)
+        except Exception as e:
+            self.recorder.error(f"execute: {type(e).__name__}")
+            return
+        self.recorder.outcome(outcome)
+        # Unfilled orders would skew the fill latency with their round trip
+        if outcome == FILLED:
+            self.recorder.record('fill', time.perf_counter() - started)
+
+    async def run(self) -> Dict[str, Any]:
+        """Generate load for ``duration`` seconds and return the summary."""
+        interval = 1.0 / self.rate
+        total = int(self.rate * self.duration)
+        tasks = set()
+        self.recorder = LatencyRecorder()
+        start = time.perf_counter()
+        for i in range(total):
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= self.max_outstanding:
+                self.recorder.error('dropped')
+                continue
+            task = asyncio.create_task(self._one(self.mix.next_order()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        self.recorder.stop()
+        summary = self.recorder.summary()
+        summary.update({'offered_rate': self.rate, 'duration_s': self.duration, 'orders': total})
+        return summary
+
+
+def write_report(summary: Dict[str, Any], path: str):
+    """Write a load test summary as JSON."""
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2, default=str)
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    """Render a summary as a plain-text table."""
+    lines = [
+        f"offered {summary.get('offered_rate', 0):.1f} orders/s for {summary.get('duration_s', 0):.1f}s, "
+        f"elapsed {summary['elapsed_s']:.2f}s, errors {summary['error_count']}",
+        f"{'stage':<8}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for stage, s in summary['stages'].items():
+        lines.append(f"{stage:<8}{s['count']:>8}{s['throughput']:>10.1f}{s['p50_ms']:>10.2f}"
+                     f"{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    for outcome, count in summary.get('outcomes', {}).items():
+        lines.append(f"outcome {outcome}: {count}")
+    for reason, count in summary['errors'].items():
+        lines.append(f"error {reason}: {count}")
+    return "\n".join(lines)
+
+
+def in_process_app(database_url: str = "sqlite:///loadtest.db") -> Any:
+    """The trading API bound to a local database, for load tests without docker-compose."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+    from src.api.database import get_db
+    from src.api.main import app, Base
+
+    connect_args = {'check_same_thread': False} if database_url.startswith('sqlite') else {}
+    # No pool: sync endpoints and their session cleanup share FastAPI's thread
+    # pool, so waiting on a small connection pool under load can deadlock it
+    engine = create_engine(database_url, connect_args=connect_args, poolclass=NullPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def local_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = local_db
+    return app
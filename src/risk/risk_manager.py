@@ -2,6 +2,7 @@
 from typing import Dict, Any, List
 import pandas as pd
 from datetime import datetime
+from src.data.bar_store import BarStore
 
 class RiskManager:
     def __init__(self, config: Dict[str, Any]):
@@ -36,6 +37,13 @@ class RiskManager:
         position_value = sum(pos * price_history[sym].iloc[-1] 
                            for sym, pos in positions.items())
         return abs(var * position_value)
+
+    def calculate_var_from_store(self, positions: Dict[str, float], bar_store: BarStore,
+                                 start: Any = None, end: Any = None, timeframe: str = '1m',
+                                 confidence_level: float = 0.95) -> float:
+        """Calculate Value at Risk using price history read from the local bar store."""
+        price_history = bar_store.read_closes(list(positions), start, end, timeframe)
+        return self.calculate_var(positions, price_history, confidence_level)
         
     def update_positions(self, positions: Dict[str, float]):
         """Update current positions."""
@@ -0,0 +1,68 @@
+"""Clocks that let simulations run in real time or faster than real time."""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class Clock:
+    """Source of the current time and of the pause between simulation ticks."""
+
+    def now(self) -> datetime:
+        raise NotImplementedError
+
+    async def sleep(self, seconds: float):
+        raise NotImplementedError
+
+
+class RealTimeClock(Clock):
+    """Wall-clock time; ``sleep`` really waits."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """Simulated time that only moves when the simulation sleeps or advances it.
+
+    With ``speed=None`` sleeping costs no wall time, so ticks are produced as
+    fast as the CPU allows; with ``speed=N`` each simulated second takes 1/N
+    of a real second.
+    """
+
+    def __init__(self, start: Optional[datetime] = None, speed: Optional[float] = None):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self._now = start or datetime(2024, 1, 2, 9, 30)
+        self.speed = speed
+
+    def now(self) -> datetime:
+        return self._now
+
+    def advance(self, seconds: float):
+        """Move simulated time forward without waiting."""
+        self._now += timedelta(seconds=seconds)
+
+    async def sleep(self, seconds: float):
+        self.advance(seconds)
+        # Always yield so other tasks (publishers, consumers) get to run
+        await asyncio.sleep(seconds / self.speed if self.speed else 0)
+
+
+def clock_from_env() -> Clock:
+    """Build a clock from ``SIMULATION_SPEED`` and ``SIMULATION_START``.
+
+    ``SIMULATION_SPEED`` is ``realtime`` (default), ``max`` for as fast as
+    possible, or a multiple of real time such as ``60``.
+    """
+    speed = os.getenv('SIMULATION_SPEED', 'realtime').lower()
+    if speed == 'realtime':
+        return RealTimeClock()
+    start = os.getenv('SIMULATION_START')
+    return SimulatedClock(
+        start=datetime.fromisoformat(start) if start else None,
+        speed=None if speed == 'max' else float(speed)
+    )
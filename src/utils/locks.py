@@ -0,0 +1,45 @@
+"""Redis locks that keep periodic jobs from overlapping across workers.
+
+``single_instance`` wraps a job so that only one run holds its lock at a
+time, whichever worker it lands on; a run that finds the lock taken is
+skipped rather than queued behind it. The lock expires after ``timeout``
+seconds so a crashed worker cannot block the job forever; set it above the
+job's longest expected run.
+"""
+import functools
+import logging
+from typing import Any, Callable, Dict, Optional
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+SKIPPED = 'skipped'
+
+
+def single_instance(name: str, timeout: float, redis_client: Optional[Callable[[], Any]] = None) -> Callable:
+    """Decorator running the wrapped job only while it holds the Redis lock ``lock:<name>``.
+
+    Returns ``{"status": "skipped"}`` without running the job when another run holds the lock.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Dict[str, Any]:
+            if redis_client is None:
+                from src.utils.redis_pool import get_redis
+                client = get_redis()
+            else:
+                client = redis_client()
+            lock = client.lock(f"lock:{name}", timeout=timeout, blocking=False)
+            if not lock.acquire():
+                logger.info(f"Skipping {name}: previous run still in progress")
+                return {"status": SKIPPED, "reason": "previous run still in progress"}
+            try:
+                return func(*args, **kwargs)
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    # Another run may have started once the lock expired
+                    logger.warning(f"{name} ran longer than its {timeout}s lock timeout")
+        return wrapper
+    return decorator
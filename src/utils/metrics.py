@@ -0,0 +1,176 @@
+"""Prometheus metrics shared by the API, the Celery worker and the simulators.
+
+Metrics are module-level so every process imports the same definitions. The
+API serves them on ``/metrics``; the worker and the simulators call
+``start_metrics_server`` to expose them on a sidecar HTTP port. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (the prefork Celery worker) samples from
+all child processes are aggregated at scrape time.
+"""
+import os
+import time
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    start_http_server
+)
+from prometheus_client.core import GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ORDER_BUCKETS = LATENCY_BUCKETS + (30.0, 60.0, 300.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled by the API', ['method', 'route', 'status']
+)
+HTTP_REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'API request latency per route', ['method', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+ORDERS_EXECUTED = Counter(
+    'orders_executed_total', 'Outcomes of the execute_order task', ['outcome']
+)
+ORDER_LATENCY = Histogram(
+    'order_latency_seconds',
+    'Time since an order was created: until execute_order picked it up (submit) or it filled (fill)',
+    ['stage'], buckets=ORDER_BUCKETS
+)
+SIMULATOR_TICK_DURATION = Histogram(
+    'simulator_tick_duration_seconds', 'Time to generate one round of simulated updates', ['simulator'],
+    buckets=LATENCY_BUCKETS
+)
+SIMULATOR_PUBLISH_LAG = Histogram(
+    'simulator_publish_lag_seconds', 'Time from a tick being generated to its updates being published',
+    ['simulator'], buckets=LATENCY_BUCKETS
+)
+SIMULATOR_UPDATES = Counter(
+    'simulator_updates_published_total', 'Simulated market data updates published', ['simulator']
+)
+JOB_DURATION = Histogram(
+    'scheduled_job_duration_seconds', 'Run time of periodic jobs by outcome (success, error, skipped)',
+    ['job', 'outcome'], buckets=JOB_BUCKETS
+)
+ORDER_EVENTS_RELAYED = Counter(
+    'order_events_relayed_total', 'Order events moved from the outbox to the order events stream'
+)
+WEBSOCKET_CLIENTS = Gauge(
+    'websocket_clients', 'Connected websocket clients', ['endpoint'], multiprocess_mode='livesum'
+)
+WEBSOCKET_QUEUE_DEPTH = Gauge(
+    'websocket_queue_depth', 'Messages waiting to be sent to websocket clients', ['endpoint'],
+    multiprocess_mode='livesum'
+)
+
+
+class DatabasePoolCollector:
+    """Reports an engine's connection pool usage at scrape time."""
+
+    def __init__(self, engine: Any, name: str = 'default'):
+        self.engine = engine
+        self.name = name
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        pool = self.engine.pool
+        family = GaugeMetricFamily('db_pool_connections', 'Database connection pool usage',
+                                   labels=['pool', 'state'])
+        for state in ('size', 'checkedout', 'checkedin', 'overflow'):
+            reading = getattr(pool, state, None)
+            if reading is not None:
+                family.add_metric([self.name, state], float(reading()))
+        yield family
+
+
+def register_db_pool(engine: Any, name: str = 'default', registry: CollectorRegistry = REGISTRY):
+    """Export ``engine``'s pool usage as ``db_pool_connections``."""
+    registry.register(DatabasePoolCollector(engine, name))
+
+
+class RedisPoolCollector:
+    """Reports the connection usage of every ``RedisManager`` in the process."""
+
+    def __init__(self):
+        self.managers = []
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        family = GaugeMetricFamily('redis_pool_connections', 'Redis connection pool usage',
+                                   labels=['redis', 'pool', 'state'])
+        for manager in self.managers:
+            for pool, usage in manager.stats().items():
+                for state, value in usage.items():
+                    family.add_metric([manager.name, pool, state], float(value))
+        yield family
+
+
+_redis_pools: Optional[RedisPoolCollector] = None
+
+
+def register_redis_pool(manager: Any, registry: CollectorRegistry = REGISTRY):
+    """Export a ``RedisManager``'s pool usage as ``redis_pool_connections``."""
+    global _redis_pools
+    if _redis_pools is None:
+        _redis_pools = RedisPoolCollector()
+        registry.register(_redis_pools)
+    _redis_pools.managers.append(manager)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_REQUEST_LATENCY.labels(method, route).observe(seconds)
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str) -> Iterator[None]:
+    """Observe the wall time of the enclosed block on ``histogram``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(*labels).observe(time.perf_counter() - started)
+
+
+def timed_job(job: str) -> Callable:
+    """Decorator observing a job's run time on ``JOB_DURATION``.
+
+    The outcome is the ``status`` of the job's result dict, or ``error`` if it raises.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = func(*args, **kwargs)
+                if isinstance(result, dict):
+                    outcome = str(result.get('status', 'success'))
+                else:
+                    outcome = 'success'
+                return result
+            finally:
+                JOB_DURATION.labels(job, outcome).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def exposition_registry() -> CollectorRegistry:
+    """The registry to scrape: the process registry, or all processes' samples in multiprocess mode."""
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The text exposition of all metrics and its content type."""
+    return generate_latest(exposition_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(default_port: int) -> Optional[int]:
+    """Serve metrics on ``METRICS_PORT`` (or ``default_port``); ``0`` disables the sidecar."""
+    port = int(os.getenv('METRICS_PORT', default_port))
+    if not port:
+        return None
+    start_http_server(port, registry=exposition_registry())
+    return port
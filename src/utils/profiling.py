@@ -0,0 +1,117 @@
+"""On-demand profiling of a running process: sampled stacks and memory growth.
+
+``StackSampler`` polls every other thread's stack from its own thread and
+counts them in the collapsed ``frame;frame;frame count`` format read by
+flamegraph.pl, speedscope and inferno. ``memory_growth`` diffs two
+tracemalloc snapshots taken ``seconds`` apart. Nothing runs until a profile
+is requested, so the cost when unused is zero; the profiling surfaces are
+disabled unless ``PROFILING_TOKEN`` is set.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+class StackSampler:
+    """Samples the stacks of all other threads every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    @staticmethod
+    def _frame_name(frame: Any) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def sample(self):
+        """Take one sample of every thread except the calling one."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or names.get(ident, '').startswith('profiling-'):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def run(self, seconds: float):
+        """Sample for ``seconds`` on the calling thread."""
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            self.sample()
+            time.sleep(self.interval)
+
+    def folded(self) -> str:
+        """Collapsed stacks, one ``stack count`` line each, heaviest first."""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def memory_growth(seconds: float, top: int = 25) -> List[Dict[str, Any]]:
+    """Allocation growth by source line over ``seconds``, largest first.
+
+    Tracing only starts here if it is not already running, so only
+    allocations made during the window are seen in that case.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+    return [
+        {
+            'location': str(stat.traceback[0]),
+            'size_diff': stat.size_diff,
+            'size': stat.size,
+            'count_diff': stat.count_diff,
+        }
+        for stat in after.compare_to(before, 'lineno')[:top]
+    ]
+
+
+def profile(seconds: float, interval: float = 0.005, memory: bool = True) -> Dict[str, Any]:
+    """Sample stacks for ``seconds`` and, with ``memory``, diff allocations over the same window."""
+    seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+    sampler = StackSampler(interval)
+    growth: List[Dict[str, Any]] = []
+    if memory:
+        tracker = threading.Thread(target=lambda: growth.extend(memory_growth(seconds)),
+                                   name='profiling-memory', daemon=True)
+        tracker.start()
+    sampler.run(seconds)
+    if memory:
+        tracker.join()
+    return {
+        'seconds': seconds,
+        'interval': interval,
+        'samples': sampler.samples,
+        'folded': sampler.folded(),
+        'memory': growth,
+    }
+
+
+def profiling_token() -> Optional[str]:
+    """The admin token guarding profiling, or None when profiling is disabled."""
+    return os.getenv('PROFILING_TOKEN') or None
+
+
+def authorized(token: Optional[str]) -> bool:
+    expected = profiling_token()
+    return expected is not None and token is not None and hmac.compare_digest(expected, token)
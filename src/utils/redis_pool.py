@@ -0,0 +1,112 @@
+"""Shared Redis connection pools, configured from ``Settings.REDIS_URL``.
+
+Every process keeps one ``RedisManager`` per URL. Sync clients share a
+single thread-safe pool; async clients share one pool per event loop, since
+asyncio connections cannot move between loops. Clients are cheap views
+onto those pools, so callers ask for one wherever they need it instead of
+opening their own connections.
+"""
+import asyncio
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import redis
+import redis.asyncio as redis_async
+
+
+class RedisManager:
+    """Owns the sync and async connection pools for one Redis URL."""
+
+    def __init__(self, url: str, max_connections: int = 64, health_check_interval: int = 30,
+                 socket_timeout: Optional[float] = None, socket_connect_timeout: float = 2.0):
+        # No read timeout by default: pub/sub listeners legitimately block
+        # for long stretches, and the health check keeps idle sockets honest
+        self.url = url
+        self._options = {
+            'max_connections': max_connections,
+            'health_check_interval': health_check_interval,
+            'socket_timeout': socket_timeout,
+            'socket_connect_timeout': socket_connect_timeout,
+            'socket_keepalive': True,
+        }
+        self.pool = redis.ConnectionPool.from_url(url, **self._options)
+        # Metric label without credentials
+        kwargs = self.pool.connection_kwargs
+        self.name = f"{kwargs.get('host', 'localhost')}:{kwargs.get('port', 6379)}/{kwargs.get('db', 0)}"
+        self._async_pools: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def client(self) -> redis.Redis:
+        """A client on the shared sync pool."""
+        return redis.Redis(connection_pool=self.pool)
+
+    def async_pool(self) -> redis_async.ConnectionPool:
+        loop = asyncio.get_running_loop()
+        pool = self._async_pools.get(loop)
+        if pool is None:
+            pool = self._async_pools[loop] = redis_async.ConnectionPool.from_url(self.url, **self._options)
+        return pool
+
+    def async_client(self) -> redis_async.Redis:
+        """A client on the running event loop's async pool."""
+        return redis_async.Redis(connection_pool=self.async_pool())
+
+    def health(self) -> Dict[str, Any]:
+        """Ping Redis; reports reachability and round-trip latency."""
+        started = time.perf_counter()
+        try:
+            self.client().ping()
+        except redis.RedisError as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, 'latency_ms': (time.perf_counter() - started) * 1000}
+
+    async def async_health(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await self.async_client().ping()
+        except redis.RedisError as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, 'latency_ms': (time.perf_counter() - started) * 1000}
+
+    @staticmethod
+    def _usage(pool: Any) -> Dict[str, int]:
+        in_use = len(getattr(pool, '_in_use_connections', ()))
+        idle = len(getattr(pool, '_available_connections', ()))
+        return {'in_use': in_use, 'idle': idle, 'max': pool.max_connections}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Connection counts of the sync pool and of the async pools summed over event loops."""
+        stats = {'sync': self._usage(self.pool)}
+        async_pools = list(self._async_pools.values())
+        if async_pools:
+            usage = [self._usage(pool) for pool in async_pools]
+            stats['async'] = {key: sum(u[key] for u in usage) for key in ('in_use', 'idle', 'max')}
+        return stats
+
+    def close(self):
+        """Disconnect the sync pool; async pools close with their event loops."""
+        self.pool.disconnect()
+
+
+@lru_cache()
+def get_redis_manager(url: Optional[str] = None) -> RedisManager:
+    """The process-wide manager for ``url``, defaulting to ``get_settings().REDIS_URL``."""
+    if url is None:
+        from src.config import get_settings
+        return get_redis_manager(get_settings().REDIS_URL)
+    manager = RedisManager(url)
+    from src.utils.metrics import register_redis_pool
+    register_redis_pool(manager)
+    return manager
+
+
+def get_redis(url: Optional[str] = None) -> redis.Redis:
+    """A sync client on the shared pool."""
+    return get_redis_manager(url).client()
+
+
+def get_async_redis(url: Optional[str] = None) -> redis_async.Redis:
+    """An async client on the shared pool of the running event loop."""
+    return get_redis_manager(url).async_client()
@@ -0,0 +1,281 @@
+"""Lightweight sampled tracing for hot paths, exported as OTLP JSON.
+
+Code is instrumented with ``span`` (a context manager) or ``traced`` (a
+decorator for sync and async functions). Whether a trace is recorded is
+decided once, at its root span, with probability ``sample_rate``; child
+spans follow that decision. With ``sample_rate=0`` (the default) ``span``
+returns a shared no-op object, so disabled tracing costs one attribute check.
+
+Finished traces are handed to an exporter as OTLP ``ExportTraceServiceRequest``
+JSON: ``JsonLinesExporter`` appends one request per line to a file (the
+format of the OpenTelemetry collector's file exporter and receiver) and
+``OtlpHttpExporter`` posts to a collector's ``/v1/traces`` endpoint.
+"""
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+_current: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ('tracer', 'name', 'trace_id', 'span_id', 'parent_id', 'attributes',
+                 'start_ns', 'end_ns', 'error', 'children', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        # Finished spans of the whole trace, collected on the root
+        self.children: List['Span'] = parent.children if parent is not None else []
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def update_name(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> 'Span':
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.children.append(self)
+        if self.parent_id is None:
+            self.tracer.export(self.children)
+        return False
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id is not None:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when the trace is not sampled."""
+
+    __slots__ = ('_token',)
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def update_name(self, name: str):
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+
+class _DisabledSpan:
+    """Returned while tracing is off; touches no context at all."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def update_name(self, name: str):
+        pass
+
+    def __enter__(self) -> '_DisabledSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_DISABLED = _DisabledSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+def otlp_request(service_name: str, spans: List[Span]) -> Dict[str, Any]:
+    """Wrap spans in an OTLP ``ExportTraceServiceRequest``."""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+            'scopeSpans': [{
+                'scope': {'name': 'src.utils.tracing'},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]
+    }
+
+
+class JsonLinesExporter:
+    """Appends one OTLP JSON request per trace to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, request: Dict[str, Any]):
+        line = json.dumps(request, separators=(',', ':'))
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+
+
+class OtlpHttpExporter:
+    """Posts OTLP JSON to a collector from a background thread, dropping traces when it falls behind."""
+
+    def __init__(self, endpoint: str, max_queue: int = 1000, timeout: float = 2.0):
+        self.endpoint = endpoint.rstrip('/') + '/v1/traces' if not endpoint.endswith('/v1/traces') else endpoint
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(max_queue)
+        self._pid: Optional[int] = None
+
+    def export(self, request: Dict[str, Any]):
+        # Started lazily, and again after a fork (prefork Celery children)
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._drain, name='otlp-exporter', daemon=True).start()
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self):
+        while True:
+            request = self._queue.get()
+            body = json.dumps(request).encode()
+            http_request = urllib.request.Request(self.endpoint, data=body,
+                                                  headers={'Content-Type': 'application/json'})
+            try:
+                urllib.request.urlopen(http_request, timeout=self.timeout).close()
+            except Exception:
+                self.dropped += 1
+
+
+class Tracer:
+    """Creates spans and exports sampled traces."""
+
+    def __init__(self, service_name: str = 'trading-system', sample_rate: float = 0.0, exporter: Any = None):
+        self.configure(service_name, sample_rate, exporter)
+
+    def configure(self, service_name: str, sample_rate: float, exporter: Any = None):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.service_name = service_name
+        self.sample_rate = sample_rate if exporter is not None else 0.0
+        self.exporter = exporter
+
+    def span(self, name: str, **attributes: Any):
+        """Context manager timing ``name``; a root span makes the sampling decision for its trace."""
+        if not self.sample_rate:
+            return _DISABLED
+        parent = _current.get()
+        if parent is None:
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return _NoopSpan()
+        elif isinstance(parent, _NoopSpan):
+            # Unsampled trace: children need not touch the context either
+            return _DISABLED
+        return Span(self, name, parent, attributes)
+
+    def export(self, spans: List[Span]):
+        try:
+            self.exporter.export(otlp_request(self.service_name, spans))
+        except Exception:
+            # Tracing must never break the code it observes
+            pass
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes: Any):
+    """Time a block on the process tracer: ``with span('db.commit'): ...``."""
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> Optional[Any]:
+    return _current.get()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator wrapping every call of a sync or async function in a span."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_tracing(service_name: str) -> Tracer:
+    """Configure the process tracer from the environment.
+
+    ``TRACE_SAMPLE_RATE`` is the fraction of traces recorded (default 0, off).
+    Sampled traces go to ``TRACE_EXPORT_URL`` (an OTLP/HTTP collector) when set,
+    otherwise appended to ``TRACE_EXPORT_PATH`` (default ``traces.jsonl``).
+    """
+    sample_rate = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    exporter = None
+    if sample_rate:
+        url = os.getenv('TRACE_EXPORT_URL')
+        exporter = OtlpHttpExporter(url) if url else JsonLinesExporter(os.getenv('TRACE_EXPORT_PATH', 'traces.jsonl'))
+    tracer.configure(service_name, sample_rate, exporter)
+    return tracer
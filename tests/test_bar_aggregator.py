@@ -0,0 +1,81 @@
+"""Tests for tick-to-bar aggregation."""
+import json
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from src.data.bar_store import BarStore
+from src.data.bars import BarAggregator, BarRingBuffer, parse_tick, NS_PER_SECOND
+from services.bar_aggregator.aggregator import BarAggregatorService
+
+START = int(np.datetime64('2024-01-01T12:00:00', 'ns').astype(np.int64))
+
+class RecordingRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+def test_ring_buffer_keeps_most_recent_bars():
+    buffer = BarRingBuffer(3)
+    for i in range(5):
+        buffer.append(i, i, i, i, float(i), 1.0)
+
+    assert len(buffer) == 3
+    np.testing.assert_array_equal(buffer.columns()['close'], [2.0, 3.0, 4.0])
+    np.testing.assert_array_equal(buffer.columns(last=2)['timestamp'], [3, 4])
+    assert list(buffer.to_frame().columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def test_one_minute_bars_from_second_ticks():
+    aggregator = BarAggregator(timeframes=('1m',))
+    prices = [100.0 + i % 7 for i in range(121)]
+    completed = []
+    for i, price in enumerate(prices):
+        completed += aggregator.on_tick('AAPL', START + i * NS_PER_SECOND, price, 1.0)
+
+    assert len(completed) == 2
+    first = completed[0]
+    assert first['open'] == prices[0]
+    assert first['high'] == max(prices[:60])
+    assert first['low'] == min(prices[:60])
+    assert first['close'] == prices[59]
+    assert first['volume'] == 60.0
+    assert first['ticks'] == 60
+
+    frame = aggregator.frame('AAPL', '1m')
+    assert len(frame) == 2
+    assert frame['close'].iloc[-1] == prices[119]
+
+def test_close_stale_completes_idle_symbols():
+    aggregator = BarAggregator(timeframes=('1s', '1m'))
+    aggregator.on_tick('XOM', START, 100.0, 1.0)
+
+    closed = aggregator.close_stale(START + 2 * NS_PER_SECOND)
+    assert [(bar['symbol'], bar['timeframe']) for bar in closed] == [('XOM', '1s')]
+
+def test_unknown_timeframe_rejected():
+    with pytest.raises(ValueError):
+        BarAggregator(timeframes=('3m',))
+
+def test_parse_simulator_messages():
+    now = datetime(2024, 1, 1, 12)
+    equity = {'symbol': 'AAPL', 'price': 180.0, 'timestamp': now.isoformat(), 'volume': 2.0}
+    futures = {'contract': {'symbol': 'BTC-PERP', 'price': 50000.0}, 'timestamp': now.isoformat(), 'volume': 3.0}
+
+    assert parse_tick('market_data', equity) == ('AAPL', START, 180.0, 2.0)
+    assert parse_tick('futures_market_data', futures) == ('BTC-PERP', START, 50000.0, 3.0)
+
+def test_service_publishes_and_persists_bars(tmp_path):
+    store = BarStore(str(tmp_path))
+    service = BarAggregatorService('redis://localhost:6379', timeframes=('1s',), bar_store=store)
+    service.redis = RecordingRedis()
+
+    now = datetime(2024, 1, 1, 12)
+    for i in range(3):
+        update = {'symbol': 'MSFT', 'price': 350.0 + i, 'timestamp': (now + timedelta(seconds=i)).isoformat(), 'volume': 1.0}
+        service.handle_message('market_data', json.dumps(update).encode())
+    assert service.handle_message('market_data', b'not json') == []
+
+    channels = [channel for channel, _ in service.redis.published]
+    assert channels == ['bars:1s', 'bars:1s']
+    np.testing.assert_array_equal(store.read('MSFT', timeframe='1s')['close'], [350.0, 351.0])
@@ -0,0 +1,133 @@
+"""Tests for the columnar bar store."""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+from src.data.bar_store import BarStore, TickWriter
+from src.risk.risk_manager import RiskManager
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(str(tmp_path))
+
+def make_bars(start, periods, freq='1min', seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, periods))
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=periods, freq=freq),
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': rng.exponential(5.0, periods),
+    })
+
+def test_append_and_read_round_trip(store):
+    bars = make_bars('2024-01-01 00:00', 120)
+    assert store.append('BTC/USDT', bars) == 120
+
+    df = store.read_frame('BTC/USDT')
+    pd.testing.assert_frame_equal(df, bars)
+    assert store.symbols() == ['BTC/USDT']
+
+def test_partitions_by_day_and_reads_across_them(store):
+    bars = make_bars('2024-01-01 23:00', 180)
+    store.append('ETH/USDT', bars)
+
+    assert store.partitions('ETH/USDT') == ['2024-01-01', '2024-01-02']
+    window = store.read('ETH/USDT', start=datetime(2024, 1, 1, 23, 30), end=datetime(2024, 1, 2, 0, 30))
+    assert len(window['close']) == 60
+    np.testing.assert_array_equal(window['close'], bars['close'].to_numpy()[30:90])
+
+def test_single_partition_read_is_zero_copy(store):
+    store.append('AAPL', make_bars('2024-01-01 09:30', 390))
+    window = store.read('AAPL', start=datetime(2024, 1, 1, 10), end=datetime(2024, 1, 1, 11))
+
+    assert len(window['close']) == 60
+    assert isinstance(window['close'].base, np.memmap) or isinstance(window['close'], np.memmap)
+
+def test_overlapping_appends_are_deduplicated(store):
+    bars = make_bars('2024-01-01 00:00', 100)
+    store.append('SOL/USDT', bars.iloc[:60])
+    assert store.append('SOL/USDT', bars.iloc[40:]) == 40
+
+    pd.testing.assert_frame_equal(store.read_frame('SOL/USDT'), bars)
+    assert store.last_timestamp('SOL/USDT') == bars['timestamp'].iloc[-1].to_pydatetime()
+
+def test_torn_append_is_repaired(tmp_path):
+    store = BarStore(str(tmp_path))
+    bars = make_bars('2024-01-01 00:00', 10)
+    store.append('MSFT', bars.iloc[:5])
+
+    # Simulate a crash that wrote the close column but not the timestamp
+    partition = os.path.join(str(tmp_path), '1m', 'MSFT', '2024-01-01')
+    with open(os.path.join(partition, 'close.bin'), 'ab') as f:
+        f.write(np.zeros(3).tobytes())
+
+    reopened = BarStore(str(tmp_path))
+    assert len(reopened.read('MSFT')['close']) == 5
+    reopened.append('MSFT', bars.iloc[5:])
+    pd.testing.assert_frame_equal(reopened.read_frame('MSFT'), bars)
+
+def test_append_ticks_from_simulator_updates(store):
+    now = datetime(2024, 1, 1, 12)
+    timestamps = [(now + timedelta(seconds=i)).isoformat() for i in range(3)]
+    store.append_ticks('XOM', timestamps, [100.0, 101.0, 99.5], [1.0, 2.0, 3.0])
+
+    ticks = store.read('XOM', timeframe='tick')
+    np.testing.assert_array_equal(ticks['close'], [100.0, 101.0, 99.5])
+    np.testing.assert_array_equal(ticks['high'], ticks['low'])
+
+def test_tick_writer_appends_each_symbol_once_per_flush(store, monkeypatch):
+    calls = []
+    append_ticks = store.append_ticks
+    monkeypatch.setattr(store, 'append_ticks', lambda symbol, *args: calls.append(symbol) or append_ticks(symbol, *args))
+    writer = TickWriter(store, flush_interval=60)
+    start = datetime(2024, 1, 2, 9, 30)
+    for second in range(5):
+        for symbol, price in (('AAPL', 190.0), ('MSFT', 370.0)):
+            writer.add(symbol, (start + timedelta(seconds=second)).isoformat(), price + second, 1.0)
+    assert writer.pending == 10
+    assert store.partitions('AAPL', timeframe='tick') == []
+
+    writer.close()
+
+    assert sorted(calls) == ['AAPL', 'MSFT']
+    assert writer.pending == 0
+    assert store.read('MSFT', timeframe='tick')['close'].tolist() == [370.0, 371.0, 372.0, 373.0, 374.0]
+
+def test_tick_writer_keeps_ticks_until_they_are_written(store, monkeypatch):
+    append_ticks = store.append_ticks
+    failures = [OSError("disk full")]
+
+    def flaky_append_ticks(symbol, *args):
+        if failures:
+            raise failures.pop()
+        return append_ticks(symbol, *args)
+
+    monkeypatch.setattr(store, 'append_ticks', flaky_append_ticks)
+    writer = TickWriter(store, flush_interval=60)
+    start = datetime(2024, 1, 2, 9, 30)
+    writer.add('AAPL', start.isoformat(), 190.0, 1.0)
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.add('AAPL', (start + timedelta(seconds=1)).isoformat(), 191.0, 1.0)
+    assert writer.pending == 2
+
+    writer.close()
+
+    assert writer.pending == 0
+    assert store.read('AAPL', timeframe='tick')['close'].tolist() == [190.0, 191.0]
+
+def test_var_from_store(store):
+    store.append('AAPL', make_bars('2024-01-01', 500, seed=1))
+    store.append('MSFT', make_bars('2024-01-01', 500, seed=2))
+    positions = {'AAPL': 10.0, 'MSFT': -5.0}
+
+    price_history = store.read_closes(list(positions))
+    manager = RiskManager({})
+    pd.testing.assert_series_equal(
+        manager.calculate_var_from_store(positions, store),
+        manager.calculate_var(positions, price_history)
+    )
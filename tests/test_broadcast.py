@@ -0,0 +1,226 @@
+"""Tests for the websocket fan-out of Redis reads."""
+import asyncio
+import json
+import pytest
+from src.api import broadcast
+from src.api.broadcast import ChannelFanout, StreamFanout, Subscription, serve
+from src.api.routes import trading
+
+def event_fields(event_id, account_id=1):
+    return {b'event_id': str(event_id).encode(), b'type': b'order.filled', b'order_id': b'7',
+            b'account_id': str(account_id).encode(), b'created_at': b'2024-01-02T00:00:00',
+            b'order': json.dumps({'id': 7}).encode()}
+
+class AsyncStreamRedis:
+    """Just enough of an async Redis stream, counting XREADs."""
+
+    def __init__(self):
+        self.entries = []
+        self.xreads = 0
+
+    def add(self, account_id=1):
+        entry_id = f"{len(self.entries) + 1}-0".encode()
+        self.entries.append((entry_id, event_fields(len(self.entries) + 1, account_id)))
+        return entry_id.decode()
+
+    def _after(self, entry_id):
+        ms = int(entry_id.lstrip('(').split('-')[0])
+        return [entry for entry in self.entries if int(entry[0].split(b'-')[0]) > ms]
+
+    async def xrevrange(self, stream, count=None):
+        return self.entries[::-1][:count]
+
+    async def xrange(self, stream, min='-', max='+', count=None):
+        return self._after(min)[:count]
+
+    async def xread(self, streams, count=None, block=None):
+        self.xreads += 1
+        (stream, last_id), = streams.items()
+        await asyncio.sleep(block / 1000)
+        entries = self._after(last_id)[:count]
+        return [[stream.encode(), entries]] if entries else []
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.channels = set()
+        self.messages = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.messages.get(), 0.01)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        self.closed = True
+
+class AsyncPubSubRedis:
+    """Just enough of async Redis pub/sub, counting connections."""
+
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self):
+        self.pubsubs.append(FakePubSub(self))
+        return self.pubsubs[-1]
+
+    def publish(self, channel, data):
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels and not pubsub.closed:
+                pubsub.messages.put_nowait({'type': 'message', 'channel': channel.encode(), 'data': data.encode()})
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self.disconnected = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {'type': 'websocket.disconnect'}
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+async def settle():
+    await asyncio.sleep(0.05)
+
+@pytest.mark.asyncio
+async def test_clients_share_one_stream_reader():
+    redis = AsyncStreamRedis()
+    redis.add()
+    fanout = StreamFanout(lambda: redis, block_ms=10)
+    first = await fanout.subscribe('/test')
+    second = await fanout.subscribe('/test')
+    redis.add()
+
+    assert (await first.get())[0] == '2-0'
+    assert (await second.get())[1]['event_id'] == 2
+    reads = redis.xreads
+    await asyncio.sleep(0.03)
+    # One loop of reads for both clients
+    assert redis.xreads - reads <= 4
+
+    fanout.unsubscribe(first)
+    fanout.unsubscribe(second)
+    await settle()
+    assert fanout._reader is None
+    assert await first.get() is None
+
+@pytest.mark.asyncio
+async def test_a_client_too_far_behind_is_closed():
+    subscription = Subscription('/test', maxsize=2)
+    for message in range(3):
+        subscription.put(message)
+    websocket = FakeWebSocket()
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await serve(websocket, subscription, send)
+
+    assert sent == []
+    assert websocket.closed_with == broadcast.TRY_AGAIN_LATER
+
+@pytest.mark.asyncio
+async def test_order_updates_stop_when_the_client_disconnects(monkeypatch):
+    redis = AsyncStreamRedis()
+    fanout = StreamFanout(lambda: redis, block_ms=10)
+    monkeypatch.setattr(trading, 'stream_fanout', lambda: fanout)
+    websocket = FakeWebSocket()
+    handler = asyncio.create_task(trading.order_updates_websocket(websocket, account_id=None, last_id=None))
+    await settle()
+    redis.add()
+    await settle()
+
+    websocket.disconnected.set()
+    await asyncio.wait_for(handler, 1)
+    await settle()
+
+    assert [message['stream_id'] for message in websocket.sent] == ['1-0']
+    assert fanout._subscribers == set()
+    assert fanout._reader is None
+
+@pytest.mark.asyncio
+async def test_order_updates_resume_after_last_id_without_repeats(monkeypatch):
+    redis = AsyncStreamRedis()
+    for account_id in (1, 2, 1, 1):
+        redis.add(account_id)
+    fanout = StreamFanout(lambda: redis, block_ms=10, count=2)
+    monkeypatch.setattr(trading, 'stream_fanout', lambda: fanout)
+    websocket = FakeWebSocket()
+    handler = asyncio.create_task(trading.order_updates_websocket(websocket, account_id=1, last_id='1-0'))
+    await settle()
+    redis.add(1)
+    await settle()
+    websocket.disconnected.set()
+    await asyncio.wait_for(handler, 1)
+
+    assert [message['stream_id'] for message in websocket.sent] == ['3-0', '4-0', '5-0']
+
+@pytest.mark.asyncio
+async def test_a_malformed_last_id_closes_the_socket(monkeypatch):
+    redis = AsyncStreamRedis()
+    fanout = StreamFanout(lambda: redis, block_ms=10)
+    monkeypatch.setattr(trading, 'stream_fanout', lambda: fanout)
+    websocket = FakeWebSocket()
+
+    await asyncio.wait_for(trading.order_updates_websocket(websocket, account_id=None, last_id='latest'), 1)
+
+    assert websocket.closed_with == 1000
+    assert websocket.sent == []
+    assert fanout._reader is None
+
+@pytest.mark.asyncio
+async def test_a_slow_market_data_client_loses_its_oldest_messages():
+    subscription = Subscription('/test', maxsize=2, drop_oldest=True)
+    for message in range(3):
+        subscription.put(message)
+
+    assert not subscription.overflowed
+    assert [await subscription.get(), await subscription.get()] == [1, 2]
+
+@pytest.mark.asyncio
+async def test_market_data_clients_share_one_pubsub_connection(monkeypatch):
+    redis = AsyncPubSubRedis()
+    fanout = ChannelFanout(lambda: redis)
+    monkeypatch.setattr(trading, 'channel_fanout', lambda: fanout)
+    first, second = FakeWebSocket(), FakeWebSocket()
+    handlers = [asyncio.create_task(trading.market_data_websocket(websocket)) for websocket in (first, second)]
+    equities = await fanout.subscribe('market_data:equity', '/test')
+    await settle()
+    redis.publish('futures_market_data', '{"symbol": "ES"}')
+    redis.publish('market_data:equity', '{"symbol": "AAPL"}')
+    await settle()
+
+    assert len(redis.pubsubs) == 1
+    assert redis.pubsubs[0].channels == {'futures_market_data', 'market_data:equity'}
+    assert first.sent == second.sent == [{'symbol': 'ES'}]
+    assert await equities.get() == '{"symbol": "AAPL"}'
+
+    await fanout.unsubscribe('market_data:equity', equities)
+    first.disconnected.set()
+    await asyncio.wait_for(handlers[0], 1)
+    assert redis.pubsubs[0].channels == {'futures_market_data'}
+
+    second.disconnected.set()
+    await asyncio.wait_for(handlers[1], 1)
+    await settle()
+    assert redis.pubsubs[0].channels == set()
+    assert redis.pubsubs[0].closed
+    assert fanout._reader is None
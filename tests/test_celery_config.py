@@ -0,0 +1,56 @@
+"""Tests for Celery queues, routing and worker profiles."""
+import pytest
+from celery import Celery
+from services.worker import celeryconfig
+from services.worker.celeryconfig import apply_worker_profile, celery_config
+from services.worker.tasks import calculate_portfolio_metrics, celery, execute_order, process_corporate_actions
+
+def route(task_name):
+    options = celery.amqp.router.route({}, task_name)
+    return options['queue'].name, options.get('priority')
+
+def test_orders_have_their_own_priority_lane():
+    assert route('worker.tasks.execute_order') == ('orders', celeryconfig.ORDER_PRIORITY)
+    assert route('worker.tasks.process_corporate_actions') == ('batch', celeryconfig.BATCH_PRIORITY)
+    assert route('worker.tasks.calculate_portfolio_metrics') == ('batch', celeryconfig.BATCH_PRIORITY)
+    assert route('worker.tasks.unrouted')[0] == 'default'
+    assert celeryconfig.ORDER_PRIORITY < celeryconfig.BATCH_PRIORITY  # Redis serves 0 first
+
+def test_queues_do_not_share_a_routing_key():
+    queues = celery.conf.task_queues
+    assert len({queue.routing_key for queue in queues}) == len(queues)
+
+def test_task_acknowledgement_and_results():
+    assert execute_order.acks_late and execute_order.reject_on_worker_lost
+    assert not execute_order.ignore_result
+    assert process_corporate_actions.ignore_result and calculate_portfolio_metrics.ignore_result
+    assert celery.conf.result_expires == celeryconfig.RESULT_EXPIRES
+
+@pytest.mark.parametrize('profile, queues', [
+    ('orders', ['orders']),
+    ('batch', ['batch', 'default']),
+    ('all', ['orders', 'default', 'batch']),
+])
+def test_worker_profiles_select_queues(profile, queues):
+    app = Celery('profile-test')
+    app.conf.update(**celery_config('redis://127.0.0.1:1/0'))
+
+    assert apply_worker_profile(app, profile) == queues
+    assert list(app.amqp.queues.consume_from) == queues
+    assert app.conf.worker_prefetch_multiplier == 1
+
+def test_orders_profile_sets_concurrency():
+    app = Celery('profile-test')
+    app.conf.update(**celery_config('redis://127.0.0.1:1/0'))
+    apply_worker_profile(app, 'orders')
+    assert app.conf.worker_concurrency == celeryconfig.WORKER_PROFILES['orders']['concurrency']
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        celeryconfig.worker_profile('fills')
+
+def test_load_test_orders_use_the_orders_lane():
+    from src.loadtest.order_load import CeleryExecutor
+    executor = CeleryExecutor('redis://localhost:6379/0')
+    options = executor.app.amqp.router.route({}, executor.task_name)
+    assert (options['queue'].name, options.get('priority')) == ('orders', celeryconfig.ORDER_PRIORITY)
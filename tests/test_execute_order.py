@@ -0,0 +1,127 @@
+"""Tests for order execution in the worker."""
+import json
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from services.worker import tasks
+from src.database.models.account import Account, Position
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide, OrderStatus, OrderType
+from src.database.models.order import Order, OrderEvent, Trade, TradeFill
+from src.execution.position_keeper import PositionKeeper
+from src.execution.trade_journal import TradeJournal
+
+class QuoteRedis:
+    def __init__(self):
+        self.quotes = {}
+
+    def get(self, key):
+        return self.quotes.get(key)
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert().values(id=1, symbol='AAPL', name='Apple', type=InstrumentType.EQUITY))
+    db.add(Order(id=1, account_id=1, instrument_id=1, type=OrderType.MARKET, side=OrderSide.BUY,
+                 status=OrderStatus.PENDING, quantity=2))
+    db.commit()
+    db.close()
+
+    def get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(tasks, 'get_db', get_db)
+    return factory
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = QuoteRedis()
+    monkeypatch.setattr(tasks, 'get_redis', lambda url=None: redis)
+    return redis
+
+@pytest.fixture
+def worker(tmp_path, session_factory, monkeypatch):
+    # Nothing is inserted during the test unless flushed
+    positions = PositionKeeper(session_factory)
+    journal = TradeJournal(str(tmp_path / 'wal'), session_factory, flush_interval=60, positions=positions)
+    monkeypatch.setattr(tasks, 'journal', journal)
+    monkeypatch.setattr(tasks, 'positions', positions)
+    yield journal, positions
+    journal.stop()
+
+def test_failed_order_update_is_retried_with_the_journaled_fill(session_factory, redis, worker, monkeypatch):
+    journal, positions = worker
+    redis.quotes['quote:AAPL'] = json.dumps({'price': 100.0})
+    record_order_event = tasks.record_order_event
+    failures = [Exception("outbox unavailable")]
+
+    def flaky_record_order_event(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        record_order_event(*args, **kwargs)
+
+    monkeypatch.setattr(tasks, 'record_order_event', flaky_record_order_event)
+
+    # Called directly, the retry re-raises; on a worker it is scheduled
+    with pytest.raises(Exception, match="outbox unavailable"):
+        tasks.execute_order(1)
+    db = session_factory()
+    assert db.get(Order, 1).status == OrderStatus.PENDING
+    db.close()
+
+    redis.quotes['quote:AAPL'] = json.dumps({'price': 120.0})
+    assert tasks.execute_order(1) == {"status": "success", "fill_id": "order-1", "filled_price": 100.0}
+    journal.flush()
+
+    db = session_factory()
+    assert db.get(Order, 1).status == OrderStatus.FILLED
+    assert [(t.fill_id, t.price) for t in db.query(Trade)] == [('order-1', Decimal('100'))]
+    event = db.query(OrderEvent).one()
+    assert (event.type, event.payload['filled_price']) == ('order.filled', 100.0)
+    position = db.query(Position).one()
+    assert (position.quantity, position.average_entry_price) == (2, 100)
+    db.close()
+
+def test_redelivered_order_reuses_the_stored_fill(session_factory, redis, worker):
+    journal, positions = worker
+    redis.quotes['quote:AAPL'] = json.dumps({'price': 120.0})
+    db = session_factory()
+    order = db.get(Order, 1)
+    db.add(Trade(fill_id='order-1', order_id=1, account_id=1, instrument_id=1, quantity=2,
+                 price=Decimal('99.5'), side=OrderSide.BUY, executed_at=order.created_at))
+    db.add(TradeFill(fill_id='order-1', executed_at=order.created_at))
+    db.commit()
+    db.close()
+
+    assert tasks.execute_order(1)["filled_price"] == 99.5
+    assert journal.pending == 0
+    assert tasks.execute_order(1)["status"] == "skipped"
+
+def test_order_is_retried_while_the_journal_cannot_start(session_factory, redis, worker, monkeypatch):
+    journal, positions = worker
+    redis.quotes['quote:AAPL'] = json.dumps({'price': 100.0})
+    start = journal.start
+    failures = [Exception("database is down")]
+
+    def flaky_start():
+        if failures:
+            raise failures.pop()
+        return start()
+
+    monkeypatch.setattr(journal, 'start', flaky_start)
+
+    with pytest.raises(Exception, match="database is down"):
+        tasks.execute_order(1)
+    db = session_factory()
+    assert db.get(Order, 1).status == OrderStatus.PENDING
+    db.close()
+
+    assert tasks.execute_order(1)['status'] == 'success'
@@ -0,0 +1,73 @@
+"""Tests for the correlated factor simulation mode."""
+import numpy as np
+import pytest
+from services.market_simulator.factor_model import FactorModel, sector_correlation, synthetic_equities
+from services.market_simulator.market_simulator import MarketSimulator
+
+def test_sector_correlation_structure():
+    corr = sector_correlation(['Tech', 'Tech', 'Energy'], intra=0.6, inter=0.2)
+    np.testing.assert_array_equal(corr, [[1.0, 0.6, 0.2], [0.6, 1.0, 0.2], [0.2, 0.2, 1.0]])
+
+def test_returns_follow_beta_and_correlation():
+    betas = np.array([0.5, 1.0, 2.0, 1.0])
+    model = FactorModel(betas, ['A', 'A', 'B', 'B'], market_vol=0.01, residual_vol=0.001,
+                        rng=np.random.default_rng(0))
+    steps = [model.step() for _ in range(20000)]
+    market = np.array([s[0] for s in steps])
+    returns = np.array([s[1] for s in steps])
+
+    estimated_betas = [np.cov(returns[:, i], market)[0, 1] / market.var(ddof=1) for i in range(4)]
+    np.testing.assert_allclose(estimated_betas, betas, atol=0.02)
+
+    residuals = returns - np.outer(market, betas)
+    corr = np.corrcoef(residuals.T)
+    assert corr[0, 1] == pytest.approx(0.5, abs=0.03)
+    assert corr[0, 2] == pytest.approx(0.1, abs=0.03)
+
+def test_factor_mode_steps_every_instrument():
+    simulator = MarketSimulator('redis://localhost:6379', mode='factor', seed=1,
+                                extra_equities=synthetic_equities(500, seed=1))
+    before = dict(simulator.prices)
+    updates = simulator.generate_factor_updates()
+
+    assert [u['symbol'] for u in updates] == simulator.symbols
+    assert len(updates) == 508
+    assert simulator.market_return != 0.0
+    assert all(u['price'] != before[u['symbol']] for u in updates if not u['symbol'].startswith(('T-', 'CORP')))
+    assert simulator.yield_curve.rates[0] == pytest.approx(0.04 + simulator.factor_model.rate_shift)
+    for bond in simulator.bonds:
+        assert simulator.prices[bond.symbol] == bond.price
+
+def test_rates_up_means_bond_prices_down():
+    simulator = MarketSimulator('redis://localhost:6379', mode='factor')
+    simulator.factor_model.rate_vol = 0.0
+    simulator.factor_model.rate_shift = 0.01
+    simulator.factor_model.rate_reversion = 0.0
+    before = {b.symbol: b.price for b in simulator.bonds}
+    simulator.generate_factor_updates()
+    assert all(b.price < before[b.symbol] for b in simulator.bonds)
+
+def test_factor_steps_scale_with_the_interval():
+    shifts = []
+    for interval in (1.0, 4.0):
+        simulator = MarketSimulator('redis://localhost:6379', mode='factor', seed=2, interval=interval)
+        simulator.generate_factor_updates()
+        shifts.append(simulator.factor_model.rate_shift)
+    # Same shocks from a zero shift, so its move grows with the square root of the interval
+    assert shifts[1] == pytest.approx(2 * shifts[0])
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        MarketSimulator('redis://localhost:6379', mode='chaos')
+
+def test_explicit_correlation_is_used():
+    corr = sector_correlation(['A', 'A', 'B'], intra=0.8, inter=0.0)
+    model = FactorModel([1.0, 1.0, 1.0], ['A', 'A', 'B'], correlation=corr, rng=np.random.default_rng(0))
+    residuals = np.array([model.residuals(model.rng.standard_normal(3)) for _ in range(20000)])
+    observed = np.corrcoef(residuals.T)
+    assert observed[0, 1] == pytest.approx(0.8, abs=0.03)
+    assert observed[0, 2] == pytest.approx(0.0, abs=0.03)
+
+def test_gbm_mode_skips_the_factor_model():
+    simulator = MarketSimulator('redis://localhost:6379', extra_equities=synthetic_equities(10))
+    assert simulator.factor_model is None
@@ -0,0 +1,75 @@
+"""Tests for vectorised bond pricing."""
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from services.market_simulator.fixed_income import BondUniverse, YieldCurve, price_from_yield
+from services.market_simulator.instruments import Bond
+from services.market_simulator.market_simulator import MarketSimulator
+
+CURVE = {1: 0.04, 2: 0.042, 5: 0.045, 10: 0.048, 30: 0.05}
+NOW = datetime(2024, 1, 1)
+
+def loop_price(face_value, coupon_rate, maturity, ytm, frequency=2):
+    """The per-coupon loop Bond.update_price used before vectorisation."""
+    price = 0
+    coupon_payment = face_value * coupon_rate / frequency
+    for t in range(1, int(maturity * frequency) + 1):
+        price += coupon_payment / (1 + ytm / frequency) ** t
+    return price + face_value / (1 + ytm) ** maturity
+
+@pytest.mark.parametrize("maturity", [0.3, 1.0, 2.7, 10.0, 29.9])
+@pytest.mark.parametrize("ytm", [0.0, 0.045])
+def test_closed_form_matches_cash_flow_loop(maturity, ytm):
+    assert price_from_yield(1000.0, 0.05, maturity, ytm) == pytest.approx(loop_price(1000.0, 0.05, maturity, ytm), rel=1e-12)
+
+def test_curve_interpolation():
+    curve = YieldCurve.from_dict({10: 0.048, 1: 0.04, 2: 0.042})
+    np.testing.assert_allclose(curve([0.5, 1.5, 6.0, 40.0, -1.0]), [0.04, 0.041, 0.045, 0.048, 0.0])
+    assert curve.shifted(0.01)(1.0) == pytest.approx(0.05)
+
+def test_universe_matches_single_bond_pricing():
+    maturities = [NOW + timedelta(days=d) for d in (-5, 200, 730, 1825, 3650, 10000)]
+    bonds = [Bond(f"B{i}", "bond", 1000.0, 0.05, m, 'AAA', CURVE) for i, m in enumerate(maturities)]
+    universe = BondUniverse.from_bonds(bonds)
+
+    prices = universe.reprice(YieldCurve.from_dict(CURVE), NOW)
+
+    for bond, price, ytm in zip(bonds, prices, universe.ytm):
+        expected_ytm = np.interp((bond.maturity_date - NOW).days / 365, list(CURVE), list(CURVE.values()))
+        maturity = (bond.maturity_date - NOW).days / 365
+        assert ytm == (expected_ytm if maturity > 0 else 0.0)
+        expected = loop_price(1000.0, 0.05, maturity, ytm) if maturity > 0 else 1000.0
+        assert price == pytest.approx(expected, rel=1e-12)
+
+def test_zero_coupon_risk_matches_analytic():
+    universe = BondUniverse([100.0], [0.0], [NOW + timedelta(days=3650)])
+    curve = YieldCurve([1, 30], [0.05, 0.05])
+    risk = universe.risk(curve, NOW)
+
+    t = 10.0
+    assert risk['duration'][0] == pytest.approx(t / 1.05, rel=1e-6)
+    assert risk['convexity'][0] == pytest.approx(t * (t + 1) / 1.05 ** 2, rel=1e-4)
+    assert risk['dv01'][0] == pytest.approx(risk['duration'][0] * risk['price'][0] * 1e-4, rel=1e-6)
+
+def test_large_universe_reprices_in_one_pass():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    universe = BondUniverse(
+        np.full(n, 1000.0), rng.uniform(0.0, 0.08, n),
+        np.datetime64(NOW, 's') + rng.integers(1, 30 * 365, n).astype('timedelta64[D]'),
+        spreads=rng.uniform(0.0, 0.03, n)
+    )
+    prices = universe.reprice(YieldCurve.from_dict(CURVE), NOW)
+
+    assert prices.shape == (n,)
+    assert np.isfinite(prices).all()
+    assert (universe.ytm > 0).all()
+
+def test_simulator_updates_all_bonds():
+    simulator = MarketSimulator('redis://localhost:6379')
+    prices = simulator.update_bond_prices()
+
+    assert len(prices) == len(simulator.bonds) == 4
+    for bond in simulator.bonds:
+        assert simulator.prices[bond.symbol] == bond.price
+        assert bond.to_dict()['ytm'] == bond.ytm
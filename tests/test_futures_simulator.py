@@ -3,6 +3,7 @@ import pytest
 from datetime import datetime, timedelta
 import numpy as np
 from services.market_simulator.futures_simulator import FuturesContract, FuturesSimulator
+from src.utils.clock import SimulatedClock
 
 @pytest.fixture
 def simulator():
@@ -85,3 +86,59 @@ def test_price_updates(simulator):
         price = contract_data["price"]
         tick_size = contract_data["tick_size"]
         assert abs(price / tick_size - round(price / tick_size)) < 1e-10
+
+def test_every_asset_has_perpetual_and_dated_contracts(simulator):
+    assert len(simulator.contracts) == 12
+    for asset in ['BTC', 'ETH', 'SOL']:
+        symbols = [s for s, c in simulator.contracts.items() if c.underlying == asset]
+        assert f"{asset}-PERP" in symbols
+        dated = sorted(c.expiry for c in simulator.contracts.values()
+                       if c.underlying == asset and not c.is_perpetual)
+        assert len(dated) == 3
+        assert dated[1] - dated[0] == dated[2] - dated[1] == timedelta(days=30)
+
+def test_curve_prices_follow_spot_and_carry():
+    clock = SimulatedClock(datetime(2024, 1, 1))
+    sim = FuturesSimulator("redis://localhost:6379", clock=clock, seed=0)
+    sim._calculate_price_impact = lambda price, volume: price
+    for _ in range(10):
+        sim.generate_price_updates()
+
+    btc = [c for c in sim.contracts.values() if c.underlying == 'BTC' and not c.is_perpetual]
+    spot = sim.spot[sim.assets.index('BTC')]
+    carry = sim.carry[sim.assets.index('BTC')]
+    for contract in btc:
+        tau = (contract.expiry - clock.now()).total_seconds() / (365 * 24 * 3600)
+        assert contract.price == pytest.approx(spot * np.exp(carry * tau), abs=0.06)
+    prices = [c.price for c in sorted(btc, key=lambda c: c.expiry)]
+    assert prices == sorted(prices)  # contango with positive carry
+
+def test_expired_contracts_roll():
+    clock = SimulatedClock(datetime(2024, 1, 1))
+    sim = FuturesSimulator("redis://localhost:6379", clock=clock, seed=0)
+    front = min((c for c in sim.contracts.values() if c.underlying == 'ETH' and not c.is_perpetual),
+                key=lambda c: c.expiry)
+    back = max(c.expiry for c in sim.contracts.values() if c.underlying == 'ETH' and c.expiry)
+
+    clock.advance((front.expiry - clock.now()).total_seconds())
+    updates = sim.generate_price_updates()
+
+    assert front.symbol not in sim.contracts
+    assert f"ETH-{back + timedelta(days=30):%Y%m%d}" in sim.contracts
+    assert len(updates) == len(sim.contracts) == 12
+
+def test_scales_to_hundreds_of_underlyings():
+    sim = FuturesSimulator("redis://localhost:6379", seed=1,
+                           assets={f"A{i:03d}": 10.0 + i for i in range(300)})
+    updates = sim.generate_price_updates()
+    assert len(updates) == len(sim.contracts) == 1200
+    assert len({u['contract']['symbol'] for u in updates}) == 1200
+
+def test_underlying_volatility_scales_with_the_interval():
+    moves = []
+    for interval in (1.0, 4.0):
+        simulator = FuturesSimulator("redis://localhost:6379", seed=3, interval=interval, assets={'BTC': 50000.0})
+        simulator.generate_price_updates()
+        moves.append(simulator.premium[0])
+    # Same shocks from a zero premium, so its move grows with the square root of the interval
+    assert moves[1] == pytest.approx(2 * moves[0])
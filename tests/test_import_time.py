@@ -0,0 +1,51 @@
+"""Import-time budget for service entry points."""
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ('pandas', 'ccxt', 'plotly', 'dash', 'yfinance')
+
+# Generous ceilings for a cold interpreter; they catch regressions such as a
+# heavy module creeping back into the import path, not machine noise.
+BUDGETS = {
+    'src.api.main': 3.0,
+    'services.worker.tasks': 3.0,
+    'services.market_simulator.market_simulator': 2.0,
+    'services.market_simulator.futures_simulator': 2.0,
+}
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(elapsed, *[m for m in {heavy!r} if m in sys.modules])
+"""
+
+def import_in_fresh_interpreter(module):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, timeout=60,
+        env={**os.environ, 'PYTHONPATH': ROOT, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    assert result.returncode == 0, result.stderr
+    elapsed, *heavy = result.stdout.split()
+    return float(elapsed), heavy
+
+@pytest.mark.parametrize('module', sorted(BUDGETS))
+def test_entry_point_imports_within_budget(module):
+    elapsed, heavy = import_in_fresh_interpreter(module)
+    assert heavy == [], f"{module} imports {heavy} at startup"
+    assert elapsed < BUDGETS[module], f"{module} took {elapsed:.2f}s to import"
+
+def test_models_are_loaded_once():
+    from src.api import main
+    from src.api.routes import trading
+    from src.database import models_export
+
+    assert main.OrderModel is trading.Order is models_export.Order
+    assert models_export.load_models() is models_export.load_models()
+    class_names = [mapper.class_.__name__ for mapper in models_export.Base.registry.mappers]
+    assert len(class_names) == len(set(class_names))
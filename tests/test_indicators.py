@@ -0,0 +1,85 @@
+"""Tests for the streaming indicator library."""
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.indicators import (
+    SMA, EMA, RollingStd, VWAP, ATR, RSI, BarIndicators,
+    sma, ema, rolling_std, vwap, atr, rsi
+)
+from src.data.market_data import MarketDataService
+from src.data.replay import ReplayExchange
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(42)
+    n = 500
+    close = pd.Series(100 + np.cumsum(rng.normal(0, 1, n)))
+    close[50:60] = close[49]  # flat stretch exercises the repeated-value path
+    return pd.DataFrame({
+        'high': close + rng.random(n),
+        'low': close - rng.random(n),
+        'close': close,
+        'volume': rng.exponential(5.0, n),
+    })
+
+def stream(indicator, *columns):
+    return np.array([indicator.update(*values) for values in zip(*columns)])
+
+def assert_identical(streamed, batch):
+    assert np.array_equal(streamed, batch.to_numpy(), equal_nan=True)
+
+@pytest.mark.parametrize("window", [1, 5, 20])
+def test_sma_matches_pandas(bars, window):
+    assert_identical(stream(SMA(window), bars['close']), sma(bars['close'], window))
+
+@pytest.mark.parametrize("window", [2, 5, 20])
+def test_rolling_std_matches_pandas(bars, window):
+    assert_identical(stream(RollingStd(window), bars['close']), rolling_std(bars['close'], window))
+
+@pytest.mark.parametrize("span", [2, 20])
+def test_ema_matches_pandas(bars, span):
+    assert_identical(stream(EMA(span=span), bars['close']), ema(bars['close'], span=span))
+
+def test_ema_skips_missing_values_like_pandas():
+    series = pd.Series([1.0, np.nan, 3.0, np.nan, np.nan, 2.0])
+    assert_identical(stream(EMA(span=3), series), ema(series, span=3))
+
+def test_vwap_matches_pandas(bars):
+    assert_identical(stream(VWAP(), bars['close'], bars['volume']), vwap(bars['close'], bars['volume']))
+
+def test_atr_matches_pandas(bars):
+    assert_identical(
+        stream(ATR(14), bars['high'], bars['low'], bars['close']),
+        atr(bars['high'], bars['low'], bars['close'], 14)
+    )
+
+def test_rsi_matches_pandas(bars):
+    streamed = stream(RSI(14), bars['close'])
+    assert_identical(streamed, rsi(bars['close'], 14))
+    assert np.isnan(streamed[:14]).all()
+    assert ((streamed[14:] >= 0) & (streamed[14:] <= 100)).all()
+
+def test_indicator_reset(bars):
+    indicator = SMA(5)
+    stream(indicator, bars['close'])
+    indicator.reset()
+    assert not indicator.ready
+    assert_identical(stream(indicator, bars['close']), sma(bars['close'], 5))
+
+def test_bar_indicators_match_process_raw_data(bars):
+    original = bars.copy()
+    processed = MarketDataService(exchange=ReplayExchange({})).process_raw_data(bars)
+
+    # process_raw_data no longer mutates its input
+    pd.testing.assert_frame_equal(bars, original)
+
+    live = BarIndicators()
+    rows = [live.update(bar) for bar in bars.to_dict('records')]
+    for column in live.columns:
+        assert_identical(np.array([row[column] for row in rows]), processed[column])
+
+def test_bar_indicator_columns_follow_the_window(bars):
+    live = BarIndicators(window=50)
+    row = live.update(bars.iloc[0].to_dict())
+    assert set(row) == {'sma_50', 'ema_50', 'volume_ma'}
+    assert set(BarIndicators.apply(bars, window=50).columns) >= set(row)
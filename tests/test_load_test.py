@@ -0,0 +1,56 @@
+"""Tests for the order pipeline load generator, run in-process."""
+import json
+import pytest
+from src.api.database import get_db
+from src.execution.simulated_exchange import SimulatedExchange
+from src.execution.trading_engine import TradingEngine
+from src.loadtest.order_load import (
+    ApiSubmitter, OrderLoadTest, OrderMix, SimulatedExecutor, format_report, in_process_app, write_report
+)
+from src.utils.rate_limit import AsyncTokenBucket
+
+def test_order_mix_is_reproducible_and_realistic():
+    mix_a, mix_b = OrderMix([1, 2, 3], seed=7), OrderMix([1, 2, 3], seed=7)
+    a = [mix_a.next_order() for _ in range(500)]
+    b = [mix_b.next_order() for _ in range(500)]
+
+    assert a == b
+    limits = [o for o in a if o['type'] == 'limit']
+    assert 0.2 < len(limits) / len(a) < 0.4
+    assert all(o['price'] > 0 for o in limits)
+    assert all(o['price'] is None for o in a if o['type'] == 'market')
+    # Popularity skew towards the first contract
+    counts = [sum(o['contract_id'] == c for o in a) for c in (1, 2, 3)]
+    assert counts[0] > counts[1] > counts[2]
+
+@pytest.mark.asyncio
+async def test_in_process_run_reports_latency_percentiles(tmp_path):
+    app = in_process_app(f"sqlite:///{tmp_path / 'load.db'}")
+    submitter = ApiSubmitter(app=app)
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = TradingEngine(exchange=exchange, rate_limiter=AsyncTokenBucket(rate=1e6, capacity=1e6))
+    try:
+        contract_ids = await submitter.create_contracts(2)
+        load_test = OrderLoadTest(submitter, OrderMix(contract_ids, seed=1), SimulatedExecutor(engine),
+                                  rate=100, duration=0.5)
+        summary = await load_test.run()
+    finally:
+        await submitter.close()
+        await engine.close()
+        app.dependency_overrides.pop(get_db, None)
+
+    assert summary['error_count'] == 0
+    assert summary['orders'] == 50
+    assert summary['stages']['submit']['count'] == 50
+    # Limit orders left resting on the book are counted, not timed as fills
+    outcomes = summary['outcomes']
+    assert sum(outcomes.values()) == 50 and 0 < outcomes['resting'] < 50
+    assert summary['stages']['fill']['count'] == outcomes['filled']
+    for stats in summary['stages'].values():
+        assert 0 < stats['p50_ms'] <= stats['p90_ms'] <= stats['p99_ms'] <= stats['max_ms']
+    assert exchange.requests == 50
+
+    path = tmp_path / 'report.json'
+    write_report(summary, str(path))
+    assert json.loads(path.read_text())['stages']['fill']['count'] == outcomes['filled']
+    assert 'fill' in format_report(summary)
@@ -0,0 +1,98 @@
+"""Tests for the async, cached market data service."""
+import asyncio
+import time
+import pytest
+from src.data.bar_store import BarStore
+from src.data.market_data import MarketDataService
+from src.data.replay import ReplayExchange
+from src.utils.rate_limit import AsyncTokenBucket
+
+def make_service(exchange, **kwargs):
+    return MarketDataService(exchange=exchange, rate_limiter=AsyncTokenBucket(rate=1e6, capacity=1e6), **kwargs)
+
+@pytest.mark.asyncio
+async def test_fetch_ohlcv_returns_frame():
+    exchange = ReplayExchange.synthetic(['BTC/USDT'], periods=200)
+    async with make_service(exchange) as service:
+        df = await service.fetch_ohlcv('BTC/USDT', limit=50)
+
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    assert len(df) == 50
+    assert exchange.closed
+
+@pytest.mark.asyncio
+async def test_only_bars_after_cached_tail_are_fetched():
+    exchange = ReplayExchange.synthetic(['BTC/USDT'], periods=200, visible=100)
+    service = make_service(exchange)
+
+    first = await service.fetch_ohlcv('BTC/USDT', limit=50)
+    exchange.advance(3)
+    second = await service.fetch_ohlcv('BTC/USDT', limit=50)
+
+    incremental = exchange.calls[-1]
+    assert incremental['since'] == int(first['timestamp'].iloc[-1].value // 1_000_000)
+    assert incremental['limit'] is None
+    assert second['timestamp'].iloc[-1] > first['timestamp'].iloc[-1]
+    assert len(second) == 50
+    assert (second['timestamp'].diff().dropna() == second['timestamp'].diff().iloc[1]).all()
+
+@pytest.mark.asyncio
+async def test_expired_cache_refetches_in_full():
+    exchange = ReplayExchange.synthetic(['ETH/USDT'], periods=100)
+    service = make_service(exchange, cache_ttl=0.0)
+
+    await service.fetch_ohlcv('ETH/USDT', limit=20)
+    time.sleep(0.001)
+    await service.fetch_ohlcv('ETH/USDT', limit=20)
+    assert [call['since'] for call in exchange.calls] == [None, None]
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    symbols = ['A', 'B', 'C']
+    exchange = ReplayExchange.synthetic(symbols, periods=50)
+    service = make_service(exchange, cache_size=2)
+
+    await service.fetch_many(symbols, limit=10)
+    await service.fetch_ohlcv('A', limit=10)
+    # 'A' was evicted by 'C', so it is fetched in full again
+    assert exchange.calls[-1]['since'] is None
+
+@pytest.mark.asyncio
+async def test_fetch_many_runs_concurrently():
+    symbols = [f"SYM{i}" for i in range(8)]
+    exchange = ReplayExchange.synthetic(symbols, periods=50, latency=0.05)
+    service = make_service(exchange, max_concurrency=8)
+
+    started = time.perf_counter()
+    frames = await service.fetch_many(symbols, limit=10)
+    elapsed = time.perf_counter() - started
+
+    assert set(frames) == set(symbols)
+    assert elapsed < 0.05 * len(symbols) / 2
+
+@pytest.mark.asyncio
+async def test_fetched_bars_are_persisted(tmp_path):
+    store = BarStore(str(tmp_path))
+    exchange = ReplayExchange.synthetic(['SOL/USDT'], periods=100, visible=60)
+    service = make_service(exchange, bar_store=store)
+
+    await service.fetch_ohlcv('SOL/USDT', limit=60)
+    exchange.advance(10)
+    await service.fetch_ohlcv('SOL/USDT', limit=60)
+
+    # Every bar except the still-forming newest one is recorded exactly once
+    assert len(store.read('SOL/USDT')['close']) == 69
+
+@pytest.mark.asyncio
+async def test_fetch_errors_are_wrapped():
+    service = make_service(ReplayExchange({}))
+    with pytest.raises(Exception, match="Error fetching market data"):
+        await service.fetch_ohlcv('UNKNOWN')
+
+@pytest.mark.asyncio
+async def test_token_bucket_throttles_beyond_burst():
+    bucket = AsyncTokenBucket(rate=100.0, capacity=2)
+    started = time.perf_counter()
+    await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+    # Two tokens are available immediately, the other two take ~10ms each
+    assert time.perf_counter() - started >= 0.015
@@ -0,0 +1,67 @@
+"""Tests for the shared Prometheus metrics."""
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from services.market_simulator.market_simulator import MarketSimulator
+from src.api.main import app
+from src.utils.clock import SimulatedClock
+from src.utils.metrics import register_db_pool, render_metrics
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+class RecordingRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+def test_api_records_latency_per_route_template():
+    client = TestClient(app)
+    before = sample('http_request_duration_seconds_count', method='GET', route='/')
+    unmatched = sample('http_requests_total', method='GET', route='unmatched', status='404')
+
+    assert client.get('/').status_code == 200
+    assert client.get('/no/such/route').status_code == 404
+
+    assert sample('http_request_duration_seconds_count', method='GET', route='/') == before + 1
+    assert sample('http_requests_total', method='GET', route='unmatched', status='404') == unmatched + 1
+
+def test_metrics_endpoint_serves_text_exposition():
+    response = TestClient(app).get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'http_request_duration_seconds_bucket' in response.text
+    assert 'db_pool_connections{pool="api",state="size"}' in response.text
+
+def test_db_pool_collector_reports_checked_out_connections():
+    engine = create_engine('sqlite://', poolclass=QueuePool, pool_size=3)
+    registry = CollectorRegistry()
+    register_db_pool(engine, 'test', registry)
+
+    with engine.connect() as connection:
+        connection.execute(text('select 1'))
+        assert registry.get_sample_value('db_pool_connections', {'pool': 'test', 'state': 'checkedout'}) == 1
+    assert registry.get_sample_value('db_pool_connections', {'pool': 'test', 'state': 'checkedout'}) == 0
+    assert registry.get_sample_value('db_pool_connections', {'pool': 'test', 'state': 'size'}) == 3
+
+def test_simulator_publish_is_timed_and_counted():
+    simulator = MarketSimulator('redis://localhost:6379', clock=SimulatedClock(), seed=1)
+    simulator.redis = RecordingRedis()
+    published = sample('simulator_updates_published_total', simulator='market')
+    lags = sample('simulator_publish_lag_seconds_count', simulator='market')
+
+    simulator.publish_updates(simulator.generate_updates())
+
+    assert len(simulator.redis.published) == len(simulator.symbols)
+    assert sample('simulator_updates_published_total', simulator='market') == published + len(simulator.symbols)
+    assert sample('simulator_publish_lag_seconds_count', simulator='market') == lags + 1
+
+def test_render_metrics_content_type():
+    body, content_type = render_metrics()
+    assert b'# HELP orders_executed_total' in body
+    assert content_type.startswith('text/plain')
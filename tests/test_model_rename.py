@@ -6,19 +6,7 @@ import pytest
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Import the models directly
-import importlib.util
-import os
-
-# Directly import the models.py file
-models_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'database', 'models.py')
-spec = importlib.util.spec_from_file_location('models_module', models_path)
-models_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(models_module)
-
-# Get the models from the imported module
-FinancialModel = models_module.FinancialModel
-Strategy = models_module.Strategy
+from src.database.models_export import FinancialModel, Strategy
 
 def test_financial_model_exists():
     """Test that FinancialModel class exists."""
@@ -0,0 +1,114 @@
+"""Tests for the L2 order book engine."""
+import json
+import pytest
+from src.data.market_data import MarketDataService
+from src.data.order_book import ASK, BID, BookSequenceError, L2Book, publish_snapshot
+from src.data.replay import ReplayExchange, SyntheticBookFeed
+from src.utils.rate_limit import AsyncTokenBucket
+
+class RecordingPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value):
+        self.commands.append(('set', key, value))
+
+    def publish(self, channel, message):
+        self.commands.append(('publish', channel, message))
+
+    def execute(self):
+        self.redis.executed.extend(self.commands)
+
+class RecordingRedis:
+    def __init__(self):
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return RecordingPipeline(self)
+
+class FeedExchange(ReplayExchange):
+    """Replay exchange serving snapshots of a synthetic book feed."""
+
+    def __init__(self, feed):
+        super().__init__({})
+        self.feed = feed
+
+    async def fetch_order_book(self, symbol, limit=None, params=None):
+        self.calls.append({'method': 'fetch_order_book', 'symbol': symbol, 'limit': limit})
+        return self.feed.snapshot()
+
+def test_snapshot_queries():
+    book = L2Book('BTC/USDT')
+    book.apply_snapshot(bids=[[99.0, 2.0], [100.0, 1.0], [98.0, 5.0]],
+                        asks=[[102.0, 4.0], [101.0, 3.0]], sequence=7)
+
+    assert book.best_bid == (100.0, 1.0)
+    assert book.best_ask == (101.0, 3.0)
+    assert book.level(BID, 2) == (98.0, 5.0)
+    assert book.level(ASK, 2) is None
+    assert book.mid == 100.5
+    assert book.spread == 1.0
+    assert book.microprice == pytest.approx((100.0 * 3.0 + 101.0 * 1.0) / 4.0)
+    assert book.depth(BID, 2) == [(100.0, 1.0), (99.0, 2.0)]
+    assert book.size_at_depth(ASK, 5) == 7.0
+    assert book.to_dict(depth=1) == {
+        'symbol': 'BTC/USDT', 'bids': [[100.0, 1.0]], 'asks': [[101.0, 3.0]],
+        'timestamp': None, 'nonce': 7,
+    }
+
+def test_deltas_rebuild_reference_book():
+    feed = SyntheticBookFeed('BTC/USDT', levels=20, seed=3)
+    book = L2Book('BTC/USDT')
+    snapshot = feed.snapshot()
+    book.apply_snapshot(snapshot['bids'], snapshot['asks'], snapshot['nonce'])
+
+    for delta in feed.deltas(2000):
+        book.apply_delta(delta['bids'], delta['asks'], delta['sequence'])
+
+    assert book.to_dict() == feed.snapshot()
+    assert book.best_bid[0] < book.best_ask[0]
+
+def test_sequence_gap_raises_and_stale_delta_is_ignored():
+    feed = SyntheticBookFeed('BTC/USDT', seed=1)
+    book = L2Book('BTC/USDT')
+    snapshot = feed.snapshot()
+    book.apply_snapshot(snapshot['bids'], snapshot['asks'], snapshot['nonce'])
+    first, second, third = feed.deltas(3)
+
+    book.apply_delta(first['bids'], first['asks'], first['sequence'])
+    with pytest.raises(BookSequenceError):
+        book.apply_delta(third['bids'], third['asks'], third['sequence'])
+    book.apply_delta(second['bids'], second['asks'], second['sequence'])
+    before = book.to_dict()
+    book.apply_delta(first['bids'], first['asks'], first['sequence'])
+    assert book.to_dict() == before
+
+def test_publish_snapshot():
+    redis = RecordingRedis()
+    book = L2Book('ETH/USDT')
+    book.apply_snapshot([[10.0, 1.0], [9.0, 1.0]], [[11.0, 2.0]], sequence=3)
+
+    publish_snapshot(redis, book, depth=1)
+
+    (set_cmd, set_key, set_value), (pub_cmd, channel, message) = redis.executed
+    assert (set_cmd, set_key) == ('set', 'orderbook:ETH/USDT')
+    assert (pub_cmd, channel) == ('publish', 'orderbook:ETH/USDT')
+    assert json.loads(message)['bids'] == [[10.0, 1.0]]
+    assert set_value == message
+
+@pytest.mark.asyncio
+async def test_service_resyncs_on_sequence_gap():
+    feed = SyntheticBookFeed('BTC/USDT', seed=5)
+    exchange = FeedExchange(feed)
+    service = MarketDataService(exchange=exchange, rate_limiter=AsyncTokenBucket(rate=1e6, capacity=1e6))
+
+    await service.sync_order_book('BTC/USDT')
+    for delta in feed.deltas(50):
+        await service.apply_order_book_delta('BTC/USDT', delta)
+    feed.deltas(5)  # dropped on the floor
+    book = await service.apply_order_book_delta('BTC/USDT', feed.next_delta())
+
+    assert book is service.order_books['BTC/USDT']
+    assert book.to_dict() == feed.snapshot()
+    assert [call['method'] for call in exchange.calls] == ['fetch_order_book'] * 2
@@ -0,0 +1,156 @@
+"""Tests for the order events outbox, its relay and stream consumers."""
+from decimal import Decimal
+import pytest
+from redis.exceptions import ConnectionError, ResponseError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.database.models.account import Account
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide, OrderStatus, OrderType
+from src.database.models.order import Order, OrderEvent
+from src.execution.order_events import (
+    ORDER_CREATED, ORDER_FILLED, OrderEventConsumer, OutboxRelay, record_order_event
+)
+
+class RecordingPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self.commands.append((stream, fields, maxlen))
+
+    def execute(self):
+        if self.redis.down:
+            raise ConnectionError("Redis is down")
+        return [self.redis.xadd(stream, fields) for stream, fields, _ in self.commands]
+
+class StreamRedis:
+    """Just enough of a Redis stream with consumer groups."""
+
+    def __init__(self):
+        self.down = False
+        self.entries = []
+        self.groups = {}
+
+    def pipeline(self, transaction=True):
+        return RecordingPipeline(self)
+
+    def xadd(self, stream, fields):
+        entry_id = f"{len(self.entries) + 1}-0".encode()
+        self.entries.append((entry_id, {k.encode(): str(v).encode() for k, v in fields.items()}))
+        return entry_id
+
+    def xgroup_create(self, stream, group, id='$', mkstream=False):
+        if group in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.groups[group] = {'last': 0, 'pending': {}}
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        (stream, start), = streams.items()
+        state = self.groups[group]
+        if start == '>':
+            entries = self.entries[state['last']:state['last'] + count]
+            state['last'] += len(entries)
+            for entry_id, _ in entries:
+                state['pending'][entry_id] = consumer
+        else:
+            after = int(start.split('-')[0])
+            entries = [entry for entry in self.entries
+                       if state['pending'].get(entry[0]) == consumer and int(entry[0].split(b'-')[0]) > after]
+            entries = entries[:count]
+        return [[stream.encode(), entries]] if entries else []
+
+    def xack(self, stream, group, *entry_ids):
+        pending = self.groups[group]['pending']
+        return sum(pending.pop(entry_id.encode(), None) is not None for entry_id in entry_ids)
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert().values(id=1, symbol='AAPL', name='Apple', type=InstrumentType.EQUITY))
+    db.commit()
+    db.close()
+    return factory
+
+@pytest.fixture
+def redis():
+    return StreamRedis()
+
+def place_and_fill(session_factory):
+    db = session_factory()
+    order = Order(account_id=1, instrument_id=1, type=OrderType.LIMIT, side=OrderSide.BUY,
+                  status=OrderStatus.PENDING, quantity=Decimal('2'), price=Decimal('101.5'))
+    db.add(order)
+    db.flush()
+    record_order_event(db, ORDER_CREATED, order)
+    db.commit()
+    order.status = OrderStatus.FILLED
+    record_order_event(db, ORDER_FILLED, order, fill_id=f"order-{order.id}", filled_price=101.25)
+    db.commit()
+    db.close()
+
+def test_events_are_written_with_the_order_change(session_factory):
+    db = session_factory()
+    order = Order(account_id=1, instrument_id=1, type=OrderType.MARKET, side=OrderSide.SELL,
+                  status=OrderStatus.PENDING, quantity=1)
+    db.add(order)
+    db.flush()
+    record_order_event(db, ORDER_CREATED, order)
+    db.rollback()
+
+    assert db.query(OrderEvent).count() == 0
+    db.close()
+
+def test_relay_publishes_events_in_order_and_empties_the_outbox(session_factory, redis):
+    place_and_fill(session_factory)
+    relay = OutboxRelay(session_factory, lambda: redis, batch_size=1)
+
+    assert relay.relay() == 1
+    assert relay.relay() == 1
+    assert relay.relay() == 0
+
+    db = session_factory()
+    assert db.query(OrderEvent).count() == 0
+    db.close()
+    consumer = OrderEventConsumer('risk', 'risk-1', lambda: redis)
+    consumer.ensure_group()
+    (_, created), (_, filled) = consumer.read()
+    assert created['type'] == 'order.created'
+    assert created['order']['status'] == 'pending'
+    assert created['order']['price'] == '101.5'
+    assert filled['type'] == 'order.filled'
+    assert filled['order_id'] == created['order_id']
+    assert filled['event_id'] > created['event_id']
+    assert filled['order']['fill_id'] == f"order-{created['order_id']}"
+
+def test_events_stay_in_the_outbox_while_redis_is_down(session_factory, redis):
+    place_and_fill(session_factory)
+    redis.down = True
+    relay = OutboxRelay(session_factory, lambda: redis)
+
+    with pytest.raises(Exception, match="Error relaying order events"):
+        relay.relay()
+
+    redis.down = False
+    assert relay.relay() == 2
+    assert len(redis.entries) == 2
+
+def test_consumer_resumes_with_its_unacknowledged_events(session_factory, redis):
+    place_and_fill(session_factory)
+    OutboxRelay(session_factory, lambda: redis).relay()
+    consumer = OrderEventConsumer('risk', 'risk-1', lambda: redis)
+    consumer.ensure_group()
+    consumer.ensure_group()  # already exists
+    first, second = consumer.read()
+    consumer.ack(first[0])
+
+    # Restarted before acknowledging the second event
+    restarted = OrderEventConsumer('risk', 'risk-1', lambda: redis)
+    assert [entry_id for entry_id, _ in restarted.read()] == [second[0]]
+    restarted.ack(second[0])
+    assert restarted.read() == []
@@ -0,0 +1,114 @@
+"""Tests for streaming order status reconciliation."""
+import asyncio
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from src.database.models.base import Base, OrderSide, OrderStatus, OrderType
+from src.database.models import account, instrument  # noqa: F401 - registers the referenced tables
+from src.database.models.order import Order
+from src.execution.order_tracker import OrderTracker
+from src.execution.simulated_exchange import SimulatedExchange
+from src.execution.trading_engine import TradingEngine
+from src.utils.rate_limit import AsyncTokenBucket
+
+@pytest.fixture
+def database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    Base.metadata.create_all(engine)
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE'):
+            statements.append((statement, executemany))
+
+    with engine.begin() as conn:
+        conn.execute(Order.__table__.insert(), [
+            {'id': i, 'account_id': 1, 'instrument_id': 1, 'type': OrderType.LIMIT,
+             'side': OrderSide.BUY, 'status': OrderStatus.PENDING, 'quantity': 1, 'price': 90}
+            for i in range(1, 51)
+        ])
+    return sessionmaker(bind=engine), statements
+
+def make_engine(exchange):
+    return TradingEngine(exchange=exchange, rate_limiter=AsyncTokenBucket(rate=1e6, capacity=1e6))
+
+def statuses(session_factory):
+    with session_factory() as db:
+        return dict(db.execute(select(Order.id, Order.status)).all())
+
+async def place(engine, tracker, count, price=90.0):
+    placed = await engine.place_orders([
+        {'symbol': 'AAPL', 'type': 'limit', 'side': 'buy', 'amount': 1.0, 'price': price}
+        for _ in range(count)
+    ])
+    for order_id, order in enumerate(placed, start=1):
+        tracker.track(order_id, order)
+    return placed
+
+@pytest.mark.asyncio
+async def test_stream_updates_are_written_in_one_batch(database):
+    session_factory, statements = database
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = make_engine(exchange)
+    tracker = OrderTracker(engine, session_factory, flush_interval=0.05)
+    placed = await place(engine, tracker, 50)
+    await engine.cancel_orders([o['id'] for o in placed[:10]])
+
+    task = asyncio.create_task(tracker.run())
+    exchange.prices['AAPL'] = 89.0
+    exchange.match()
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    result = statuses(session_factory)
+    assert [result[i] for i in range(1, 11)] == [OrderStatus.CANCELLED] * 10
+    assert [result[i] for i in range(11, 51)] == [OrderStatus.FILLED] * 40
+    assert not tracker.working
+    assert len(statements) == 1 and statements[0][1]
+
+@pytest.mark.asyncio
+async def test_bulk_poll_requests_many_orders_per_call(database):
+    session_factory, statements = database
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = make_engine(exchange)
+    tracker = OrderTracker(engine, session_factory)
+    await place(engine, tracker, 30)
+
+    exchange.prices['AAPL'] = 85.0
+    exchange.match()
+    requests = exchange.requests
+    changed = await tracker.poll()
+
+    assert changed == 30
+    assert exchange.requests - requests == 1
+    assert tracker.flush() == 30
+    assert set(statuses(session_factory).values()) == {OrderStatus.FILLED, OrderStatus.PENDING}
+
+@pytest.mark.asyncio
+async def test_poll_without_bulk_endpoint_falls_back_to_single_requests(database):
+    session_factory, _ = database
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = make_engine(exchange)
+    tracker = OrderTracker(engine, session_factory)
+    await place(engine, tracker, 5)
+    exchange.has = {}
+
+    exchange.prices['AAPL'] = 85.0
+    exchange.match()
+    assert await tracker.poll() == 5
+    assert tracker.pending_changes == 5
+
+def test_unchanged_reports_are_not_written(database):
+    session_factory, statements = database
+    tracker = OrderTracker(make_engine(SimulatedExchange(prices={'AAPL': 100.0})), session_factory)
+    report = {'id': 'x', 'symbol': 'AAPL', 'status': 'open', 'filled': 0.0}
+    tracker.track(1, report)
+
+    assert not tracker.on_execution_report(report)
+    assert tracker.on_execution_report(dict(report, filled=0.5))
+    assert tracker.flush() == 1
+    assert tracker.flush() == 0
+    assert statuses(session_factory)[1] == OrderStatus.PARTIALLY_FILLED
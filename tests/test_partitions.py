@@ -0,0 +1,72 @@
+"""Tests for monthly partition helpers and Parquet export."""
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models.account import Account
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide, OrderStatus, OrderType
+from src.database.models.order import Order, Trade
+from src.database.partitions import (
+    add_months, create_partition_sql, export_parquet, months_between, partition_month, partition_name
+)
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+def test_month_arithmetic_wraps_years():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -12) == date(2025, 1, 1)
+    assert months_between(date(2026, 11, 17), date(2027, 1, 3)) == [
+        date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)
+    ]
+
+def test_partition_names_round_trip():
+    assert partition_name('orders', date(2026, 3, 1)) == 'orders_2026_03'
+    assert partition_month('orders', 'orders_2026_03') == date(2026, 3, 1)
+    assert partition_month('orders', 'orders_default') is None
+    assert partition_month('orders', 'trades_2026_03') is None
+
+def test_partition_covers_one_month():
+    assert create_partition_sql('trades', date(2026, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS trades_2026_12 PARTITION OF trades "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    )
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trades.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert().values(id=1, symbol='AAPL', name='Apple', type=InstrumentType.EQUITY))
+    db.add(Order(id=1, account_id=1, instrument_id=1, type=OrderType.MARKET, side=OrderSide.BUY,
+                 status=OrderStatus.FILLED, quantity=1))
+    db.add_all([
+        Trade(fill_id=f"fill-{n}", order_id=1, account_id=1, instrument_id=1, quantity=Decimal(n + 1),
+              price=Decimal('100.25'), side=OrderSide.SELL, executed_at=datetime(2025, 1, 2, 9, 30, n))
+        for n in range(25)
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+def test_export_streams_rows_in_chunks(tmp_path, db):
+    path = str(tmp_path / 'archive' / 'trades' / '2025-01.parquet')
+
+    rows = export_parquet(db, "SELECT * FROM trades ORDER BY id", path, chunk_rows=10)
+
+    assert rows == 25
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_rows == 25
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.metadata.row_group(0).column(0).compression == 'ZSTD'
+    table = parquet.read()
+    assert table.column('fill_id').to_pylist()[:2] == ['fill-0', 'fill-1']
+    assert table.column('side').to_pylist()[0] == 'SELL'
+    assert not (tmp_path / 'archive' / 'trades' / '2025-01.parquet.partial').exists()
+
+def test_empty_export_keeps_columns(tmp_path, db):
+    path = str(tmp_path / 'empty.parquet')
+
+    assert export_parquet(db, "SELECT * FROM trades WHERE id < 0", path) == 0
+    assert 'fill_id' in pq.read_table(path).column_names
@@ -0,0 +1,118 @@
+"""Tests for position PnL: fills, tick marks and the marking service."""
+import json
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from services.pnl_marker.marker import PnlMarkerService
+from src.database.models.account import Account, Position
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide
+from src.database.models.order import Order  # noqa: F401 completes the Instrument mapping
+from src.execution.pnl import PnlMarker, apply_fill
+from src.execution.position_keeper import PositionKeeper
+
+D = Decimal
+
+@pytest.mark.parametrize('quantity, average, delta, price, expected', [
+    (D(0), D(0), D(10), D(100), (D(10), D(100), D(0))),
+    (D(10), D(100), D(10), D(110), (D(20), D(105), D(0))),
+    (D(10), D(100), D(-4), D(110), (D(6), D(100), D(40))),
+    (D(10), D(100), D(-10), D(90), (D(0), D(0), D(-100))),
+    (D(10), D(100), D(-15), D(110), (D(-5), D(110), D(100))),
+    (D(-10), D(100), D(5), D(90), (D(-5), D(100), D(50))),
+    (D(-10), D(100), D(-5), D(106), (D(-15), D(102), D(0))),
+])
+def test_apply_fill(quantity, average, delta, price, expected):
+    assert apply_fill(quantity, average, delta, price) == expected
+
+class RecordingRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pnl.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert(), [
+        {'id': 1, 'symbol': 'AAPL', 'name': 'Apple', 'type': InstrumentType.EQUITY},
+        {'id': 2, 'symbol': 'MSFT', 'name': 'Microsoft', 'type': InstrumentType.EQUITY},
+    ])
+    db.commit()
+    db.close()
+    return factory
+
+def stored(session_factory):
+    db = session_factory()
+    try:
+        return {p.instrument_id: p for p in db.query(Position)}
+    finally:
+        db.close()
+
+def test_keeper_persists_average_price_and_realized_pnl(session_factory):
+    published = []
+    keeper = PositionKeeper(session_factory, on_write=published.extend)
+    keeper.apply_fill(1, 1, OrderSide.BUY, 10, 100)
+    keeper.apply_fill(1, 1, OrderSide.BUY, 10, 110)
+    written = keeper.apply_fill(1, 1, OrderSide.SELL, 5, 120)
+
+    position = stored(session_factory)[1]
+    assert (position.quantity, position.average_entry_price, position.realized_pnl) == (15, 105, 75)
+    assert written['realized_pnl'] == 75
+    assert published[-1] == {'id': position.id, 'account_id': 1, 'instrument_id': 1, 'quantity': '15.00000000',
+                             'average_entry_price': '105.00000000', 'realized_pnl': '75.00'}
+
+def test_ticks_only_mark_positions_in_their_symbol(session_factory):
+    keeper = PositionKeeper(session_factory)
+    keeper.apply_fill(1, 1, OrderSide.BUY, 10, 100)
+    keeper.apply_fill(1, 2, OrderSide.SELL, 5, 200)
+    marker = PnlMarker(session_factory)
+    assert marker.load() == 2
+
+    assert marker.on_tick('AAPL', 101.5) == 1
+    assert marker.on_tick('AAPL', 101.5) == 0  # unchanged marks are not rewritten
+    assert marker.on_tick('GOOG', 10) == 0
+    assert marker.on_tick('AAPL', 102) == 1
+    assert marker.pending_marks == 1
+
+    assert len(marker.flush()) == 1
+    positions = stored(session_factory)
+    assert positions[1].unrealized_pnl == D('20.00')
+    assert positions[2].unrealized_pnl is None
+
+    marker.on_tick('MSFT', 190)
+    marker.flush()
+    assert stored(session_factory)[2].unrealized_pnl == D('50.00')
+
+def test_service_follows_position_updates(session_factory):
+    snapshots = []
+    keeper = PositionKeeper(session_factory, on_write=snapshots.extend)
+    marker = PnlMarker(session_factory)
+    marker.load()
+    service = PnlMarkerService('redis://127.0.0.1:1/0', marker)
+    service.redis = RecordingRedis()
+
+    keeper.apply_fill(1, 1, OrderSide.BUY, 10, 100)
+    for snapshot in snapshots:
+        service.handle_message('positions', json.dumps(snapshot))
+    assert service.handle_message('market_data', json.dumps({'symbol': 'AAPL', 'price': 103})) == 1
+    assert service.handle_message('market_data', b'not json') == 0
+
+    # Closing the position marks it flat once and drops it from the index
+    snapshots.clear()
+    keeper.apply_fill(1, 1, OrderSide.SELL, 10, 103)
+    service.handle_message('positions', json.dumps(snapshots[0]))
+    service.handle_message('market_data', json.dumps({'symbol': 'AAPL', 'price': 104}))
+    assert marker.by_symbol['AAPL'] == {}
+
+    service.flush()
+    position = stored(session_factory)[1]
+    assert (position.quantity, position.realized_pnl, position.unrealized_pnl) == (0, 30, 0)
+    assert service.redis.published == [
+        ('pnl', [{'position_id': position.id, 'account_id': 1, 'unrealized_pnl': '0.00'}])
+    ]
@@ -0,0 +1,81 @@
+"""Tests for the position keeper and its writes to the positions table."""
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models.account import Account, Position
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide
+from src.database.models.order import Order  # noqa: F401 completes the Instrument mapping
+from src.execution.position_keeper import PositionKeeper
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'positions.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add_all([Account(id=account_id, name=f'Account {account_id}', email=f'{account_id}@example.com')
+                for account_id in (1, 2)])
+    db.execute(Instrument.__table__.insert(), [
+        {'id': 1, 'symbol': 'AAPL', 'name': 'Apple', 'type': InstrumentType.EQUITY},
+        {'id': 2, 'symbol': 'MSFT', 'name': 'Microsoft', 'type': InstrumentType.EQUITY},
+    ])
+    db.commit()
+    db.close()
+    return factory
+
+def stored(session_factory):
+    db = session_factory()
+    try:
+        return {(p.account_id, p.instrument_id): p.quantity for p in db.query(Position)}
+    finally:
+        db.close()
+
+def buy(account_id, instrument_id, quantity, price, side=OrderSide.BUY):
+    return {'account_id': account_id, 'instrument_id': instrument_id, 'side': side,
+            'quantity': quantity, 'price': price}
+
+def test_fills_are_written_once_per_position(session_factory):
+    keeper = PositionKeeper(session_factory)
+    fills = [buy(1, 1, 2, 100.5), buy(1, 1, 1, 100.5, OrderSide.SELL)] * 500 + [buy(2, 2, 3, 50)]
+
+    written = keeper.apply_fills(fills)
+
+    assert [row['quantity'] for row in written] == [500, 3]
+    assert stored(session_factory) == {(1, 1): 500, (2, 2): 3}
+
+def test_writes_fold_into_positions_written_by_other_processes(session_factory):
+    first, second = PositionKeeper(session_factory), PositionKeeper(session_factory)
+    first.apply_fill(1, 1, OrderSide.BUY, 10, 100)
+    # The second keeper picks up the first one's fill from the stored row
+    assert second.apply_fill(1, 1, OrderSide.BUY, 5, 101)['quantity'] == 15
+    second.apply_fill(2, 2, OrderSide.SELL, 3, 50)
+
+    assert stored(session_factory) == {(1, 1): 15, (2, 2): -3}
+
+def test_new_positions_take_the_fill_price(session_factory):
+    keeper = PositionKeeper(session_factory)
+    keeper.apply_fill(1, 2, OrderSide.BUY, 1, 101.25)
+    db = session_factory()
+    position = db.query(Position).one()
+    db.close()
+    assert position.average_entry_price == Decimal('101.25')
+
+def test_failed_write_changes_nothing(tmp_path, session_factory):
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'empty.db'}"))
+    keeper = PositionKeeper(broken)
+    with pytest.raises(Exception, match='Error writing positions'):
+        keeper.apply_fill(1, 1, OrderSide.BUY, 4, 100)
+    assert stored(session_factory) == {}
+
+def test_average_price_and_pnl_follow_fills_from_every_process(session_factory):
+    first, second = PositionKeeper(session_factory), PositionKeeper(session_factory)
+    first.apply_fill(1, 1, OrderSide.BUY, 10, 100)
+    # The second process never saw the buy
+    written = second.apply_fill(1, 1, OrderSide.SELL, 10, 110)
+
+    db = session_factory()
+    position = db.query(Position).one()
+    db.close()
+    assert (position.quantity, position.average_entry_price, position.realized_pnl) == (0, 0, 100)
+    assert written['realized_pnl'] == 100
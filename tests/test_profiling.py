@@ -0,0 +1,71 @@
+"""Tests for on-demand profiling."""
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.utils.profiling import StackSampler, memory_growth, profile
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+def test_sampler_folds_stacks_of_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name='busy')
+    worker.start()
+    try:
+        sampler = StackSampler(interval=0.001)
+        sampler.run(0.1)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = sampler.folded().splitlines()
+    busy = [line for line in lines if line.startswith('busy;') and 'busy_loop' in line]
+    assert busy
+    stack, count = busy[0].rsplit(' ', 1)
+    assert int(count) > 0 and 'test_profiling.py' in stack
+    assert sampler.samples > 10
+
+def test_memory_growth_reports_allocating_line():
+    retained = []
+
+    def allocate():
+        time.sleep(0.02)
+        retained.append(bytearray(2_000_000))
+
+    thread = threading.Thread(target=allocate)
+    thread.start()
+    growth = memory_growth(0.2)
+    thread.join()
+
+    assert growth[0]['size_diff'] >= 2_000_000
+    assert 'test_profiling.py' in growth[0]['location']
+
+def test_profile_caps_duration():
+    result = profile(-1, memory=False)
+    assert result['seconds'] == 0.0 and result['memory'] == []
+
+def test_profile_endpoint_is_off_without_token(monkeypatch):
+    monkeypatch.delenv('PROFILING_TOKEN', raising=False)
+    response = TestClient(app).get('/debug/profile', params={'seconds': 0.1})
+    assert response.status_code == 404
+
+def test_profile_endpoint_requires_admin_token(monkeypatch):
+    monkeypatch.setenv('PROFILING_TOKEN', 'secret')
+    client = TestClient(app)
+
+    assert client.get('/debug/profile', params={'seconds': 0.1}).status_code == 403
+    assert client.get('/debug/profile', params={'seconds': 0.1},
+                      headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    response = client.get('/debug/profile', params={'seconds': 0.1}, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['samples'] > 0 and isinstance(body['memory'], list)
+
+    folded = client.get('/debug/profile', params={'seconds': 0.1, 'format': 'folded'},
+                        headers={'X-Admin-Token': 'secret'})
+    assert folded.headers['content-type'].startswith('text/plain')
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in folded.text.splitlines())
@@ -0,0 +1,60 @@
+"""Tests for the shared Redis connection manager."""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from services.market_simulator.market_simulator import MarketSimulator
+from src.config import get_settings
+from src.utils.redis_pool import RedisManager, get_async_redis, get_redis, get_redis_manager
+
+UNREACHABLE = 'redis://127.0.0.1:1/3'
+
+def test_clients_share_one_pool_per_url():
+    assert get_redis(UNREACHABLE).connection_pool is get_redis(UNREACHABLE).connection_pool
+    assert get_redis_manager(UNREACHABLE) is get_redis_manager(UNREACHABLE)
+    assert get_redis_manager(UNREACHABLE) is not get_redis_manager('redis://127.0.0.1:2/0')
+
+def test_default_url_comes_from_settings():
+    assert get_redis_manager() is get_redis_manager(get_settings().REDIS_URL)
+
+def test_services_use_the_shared_pool():
+    simulator = MarketSimulator(UNREACHABLE)
+    assert simulator.redis.connection_pool is get_redis_manager(UNREACHABLE).pool
+
+def test_async_pools_are_per_event_loop():
+    manager = get_redis_manager(UNREACHABLE)
+
+    async def pool():
+        pool = manager.async_pool()
+        assert manager.stats()['async']['max'] == pool.max_connections
+        return pool
+
+    first, second = asyncio.run(pool()), asyncio.run(pool())
+    assert first is not second
+
+@pytest.mark.asyncio
+async def test_async_clients_share_the_loop_pool():
+    assert get_async_redis(UNREACHABLE).connection_pool is get_async_redis(UNREACHABLE).connection_pool
+
+def test_health_reports_unreachable_redis():
+    manager = RedisManager(UNREACHABLE)
+    health = manager.health()
+    assert health['ok'] is False and 'error' in health
+    assert asyncio.run(manager.async_health())['ok'] is False
+    assert manager.stats()['sync']['in_use'] == 0
+    assert manager.stats()['sync']['max'] == 64
+
+def test_pool_usage_is_exported_without_credentials():
+    get_redis_manager('redis://:hunter2@127.0.0.1:1/5')
+    labels = {'redis': '127.0.0.1:1/5', 'pool': 'sync', 'state': 'max'}
+    assert REGISTRY.get_sample_value('redis_pool_connections', labels) == 64
+
+def test_api_health_is_degraded_without_redis(monkeypatch):
+    from src.api.main import app
+    monkeypatch.setattr('src.api.main.get_redis_manager', lambda: get_redis_manager(UNREACHABLE))
+
+    response = TestClient(app).get('/health')
+
+    assert response.status_code == 503
+    assert response.json()['status'] == 'degraded'
+    assert 'sync' in response.json()['redis']['pools']
@@ -0,0 +1,172 @@
+"""Tests for the periodic worker jobs and their overlap protection."""
+import json
+from datetime import datetime, timedelta
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from redis.exceptions import LockNotOwnedError
+from services.worker import celeryconfig
+from services.worker import tasks
+from src.database.models.account import Account, Position
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide, OrderStatus, OrderType
+from src.database.models.instrument import Equity
+from src.database.models.order import Order, OrderEvent
+from src.utils.locks import single_instance
+
+class RecordingLock:
+    def __init__(self, redis, name):
+        self.redis = redis
+        self.name = name
+
+    def acquire(self):
+        if self.name in self.redis.held:
+            return False
+        self.redis.held.add(self.name)
+        return True
+
+    def release(self):
+        if self.name not in self.redis.held:
+            raise LockNotOwnedError("lock expired")
+        self.redis.held.discard(self.name)
+
+class RecordingRedis:
+    def __init__(self):
+        self.held = set()
+        self.timeouts = {}
+        self.values = {}
+
+    def set(self, name, value, ex=None):
+        self.values[name] = (value, ex)
+
+    def lock(self, name, timeout=None, blocking=True):
+        self.timeouts[name] = timeout
+        return RecordingLock(self, name)
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = RecordingRedis()
+    monkeypatch.setattr('src.utils.redis_pool.get_redis', lambda url=None: redis)
+    monkeypatch.setattr(tasks, 'get_redis', lambda url=None: redis)
+    return redis
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+
+    def get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(tasks, 'get_db', get_db)
+    return factory
+
+def job_count(job, outcome):
+    return REGISTRY.get_sample_value('scheduled_job_duration_seconds_count', {'job': job, 'outcome': outcome}) or 0
+
+def test_overlapping_run_is_skipped(redis):
+    runs = []
+
+    @single_instance('rebalance', timeout=30, redis_client=lambda: redis)
+    def rebalance():
+        runs.append(rebalance())
+        return {"status": "success"}
+
+    assert rebalance() == {"status": "success"}
+    assert runs == [{"status": "skipped", "reason": "previous run still in progress"}]
+    assert redis.held == set()
+    assert redis.timeouts == {'lock:rebalance': 30}
+
+def test_expired_lock_does_not_fail_the_job(redis, caplog):
+    @single_instance('slow', timeout=1, redis_client=lambda: redis)
+    def slow():
+        redis.held.clear()  # the lock expired mid-run
+        return {"status": "success"}
+
+    assert slow() == {"status": "success"}
+    assert 'longer than its 1s lock timeout' in caplog.text
+
+def test_sweep_cancels_only_stale_pending_orders(redis, session_factory):
+    db = session_factory()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert().values(id=1, symbol='AAPL', name='Apple', type=InstrumentType.EQUITY))
+    now = datetime.utcnow()
+    orders = {
+        'missed_market': (OrderType.MARKET, OrderStatus.PENDING, now - timedelta(minutes=10)),
+        'fresh_market': (OrderType.MARKET, OrderStatus.PENDING, now - timedelta(minutes=1)),
+        'resting_limit': (OrderType.LIMIT, OrderStatus.PENDING, now - timedelta(hours=2)),
+        'expired_limit': (OrderType.LIMIT, OrderStatus.PENDING, now - timedelta(days=2)),
+        'old_fill': (OrderType.MARKET, OrderStatus.FILLED, now - timedelta(days=2)),
+    }
+    for order_id, (order_type, status, created_at) in enumerate(orders.values(), 1):
+        db.add(Order(id=order_id, account_id=1, instrument_id=1, type=order_type, side=OrderSide.BUY,
+                     status=status, quantity=1, price=100, created_at=created_at))
+    db.commit()
+    successes = job_count('sweep_stale_orders', 'success')
+
+    assert tasks.sweep_stale_orders() == {"status": "success", "cancelled": 2}
+
+    statuses = dict(zip(orders, (order.status for order in db.query(Order).order_by(Order.id))))
+    events = [(event.type, event.order_id, event.payload['status'], event.payload['reason'])
+              for event in db.query(OrderEvent).order_by(OrderEvent.order_id)]
+    db.close()
+    assert statuses == {
+        'missed_market': OrderStatus.CANCELLED,
+        'fresh_market': OrderStatus.PENDING,
+        'resting_limit': OrderStatus.PENDING,
+        'expired_limit': OrderStatus.CANCELLED,
+        'old_fill': OrderStatus.FILLED,
+    }
+    assert events == [('order.cancelled', 1, 'cancelled', 'stale'), ('order.cancelled', 4, 'cancelled', 'stale')]
+    assert job_count('sweep_stale_orders', 'success') == successes + 1
+
+def test_held_lock_skips_the_job_and_is_recorded(redis, session_factory):
+    redis.held.add('lock:sweep_stale_orders')
+    skipped = job_count('sweep_stale_orders', 'skipped')
+
+    assert tasks.sweep_stale_orders()["status"] == "skipped"
+    assert job_count('sweep_stale_orders', 'skipped') == skipped + 1
+
+def test_portfolio_metrics_are_cached_per_account(redis, session_factory):
+    db = session_factory()
+    db.add_all([Account(id=1, name='Desk', email='desk@example.com'),
+                Account(id=2, name='Closed', email='closed@example.com')])
+    db.execute(Instrument.__table__.insert(), [
+        {'id': 1, 'symbol': 'AAPL', 'name': 'Apple', 'type': InstrumentType.EQUITY, 'last_price': 150},
+        {'id': 2, 'symbol': 'XOM', 'name': 'Exxon', 'type': InstrumentType.EQUITY, 'last_price': 100},
+        {'id': 3, 'symbol': 'T-10Y', 'name': 'Treasury', 'type': InstrumentType.BOND, 'last_price': None},
+    ])
+    db.execute(Equity.__table__.insert(), [{'id': 1, 'beta': 1.2}, {'id': 2, 'beta': 0.8}])
+    db.add_all([
+        Position(account_id=1, instrument_id=1, quantity=4, average_entry_price=140),
+        Position(account_id=1, instrument_id=2, quantity=2, average_entry_price=90),
+        # Never priced: valued at cost
+        Position(account_id=1, instrument_id=3, quantity=1, average_entry_price=1000),
+        Position(account_id=2, instrument_id=1, quantity=0, average_entry_price=0),
+    ])
+    db.commit()
+    db.close()
+
+    assert tasks.calculate_all_portfolio_metrics() == {"status": "success", "accounts": 1, "failed": []}
+
+    value, ttl = redis.values['portfolio_metrics:1']
+    metrics = json.loads(value)
+    assert ttl == tasks.PORTFOLIO_METRICS_TTL
+    assert metrics['total_value'] == 1800.0
+    assert metrics['portfolio_beta'] == pytest.approx((600 * 1.2 + 200 * 0.8) / 1800)
+    assert metrics['asset_allocation']['equity'] == pytest.approx(800 / 18)
+    assert metrics['asset_allocation']['bond'] == pytest.approx(1000 / 18)
+
+def test_beat_schedule_targets_registered_tasks():
+    registered = {name.rsplit('.', 1)[-1] for name in tasks.celery.tasks}
+    for entry in celeryconfig.BEAT_SCHEDULE.values():
+        assert entry['task'].startswith('worker.tasks.')
+        assert entry['task'].rsplit('.', 1)[-1] in registered
+    assert tasks.celery.conf.beat_schedule == celeryconfig.BEAT_SCHEDULE
+    assert set(celeryconfig.LOCK_TIMEOUTS) <= registered
@@ -0,0 +1,60 @@
+"""Tests for simulated clocks and reproducible simulations."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+import pytest
+from services.market_simulator.futures_simulator import FuturesSimulator
+from services.market_simulator.market_simulator import MarketSimulator
+from src.utils.clock import RealTimeClock, SimulatedClock, clock_from_env
+
+START = datetime(2024, 3, 4, 9, 30)
+
+@pytest.mark.asyncio
+async def test_simulated_clock_sleeps_without_waiting():
+    clock = SimulatedClock(START)
+    started = time.monotonic()
+    for _ in range(1000):
+        await clock.sleep(60)
+    assert clock.now() == START + timedelta(seconds=60000)
+    assert time.monotonic() - started < 1.0
+
+@pytest.mark.asyncio
+async def test_speed_multiple_scales_wall_time():
+    clock = SimulatedClock(START, speed=100)
+    started = time.monotonic()
+    await clock.sleep(5)
+    assert 0.04 <= time.monotonic() - started < 0.5
+    assert clock.now() == START + timedelta(seconds=5)
+
+def test_clock_from_env(monkeypatch):
+    monkeypatch.delenv('SIMULATION_SPEED', raising=False)
+    assert isinstance(clock_from_env(), RealTimeClock)
+    monkeypatch.setenv('SIMULATION_SPEED', 'max')
+    monkeypatch.setenv('SIMULATION_START', '2024-03-04T09:30:00')
+    clock = clock_from_env()
+    assert clock.now() == START and clock.speed is None
+    monkeypatch.setenv('SIMULATION_SPEED', '60')
+    assert clock_from_env().speed == 60.0
+
+@pytest.mark.parametrize("mode", ["gbm", "factor"])
+def test_market_simulation_is_reproducible(mode):
+    def day():
+        simulator = MarketSimulator('redis://localhost:6379', mode=mode, clock=SimulatedClock(START), seed=7)
+        return [update for tick in simulator.simulate(500) for update in tick]
+
+    first, second = day(), day()
+    assert first == second
+    assert first[0]['timestamp'] == START.isoformat()
+    assert first[-1]['timestamp'] == (START + timedelta(seconds=499)).isoformat()
+
+def test_futures_simulation_is_reproducible():
+    def day(seed):
+        simulator = FuturesSimulator('redis://localhost:6379', clock=SimulatedClock(START), seed=seed)
+        return [update for tick in simulator.simulate(100) for update in tick]
+
+    assert day(3) == day(3)
+    assert day(3) != day(4)
+
+def test_simulate_requires_simulated_clock():
+    with pytest.raises(ValueError):
+        next(MarketSimulator('redis://localhost:6379').simulate(1))
@@ -0,0 +1,86 @@
+"""Tests for sampled tracing and OTLP export."""
+import json
+import pytest
+from fastapi.testclient import TestClient
+from src.api.main import app
+from src.utils import tracing
+from src.utils.tracing import JsonLinesExporter, Tracer, traced
+
+class CollectingExporter:
+    def __init__(self):
+        self.requests = []
+
+    def export(self, request):
+        self.requests.append(request)
+
+    def spans(self, index=-1):
+        return self.requests[index]['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+@pytest.fixture
+def exporter():
+    """Point the process tracer at an in-memory exporter for the test."""
+    collecting = CollectingExporter()
+    tracing.tracer.configure('test', 1.0, collecting)
+    yield collecting
+    tracing.tracer.configure('trading-system', 0.0)
+
+def test_disabled_tracer_hands_out_one_shared_noop():
+    tracer = Tracer()
+    with tracer.span('a') as a, tracer.span('b') as b:
+        a.set_attribute('key', 'value')
+    assert a is b
+    assert tracing.current_span() is None
+
+def test_nested_spans_export_one_otlp_trace(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    tracer = Tracer('worker', 1.0, JsonLinesExporter(str(path)))
+
+    with tracer.span('execute_order', order_id=7):
+        with tracer.span('db.commit'):
+            pass
+        with pytest.raises(ValueError), tracer.span('redis.quote'):
+            raise ValueError('no quote')
+
+    request = json.loads(path.read_text().strip())
+    resource = request['resourceSpans'][0]
+    assert resource['resource']['attributes'][0] == {'key': 'service.name', 'value': {'stringValue': 'worker'}}
+    spans = {s['name']: s for s in resource['scopeSpans'][0]['spans']}
+    root = spans['execute_order']
+    assert 'parentSpanId' not in root
+    assert root['attributes'] == [{'key': 'order_id', 'value': {'intValue': '7'}}]
+    assert {spans['db.commit']['traceId'], spans['redis.quote']['traceId']} == {root['traceId']}
+    assert spans['db.commit']['parentSpanId'] == root['spanId']
+    assert spans['redis.quote']['status'] == {'code': 2, 'message': 'ValueError: no quote'}
+    assert int(root['endTimeUnixNano']) >= int(spans['db.commit']['endTimeUnixNano'])
+
+def test_sampling_is_decided_at_the_root():
+    collecting = CollectingExporter()
+    tracer = Tracer('test', 0.25, collecting)
+    tracing.random.seed(3)
+
+    for _ in range(2000):
+        with tracer.span('root'):
+            with tracer.span('child'):
+                pass
+
+    assert 400 < len(collecting.requests) < 600
+    assert all(len(request['resourceSpans'][0]['scopeSpans'][0]['spans']) == 2
+               for request in collecting.requests)
+
+@pytest.mark.asyncio
+async def test_traced_decorator_wraps_async_functions(exporter):
+    @traced()
+    async def fetch_quote(symbol):
+        with tracing.span('redis.get'):
+            return symbol
+
+    assert await fetch_quote('AAPL') == 'AAPL'
+    names = [s['name'] for s in exporter.spans()]
+    assert names == ['redis.get', 'test_traced_decorator_wraps_async_functions.<locals>.fetch_quote']
+
+def test_api_requests_are_traced_by_route(exporter):
+    assert TestClient(app).get('/').status_code == 200
+
+    span = exporter.spans()[-1]
+    assert span['name'] == 'GET /'
+    assert {'key': 'http.status_code', 'value': {'intValue': '200'}} in span['attributes']
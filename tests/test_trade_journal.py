@@ -0,0 +1,226 @@
+"""Tests for the write-ahead trade journal."""
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models.account import Account, Position
+from src.database.models.base import Base, Instrument, InstrumentType, OrderSide, OrderStatus, OrderType
+from src.database.models.order import Order, Trade, TradeFill
+from src.execution.position_keeper import PositionKeeper
+from src.execution.trade_journal import TradeJournal
+
+def fill(n, order_id=1):
+    return {
+        'fill_id': f"fill-{n}",
+        'order_id': order_id,
+        'account_id': 1,
+        'instrument_id': 1,
+        'quantity': Decimal('1.5'),
+        'price': Decimal('100.25'),
+        'side': OrderSide.BUY,
+        'executed_at': datetime(2026, 1, 2, 9, 30),
+    }
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'trades.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Account(id=1, name='Desk', email='desk@example.com'))
+    db.execute(Instrument.__table__.insert().values(id=1, symbol='AAPL', name='Apple', type=InstrumentType.EQUITY))
+    db.add(Order(id=1, account_id=1, instrument_id=1, type=OrderType.MARKET, side=OrderSide.BUY,
+                 status=OrderStatus.FILLED, quantity=1))
+    db.commit()
+    db.close()
+    return url
+
+@pytest.fixture
+def session_factory(database_url):
+    return sessionmaker(bind=create_engine(database_url))
+
+def stored(session_factory):
+    db = session_factory()
+    try:
+        return [trade.fill_id for trade in db.query(Trade).order_by(Trade.id)]
+    finally:
+        db.close()
+
+def test_fills_are_inserted_in_batches(tmp_path, session_factory):
+    journal = TradeJournal(str(tmp_path / 'wal'), session_factory, flush_interval=60, batch_size=100)
+    journal.start()
+    try:
+        threads = [threading.Thread(target=lambda i=i: [journal.record(fill(i * 100 + n)) for n in range(50)])
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert journal.pending <= 200
+    finally:
+        journal.stop()
+
+    assert len(stored(session_factory)) == 200
+    assert os.listdir(tmp_path / 'wal') == []  # clean shutdown leaves no segment
+
+    db = session_factory()
+    trade = db.query(Trade).filter(Trade.fill_id == 'fill-0').one()
+    db.close()
+    assert (trade.quantity, trade.price, trade.side) == (Decimal('1.5'), Decimal('100.25'), OrderSide.BUY)
+
+def test_flush_checkpoints_and_keeps_failed_batches(tmp_path, session_factory):
+    broken = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'empty.db'}"))
+    journal = TradeJournal(str(tmp_path / 'wal'), broken, flush_interval=60)
+    journal.start()
+    try:
+        journal.record(fill(1))
+        journal.record(fill(2), durable=False)
+        with pytest.raises(Exception, match='Error inserting trades'):
+            journal.flush()
+        assert journal.pending == 2
+
+        journal.session_factory = session_factory
+        assert journal.flush() == 2
+        assert journal.pending == 0
+    finally:
+        journal.stop()
+    assert stored(session_factory) == ['fill-1', 'fill-2']
+
+CRASH = textwrap.dedent('''
+    import os, sys
+    from datetime import datetime
+    from decimal import Decimal
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from src.database.models.base import OrderSide
+    from src.database.models.order import Order  # noqa: F401
+    from src.execution.trade_journal import TradeJournal
+
+    journal = TradeJournal(sys.argv[1], sessionmaker(bind=create_engine(sys.argv[2])), flush_interval=60)
+    journal.start()
+    for n in range(5):
+        journal.record({'fill_id': f"fill-{n}", 'order_id': 1, 'account_id': 1, 'instrument_id': 1,
+                        'quantity': Decimal(1), 'price': Decimal(100), 'side': OrderSide.SELL,
+                        'executed_at': datetime(2026, 1, 2)})
+        if n == 2:
+            journal.flush()
+    os._exit(1)  # no shutdown: fills 3 and 4 were never inserted
+''')
+
+def test_crashed_segments_are_replayed_once(tmp_path, database_url, session_factory):
+    wal_dir = str(tmp_path / 'wal')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', CRASH, wal_dir, database_url], cwd=root, check=False)
+    assert stored(session_factory) == ['fill-0', 'fill-1', 'fill-2']
+    segment = os.listdir(wal_dir)[0]
+    # A torn final line from the crash is ignored
+    with open(os.path.join(wal_dir, segment), 'ab') as f:
+        f.write(b'{"seq":6,"fi')
+
+    journal = TradeJournal(wal_dir, session_factory)
+    assert journal.start() == 2
+    journal.stop()
+    assert stored(session_factory) == ['fill-0', 'fill-1', 'fill-2', 'fill-3', 'fill-4']
+
+def test_start_is_retried_after_a_failed_replay(tmp_path, database_url, session_factory):
+    wal_dir = str(tmp_path / 'wal')
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', CRASH, wal_dir, database_url], cwd=root, check=False)
+
+    def database_down():
+        raise Exception("database is down")
+
+    journal = TradeJournal(wal_dir, database_down)
+    with pytest.raises(Exception, match="database is down"):
+        journal.start()
+    journal.session_factory = session_factory
+    assert journal.start() == 2
+    try:
+        journal.record(fill(5))
+    finally:
+        journal.stop()
+    assert stored(session_factory) == ['fill-0', 'fill-1', 'fill-2', 'fill-3', 'fill-4', 'fill-5']
+
+def test_replay_skips_fills_already_stored(tmp_path, session_factory):
+    journal = TradeJournal(str(tmp_path / 'wal'), session_factory, flush_interval=60)
+    journal.start()
+    journal.record(fill(1))
+    journal.flush()
+    journal._buffer.append((99, fill(1)))  # as if committed but not checkpointed
+    journal.stop()
+    assert stored(session_factory) == ['fill-1']
+
+def test_fill_is_stored_once_whatever_its_time(tmp_path, session_factory):
+    later = {**fill(1), 'executed_at': datetime(2026, 1, 2, 9, 31), 'price': Decimal('101')}
+    journal = TradeJournal(str(tmp_path / 'wal'), session_factory, flush_interval=60)
+    journal.start()
+    try:
+        # A redelivered order filled again, in the same batch and in a later one
+        journal.record(fill(1))
+        journal.record(later)
+        journal.flush()
+        journal.record(later)
+        journal.flush()
+    finally:
+        journal.stop()
+    db = session_factory()
+    assert [(t.fill_id, t.price) for t in db.query(Trade)] == [('fill-1', Decimal('100.25'))]
+    assert [(f.fill_id, f.executed_at) for f in db.query(TradeFill)] == [('fill-1', datetime(2026, 1, 2, 9, 30))]
+    db.close()
+
+def test_positions_change_with_their_trades_only(tmp_path, session_factory):
+    positions = PositionKeeper(session_factory)
+    journal = TradeJournal(str(tmp_path / 'wal'), session_factory, flush_interval=60, positions=positions)
+    journal.start()
+    journal.record(fill(1))
+    journal.record(fill(2))
+    journal.flush()
+    journal._buffer.append((99, fill(1)))  # replayed: already stored
+    journal.stop()
+
+    db = session_factory()
+    position = db.query(Position).one()
+    db.close()
+    assert (position.quantity, position.average_entry_price) == (Decimal('3'), Decimal('100.25'))
+
+def test_live_segments_are_not_replayed(tmp_path, session_factory):
+    wal_dir = str(tmp_path / 'wal')
+    live = TradeJournal(wal_dir, session_factory, flush_interval=60)
+    live.start()
+    try:
+        live.record(fill(1))
+        other = TradeJournal(wal_dir, session_factory)
+        assert other.recover() == 0
+        assert stored(session_factory) == []
+    finally:
+        live.stop()
+    assert stored(session_factory) == ['fill-1']
+
+def test_new_segments_appear_already_locked(tmp_path, session_factory, monkeypatch):
+    wal_dir = str(tmp_path / 'wal')
+    journal = TradeJournal(wal_dir, session_factory)
+    rename, renamed = os.rename, []
+
+    def recover_then_rename(src, dst):
+        # A recover() in another process at this point must not claim the segment
+        assert TradeJournal(wal_dir, session_factory).recover() == 0
+        assert os.path.exists(src)
+        rename(src, dst)
+        renamed.append(os.path.basename(dst))
+
+    monkeypatch.setattr(os, 'rename', recover_then_rename)
+    journal.start()
+    try:
+        assert os.listdir(wal_dir) == renamed
+    finally:
+        journal.stop()
+
+def test_record_requires_start(tmp_path, session_factory):
+    with pytest.raises(Exception, match='not started'):
+        TradeJournal(str(tmp_path / 'wal'), session_factory).record(fill(1))
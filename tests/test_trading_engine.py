@@ -0,0 +1,85 @@
+"""Tests for the async trading engine against the simulated exchange."""
+import pytest
+from services.market_simulator.market_simulator import MarketSimulator
+from src.execution.simulated_exchange import SimulatedExchange
+from src.execution.trading_engine import TradingEngine
+from src.utils.rate_limit import AsyncTokenBucket
+
+def make_engine(exchange, **kwargs):
+    return TradingEngine(exchange=exchange, rate_limiter=AsyncTokenBucket(rate=1e6, capacity=1e6), **kwargs)
+
+def order(symbol='AAPL', side='buy', amount=1.0, order_type='market', price=None):
+    return {'symbol': symbol, 'type': order_type, 'side': side, 'amount': amount, 'price': price}
+
+@pytest.mark.asyncio
+async def test_place_order_fills_at_simulator_price():
+    simulator = MarketSimulator('redis://localhost:6379')
+    exchange = SimulatedExchange(simulator)
+    async with make_engine(exchange) as engine:
+        filled = await engine.place_order('AAPL', 'market', 'buy', 2.0)
+        position = await engine.get_position('AAPL')
+
+    assert filled['status'] == 'closed'
+    assert filled['average'] == simulator.prices['AAPL']
+    assert position['contracts'] == 2.0 and position['side'] == 'long'
+    assert exchange.closed
+
+@pytest.mark.asyncio
+async def test_concurrent_placement_respects_in_flight_window():
+    exchange = SimulatedExchange(prices={'AAPL': 100.0}, latency=0.01)
+    exchange.has = {}
+    engine = make_engine(exchange, max_in_flight=4)
+
+    results = await engine.place_orders([order() for _ in range(20)] + [order(symbol='NOPE')])
+
+    assert [r['status'] for r in results[:20]] == ['closed'] * 20
+    assert isinstance(results[-1], Exception)
+    assert exchange.peak_in_flight == 4
+    assert exchange.requests == 21
+
+@pytest.mark.asyncio
+async def test_batch_endpoints_are_used_when_available():
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = make_engine(exchange, batch_size=10)
+
+    placed = await engine.place_orders([order(order_type='limit', price=90.0) for _ in range(25)])
+    assert exchange.requests == 3
+    assert all(o['status'] == 'open' for o in placed)
+
+    canceled = await engine.cancel_orders([o['id'] for o in placed[:5]])
+    assert [o['status'] for o in canceled] == ['canceled'] * 5
+    assert exchange.requests == 4
+
+@pytest.mark.asyncio
+async def test_replace_orders_with_and_without_edit_support():
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = make_engine(exchange)
+    resting = await engine.place_orders([order(order_type='limit', price=95.0) for _ in range(2)])
+
+    edited = await engine.replace_orders([dict(order(order_type='limit', price=96.0), id=resting[0]['id'])])
+    exchange.has = {}
+    requests = exchange.requests
+    swapped = await engine.replace_orders([dict(order(order_type='limit', price=97.0), id=resting[1]['id'])])
+
+    assert edited[0]['price'] == 96.0 and swapped[0]['price'] == 97.0
+    assert exchange.requests - requests == 2
+    assert [exchange.orders[o['id']]['status'] for o in resting] == ['canceled', 'canceled']
+
+@pytest.mark.asyncio
+async def test_resting_limit_order_fills_when_crossed():
+    exchange = SimulatedExchange(prices={'AAPL': 100.0})
+    engine = make_engine(exchange)
+    resting = await engine.place_order('AAPL', 'limit', 'sell', 1.0, 105.0)
+
+    exchange.prices['AAPL'] = 106.0
+    fills = exchange.match()
+    status = await engine.update_order_status(resting['id'])
+
+    assert [f['id'] for f in fills] == [resting['id']]
+    assert status['status'] == 'closed' and status['average'] == 105.0
+
+@pytest.mark.asyncio
+async def test_errors_are_wrapped():
+    engine = make_engine(SimulatedExchange(prices={'AAPL': 100.0}))
+    with pytest.raises(Exception, match="Error canceling order"):
+        await engine.cancel_order('404')